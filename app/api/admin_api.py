@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pydantic import BaseModel
 import logging
 from app.api.auth import require_admin
+from app.models.user import UserRole
 from app.services.auth_service import auth_service
 
 logger = logging.getLogger(__name__)
@@ -16,19 +17,28 @@ class GuestCreate(BaseModel):
     password: str
     loyalty_tier: str = "Standard"
 
+class UserUpdate(BaseModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    username: Optional[str] = None
+    password: Optional[str] = None
+    role: Optional[UserRole] = None
+    loyalty_tier: Optional[str] = None
+    is_active: Optional[bool] = None
+
 @router.post("/add-guest")
 async def add_guest(guest_data: GuestCreate, user = Depends(require_admin)):
     """Add a new guest user (admin only)"""
     logger.info(f"Attempting to create new guest: {guest_data.username}")
     
     # Check if username already exists
-    for existing_user in auth_service.users_data:
-        if existing_user.get('username') == guest_data.username.lower():
-            logger.warning(f"Username '{guest_data.username}' is already taken")
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Username '{guest_data.username}' is already taken"
-            )
+    if auth_service.get_user_by_username(guest_data.username.lower()):
+        logger.warning(f"Username '{guest_data.username}' is already taken")
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Username '{guest_data.username}' is already taken"
+        )
     
     # Create the new user
     user_dict = guest_data.dict()
@@ -44,3 +54,27 @@ async def add_guest(guest_data: GuestCreate, user = Depends(require_admin)):
         
     logger.info(f"✅ New guest account created: {new_user.username}")
     return {"success": True, "user": new_user}
+
+@router.put("/users/{user_id}")
+async def update_user(user_id: str, updates: UserUpdate, user = Depends(require_admin)):
+    """Edit a user's profile, password or role (admin only); their sessions pick it up on the next request"""
+    changes = updates.dict(exclude_unset=True)
+    if 'role' in changes:
+        changes['role'] = changes['role'].value
+    
+    # Check if the new username is already taken by someone else
+    if changes.get('username'):
+        existing = auth_service.get_user_by_username(changes['username'].lower())
+        if existing and existing['user_id'] != user_id:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Username '{changes['username']}' is already taken"
+            )
+    
+    updated_user = auth_service.update_user(user_id, changes)
+    
+    if not updated_user:
+        raise HTTPException(status_code=404, detail="User not found")
+        
+    logger.info(f"✅ User account updated: {updated_user.username} ({', '.join(changes)})")
+    return {"success": True, "user": updated_user}
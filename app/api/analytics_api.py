@@ -1,63 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
 import logging
-import json
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from app.api.auth import require_admin
 from app.models.user import User
 from app.services.sentiment_service import sentiment_service
+from app.services.feedback_repository import feedback_repository
+from app.services.json_stream import load_json_records
+from app.services.analytics_store import analytics_store, guest_from_user
+from app.services.alert_store import admin_alert_store
+from app.services.event_broadcaster import EventBroadcaster, alert_events
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
+# Seconds between keep-alive comments on idle event streams
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("ALERT_STREAM_HEARTBEAT_SECONDS", "15"))
+
 @router.get("/dashboard")
 async def get_analytics_dashboard(
     current_user: User = Depends(require_admin)
 ):
     """Get comprehensive analytics dashboard data"""
     try:
-        # Load feedback data for analysis
-        feedback_data = _load_feedback_data()
-        guest_data = _load_guest_data()
-        
-        # Calculate metrics
-        total_guests = len(guest_data)
-        total_feedback = len(feedback_data)
-        
-        # Sentiment analysis
-        sentiment_breakdown = _calculate_sentiment_breakdown(feedback_data)
-        
-        # Rating analysis
-        rating_breakdown = _calculate_rating_breakdown(feedback_data)
-        
-        # Recent alerts (negative sentiment)
-        recent_alerts = _get_recent_alerts(feedback_data)
-        
-        # Guest satisfaction trends
-        satisfaction_trends = _calculate_satisfaction_trends(feedback_data)
-        
-        # Loyalty tier distribution
-        loyalty_distribution = _calculate_loyalty_distribution(guest_data)
-        
-        dashboard_data = {
-            "overview": {
-                "total_guests": total_guests,
-                "total_feedback": total_feedback,
-                "average_rating": rating_breakdown["average_rating"],
-                "satisfaction_rate": sentiment_breakdown["positive_percentage"],
-                "alert_count": len(recent_alerts)
-            },
-            "sentiment_analysis": sentiment_breakdown,
-            "rating_breakdown": rating_breakdown,
-            "recent_alerts": recent_alerts,
-            "satisfaction_trends": satisfaction_trends,
-            "loyalty_distribution": loyalty_distribution,
-            "generated_at": datetime.utcnow().isoformat()
-        }
+        # Served from incrementally maintained aggregates; only the first call reads from disk
+        await _ensure_aggregates()
+        dashboard_data = analytics_store.dashboard()
         
         return JSONResponse(
             status_code=200,
@@ -71,6 +44,28 @@ async def get_analytics_dashboard(
         logger.error(f"❌ Error generating analytics dashboard: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate analytics dashboard")
 
+@router.post("/rebuild")
+async def rebuild_analytics(
+    current_user: User = Depends(require_admin)
+):
+    """Rebuild all dashboard aggregates from the stored feedback and guest data"""
+    try:
+        await feedback_repository.wait_loaded()
+        _rebuild_aggregates()
+        
+        return JSONResponse(
+            status_code=200,
+            content={
+                "success": True,
+                "message": "Analytics aggregates rebuilt",
+                "data": analytics_store.dashboard()["overview"]
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Error rebuilding analytics aggregates: {e}")
+        raise HTTPException(status_code=500, detail="Failed to rebuild analytics aggregates")
+
 @router.get("/sentiment-trends")
 async def get_sentiment_trends(
     days: int = 30,
@@ -78,27 +73,15 @@ async def get_sentiment_trends(
 ):
     """Get sentiment trends over specified number of days"""
     try:
-        feedback_data = _load_feedback_data()
-        
-        # Filter feedback by date range
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        recent_feedback = [
-            f for f in feedback_data 
-            if datetime.fromisoformat(f.get("submitted_at", f.get("date", "2024-01-01")).replace("Z", "")) > cutoff_date
-        ]
-        
-        # Group by date and calculate sentiment trends
-        trends = _calculate_daily_sentiment_trends(recent_feedback)
+        # Answered from the day-bucketed index in O(days)
+        await _ensure_aggregates()
+        trends = analytics_store.sentiment_trends(days)
         
         return JSONResponse(
             status_code=200,
             content={
                 "success": True,
-                "data": {
-                    "period_days": days,
-                    "total_feedback": len(recent_feedback),
-                    "trends": trends
-                }
+                "data": trends
             }
         )
         
@@ -113,15 +96,12 @@ async def get_active_alerts(
 ):
     """Get active alerts for negative sentiment and issues"""
     try:
-        # Import feedback alerts from feedback API
-        from app.api.feedback_api import admin_alerts
-        
         # Get recent feedback alerts
-        recent_alerts = admin_alerts[:limit]
+        recent_alerts = admin_alert_store.recent(limit)
         
         # Also get alerts from feedback data analysis
-        feedback_data = _load_feedback_data()
-        sentiment_alerts = _get_recent_alerts(feedback_data, limit=limit)
+        await _ensure_aggregates()
+        sentiment_alerts = analytics_store.recent_alerts(limit=limit)
         
         # Combine and deduplicate alerts
         all_alerts = recent_alerts + sentiment_alerts
@@ -135,7 +115,7 @@ async def get_active_alerts(
                 "success": True,
                 "data": {
                     "total_alerts": len(all_alerts[:limit]),
-                    "unread_count": len([a for a in recent_alerts if a.get("status") == "unread"]),
+                    "unread_count": admin_alert_store.unread_count,
                     "alerts": all_alerts[:limit]
                 }
             }
@@ -145,6 +125,51 @@ async def get_active_alerts(
         logger.error(f"❌ Error getting alerts: {e}")
         raise HTTPException(status_code=500, detail="Failed to get alerts")
 
+@router.get("/alerts/stream")
+async def stream_alerts(
+    request: Request,
+    last_event_id: Optional[int] = None,
+    current_user: User = Depends(require_admin)
+):
+    """Server-Sent Events stream of new alerts, read receipts and dashboard aggregate deltas"""
+    # EventSource sends Last-Event-ID itself when it reconnects
+    header_id = request.headers.get("last-event-id")
+    if header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+    
+    return StreamingResponse(
+        _alert_event_stream(request, last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+async def _alert_event_stream(request: Request, last_event_id: Optional[int]):
+    subscription, replay = alert_events.subscribe(last_event_id)
+    try:
+        yield "retry: 3000\n\n"
+        if replay is None:
+            # Too far behind to replay; the client reloads through the REST endpoints
+            yield EventBroadcaster.format_event(None, "resync", {"reason": "missed events"})
+        else:
+            for event in replay:
+                yield EventBroadcaster.format_event(*event)
+        
+        # A client whose queue overflowed is dropped and resumes from Last-Event-ID
+        while not subscription.overflowed:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield EventBroadcaster.format_event(*event)
+    finally:
+        alert_events.unsubscribe(subscription)
+
 @router.get("/guest-insights/{guest_id}")
 async def get_guest_insights(
     guest_id: str,
@@ -152,16 +177,15 @@ async def get_guest_insights(
 ):
     """Get detailed insights for a specific guest"""
     try:
-        feedback_data = _load_feedback_data()
-        guest_data = _load_guest_data()
+        await _ensure_aggregates()
         
         # Find guest
-        guest = next((g for g in guest_data if g.get("guest_id") == guest_id), None)
+        guest = analytics_store.get_guest(guest_id)
         if not guest:
             raise HTTPException(status_code=404, detail="Guest not found")
         
-        # Get guest's feedback
-        guest_feedback = [f for f in feedback_data if f.get("guest_id") == guest_id]
+        # Get guest's feedback from the guest_id index
+        guest_feedback = analytics_store.guest_feedback(guest_id)
         
         # Calculate insights
         insights = {
@@ -188,25 +212,47 @@ async def get_guest_insights(
         logger.error(f"❌ Error getting guest insights: {e}")
         raise HTTPException(status_code=500, detail="Failed to get guest insights")
 
+@router.get("/sentiment-cache")
+async def get_sentiment_cache_stats(
+    current_user: User = Depends(require_admin)
+):
+    """Get hit/miss statistics for the sentiment result cache"""
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "data": sentiment_service.result_cache.stats()
+        }
+    )
+
+def _rebuild_aggregates():
+    """Recompute the analytics aggregates from disk"""
+    # Submissions still waiting for sentiment analysis are added by the feedback pipeline once scored
+    feedback_data = [
+        f for f in _load_feedback_data()
+        if "processing" not in f or "sentiment_analysis" in f
+    ]
+    # Sample feedback stands in until the first real submission, which replaces it
+    analytics_store.rebuild(feedback_data, _load_guest_data(), sample_feedback=len(feedback_repository) == 0)
+
+async def _ensure_aggregates():
+    """Build the analytics aggregates on first use"""
+    if not analytics_store.built:
+        await feedback_repository.wait_loaded()
+        _rebuild_aggregates()
+
 def _load_feedback_data() -> List[Dict]:
     """Load feedback data from JSON file"""
     try:
-        # Load from the actual feedback submissions file
-        feedback_file = os.path.join(os.path.dirname(__file__), "../data/feedback_submissions.json")
-        with open(feedback_file, 'r') as f:
-            data = json.load(f)
-            # Return the data directly as it's an array of feedback objects
-            feedback_data = data if isinstance(data, list) else []
+        # The shared in-memory view of the feedback snapshot and append-only log
+        feedback_data = feedback_repository.all()
+        
+        # If no feedback data found, generate sample data
+        if not feedback_data:
+            logger.warning("No feedback data found, generating sample data")
+            feedback_data = _generate_sample_feedback_data()
             
-            # If no feedback data found, generate sample data
-            if not feedback_data:
-                logger.warning("No feedback data found, generating sample data")
-                feedback_data = _generate_sample_feedback_data()
-                
-            return feedback_data
-    except FileNotFoundError:
-        logger.warning("Feedback submissions file not found, generating sample data")
-        return _generate_sample_feedback_data()
+        return feedback_data
     except Exception as e:
         logger.error(f"Error loading feedback data: {e}")
         return _generate_sample_feedback_data()
@@ -274,38 +320,26 @@ def _generate_sample_feedback_data() -> List[Dict]:
     ]
 
 def _load_guest_data() -> List[Dict]:
-    """Load guest data from JSON file"""
+    """Load guest data: the CRM guests plus the guest accounts in users.json"""
     try:
-        # Try to load from users.json first (more likely to exist)
-        users_file = os.path.join(os.path.dirname(__file__), "../data/users.json")
-        if os.path.exists(users_file):
-            with open(users_file, 'r') as f:
-                users_data = json.load(f)
-                if isinstance(users_data, list) and len(users_data) > 0:
-                    # Convert users to guest format
-                    guests = []
-                    for user in users_data:
-                        if user.get('role') == 'guest':
-                            guests.append({
-                                'guest_id': user.get('user_id'),
-                                'username': user.get('username'),
-                                'first_name': user.get('first_name'),
-                                'last_name': user.get('last_name'),
-                                'email': user.get('email', ''),
-                                'loyalty_tier': user.get('loyalty_tier', 'Standard')
-                            })
-                    if guests:
-                        return guests
-        
-        # If users.json didn't work, try comprehensive_guests_data.json
+        guests_by_id: Dict[str, Dict] = {}
+
         guest_file = os.path.join(os.path.dirname(__file__), "../data/comprehensive_guests_data.json")
         if os.path.exists(guest_file):
-            with open(guest_file, 'r') as f:
-                data = json.load(f)
-                guests = data.get('guests', []) if isinstance(data, dict) else data if isinstance(data, list) else []
-                if guests:
-                    return guests
-        
+            for guest in load_json_records(guest_file, key='guests'):
+                guests_by_id[guest.get('guest_id')] = guest
+
+        # Guest accounts are created with the customer role (auth_service.create_user adds
+        # them to the live aggregates too), streamed so only the guests are held in memory
+        users_file = os.path.join(os.path.dirname(__file__), "../data/users.json")
+        if os.path.exists(users_file):
+            for user in load_json_records(users_file):
+                if user.get('role') in ('guest', 'customer'):
+                    guests_by_id.setdefault(user.get('user_id'), guest_from_user(user))
+
+        if guests_by_id:
+            return list(guests_by_id.values())
+
         # If no data found, generate sample data
         logger.warning("No guest data found, generating sample data")
         return _generate_sample_guest_data()
@@ -400,154 +434,6 @@ def _calculate_sentiment_breakdown(feedback_data: List[Dict]) -> Dict:
         "neutral_percentage": round((neutral / total) * 100, 1) if total > 0 else 0
     }
 
-def _calculate_rating_breakdown(feedback_data: List[Dict]) -> Dict:
-    """Calculate rating breakdown from feedback data"""
-    if not feedback_data:
-        return {
-            "average_rating": 0,
-            "rating_distribution": {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        }
-    
-    ratings = [f.get("rating", 0) for f in feedback_data if f.get("rating")]
-    average_rating = sum(ratings) / len(ratings) if ratings else 0
-    
-    rating_distribution = {i: 0 for i in range(1, 6)}
-    for rating in ratings:
-        if 1 <= rating <= 5:
-            rating_distribution[rating] += 1
-    
-    return {
-        "average_rating": round(average_rating, 2),
-        "rating_distribution": rating_distribution
-    }
-
-def _get_recent_alerts(feedback_data: List[Dict], limit: int = 10) -> List[Dict]:
-    """Get recent alerts for negative sentiment"""
-    alerts = []
-    
-    for feedback in feedback_data:
-        sentiment_analysis = feedback.get("sentiment_analysis", {})
-        sentiment = sentiment_analysis.get("sentiment", "").lower()
-        confidence = sentiment_analysis.get("confidence", 0)
-        rating = feedback.get("rating", 3)
-        
-        # Create alerts for negative sentiment or low ratings
-        if sentiment == "negative" or rating <= 2:
-            # Determine priority
-            if rating <= 2 or sentiment == "negative":
-                priority = "high"
-                priority_emoji = "🔴"
-            elif rating == 3 or sentiment == "neutral":
-                priority = "medium"
-                priority_emoji = "🟡"
-            else:
-                priority = "low"
-                priority_emoji = "🟢"
-            
-            alert = {
-                "alert_id": f"ALERT_{feedback.get('feedback_id', 'unknown')}",
-                "type": "feedback",
-                "priority": priority,
-                "priority_emoji": priority_emoji,
-                "title": f"Feedback Alert: {feedback.get('subject', 'No subject')}",
-                "message": feedback.get("comment", "")[:150] + ("..." if len(feedback.get("comment", "")) > 150 else ""),
-                "feedback_id": feedback.get("feedback_id", ""),
-                "guest_id": feedback.get("guest_id", ""),
-                "guest_name": feedback.get("guest_name", "Unknown"),
-                "sentiment": sentiment,
-                "rating": rating,
-                "confidence": confidence,
-                "category": feedback.get("category", "general"),
-                "created_at": feedback.get("submitted_at", datetime.utcnow().isoformat()),
-                "status": "unread"
-            }
-            alerts.append(alert)
-    
-    # Sort by timestamp (most recent first) and limit
-    alerts.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-    return alerts[:limit]
-
-def _calculate_satisfaction_trends(feedback_data: List[Dict]) -> List[Dict]:
-    """Calculate satisfaction trends over time"""
-    # Group feedback by date and calculate average satisfaction
-    trends = []
-    
-    # Get last 7 days of data
-    for i in range(7):
-        date = datetime.utcnow() - timedelta(days=i)
-        date_str = date.strftime("%Y-%m-%d")
-        
-        # Filter feedback for this day
-        day_feedback = [
-            f for f in feedback_data 
-            if f.get("submitted_at", "").startswith(date_str)
-        ]
-        
-        if day_feedback:
-            # Calculate average rating
-            avg_rating = sum(f.get("rating", 0) for f in day_feedback) / len(day_feedback)
-            
-            # Calculate positive sentiment percentage
-            positive_sentiment = sum(1 for f in day_feedback 
-                                   if f.get("sentiment_analysis", {}).get("sentiment", "").lower() == "positive")
-            satisfaction_rate = (positive_sentiment / len(day_feedback)) * 100
-        else:
-            avg_rating = 0
-            satisfaction_rate = 0
-        
-        # Format date for display (e.g., "Jul 2")
-        display_date = date.strftime("%b %d")
-        
-        trends.append({
-            "date": date_str,
-            "display_date": display_date,
-            "average_rating": round(avg_rating, 2),
-            "satisfaction_rate": round(satisfaction_rate, 1),
-            "feedback_count": len(day_feedback)
-        })
-    
-    return list(reversed(trends))  # Most recent last
-
-def _calculate_loyalty_distribution(guest_data: List[Dict]) -> Dict:
-    """Calculate distribution of guests by loyalty tier"""
-    if not guest_data:
-        return {
-            "tiers": [],
-            "total_guests": 0
-        }
-    
-    # Default tiers if none defined
-    default_tiers = ["Bronze", "Silver", "Gold", "Platinum", "Diamond"]
-    
-    tiers = {}
-    for guest in guest_data:
-        tier = guest.get("loyalty_tier", "Standard")
-        tiers[tier] = tiers.get(tier, 0) + 1
-    
-    # If no tiers found in data, create sample data
-    if not tiers:
-        tiers = {
-            "Standard": len(guest_data) // 3,
-            "Silver": len(guest_data) // 3,
-            "Gold": len(guest_data) - (len(guest_data) // 3) * 2
-        }
-    
-    # Format for chart display
-    tier_data = []
-    for tier, count in tiers.items():
-        tier_data.append({
-            "name": tier,
-            "count": count,
-            "percentage": round((count / len(guest_data)) * 100, 1)
-        })
-    
-    return {
-        "tiers": tier_data,
-        "total_guests": len(guest_data)
-    }
-    
-    return tiers
-
 def _analyze_guest_preferences(guest: Dict, feedback_history: List[Dict]) -> Dict:
     """Analyze guest preferences based on profile and feedback"""
     preferences = guest.get("preferences", {})
@@ -582,36 +468,3 @@ def _analyze_recommendation_effectiveness(guest_id: str, feedback_history: List[
         "sample_size": len(recent_feedback),
         "recent_positive_feedback": positive_feedback
     }
-
-def _calculate_daily_sentiment_trends(feedback_data: List[Dict]) -> List[Dict]:
-    """Calculate daily sentiment trends"""
-    daily_trends = {}
-    
-    for feedback in feedback_data:
-        date = feedback.get("date", feedback.get("submitted_at", "")).split("T")[0]
-        if date not in daily_trends:
-            daily_trends[date] = {"positive": 0, "negative": 0, "neutral": 0, "total": 0}
-        
-        sentiment = feedback.get("sentiment", {}).get("label", "").upper()
-        if sentiment == "POSITIVE":
-            daily_trends[date]["positive"] += 1
-        elif sentiment == "NEGATIVE":
-            daily_trends[date]["negative"] += 1
-        else:
-            daily_trends[date]["neutral"] += 1
-        
-        daily_trends[date]["total"] += 1
-    
-    # Convert to list and calculate percentages
-    trends = []
-    for date, data in sorted(daily_trends.items()):
-        total = data["total"]
-        trends.append({
-            "date": date,
-            "positive_percentage": round((data["positive"] / total) * 100, 1) if total > 0 else 0,
-            "negative_percentage": round((data["negative"] / total) * 100, 1) if total > 0 else 0,
-            "neutral_percentage": round((data["neutral"] / total) * 100, 1) if total > 0 else 0,
-            "total_feedback": total
-        })
-    
-    return trends
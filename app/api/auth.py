@@ -11,12 +11,12 @@ router = APIRouter()
 def get_current_user(request: Request) -> Optional[User]:
     """Get current user from session"""
     session_token = request.cookies.get('session_token')
-    logger.info(f"🔍 Checking session token: {session_token}")
+    logger.debug("🔍 Checking session token")
     if session_token:
         user = auth_service.get_user_from_session(session_token)
-        logger.info(f"🔍 User from session: {user.username if user else 'None'}")
+        logger.debug(f"🔍 User from session: {user.username if user else 'None'}")
         return user
-    logger.info("🔍 No session token found in cookies")
+    logger.debug("🔍 No session token found in cookies")
     return None
 
 def require_auth(request: Request) -> User:
@@ -4,12 +4,19 @@ from typing import Optional, Dict, List
 from pydantic import BaseModel
 import logging
 from datetime import datetime
-import json
 import os
 
 from app.services.sentiment_service import sentiment_service
 from app.services.recommendation_service import recommendation_service
+from app.services.feedback_log import feedback_log
+from app.services.feedback_pipeline import FeedbackPipeline
+from app.services.feedback_repository import feedback_repository
+from app.services.id_generator import id_generator
+from app.services.analytics_store import analytics_store, parse_timestamp
+from app.services.alert_store import admin_alert_store
+from app.services.event_broadcaster import alert_events
 from app.api.auth import require_auth, require_admin, require_staff
+from app.services.auth_service import auth_service
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -26,31 +33,17 @@ class FeedbackSubmission(BaseModel):
     staff_member: Optional[str] = None
     anonymous: bool = False
 
-# In-memory feedback storage (in production, use a database)
-feedback_storage = []
-admin_alerts = []
+# Maximum number of texts accepted by /batch-analyze in one request
+BATCH_ANALYZE_LIMIT = int(os.getenv("FEEDBACK_BATCH_ANALYZE_LIMIT", "10"))
+
+# Page size bounds for /query
+QUERY_DEFAULT_LIMIT = 20
+QUERY_MAX_LIMIT = int(os.getenv("FEEDBACK_QUERY_MAX_LIMIT", "100"))
 
 def save_feedback_to_file(feedback_record):
-    """Save feedback to JSON file for persistence"""
-    try:
-        feedback_file = os.path.join(os.path.dirname(__file__), "../data/feedback_submissions.json")
-        
-        # Load existing feedback
-        existing_feedback = []
-        if os.path.exists(feedback_file):
-            with open(feedback_file, 'r') as f:
-                existing_feedback = json.load(f)
-        
-        # Add new feedback
-        existing_feedback.append(feedback_record)
-        
-        # Save back to file
-        with open(feedback_file, 'w') as f:
-            json.dump(existing_feedback, f, indent=2)
-            
-        logger.info(f"💾 Feedback saved to file: {feedback_record['feedback_id']}")
-    except Exception as e:
-        logger.error(f"❌ Error saving feedback to file: {e}")
+    """Append feedback to the on-disk feedback log; raises if it could not be persisted"""
+    feedback_log.append(feedback_record)
+    logger.info(f"💾 Feedback saved to log: {feedback_record['feedback_id']}")
 
 def create_admin_alert(feedback_record):
     """Create alert for admin dashboard"""
@@ -70,7 +63,6 @@ def create_admin_alert(feedback_record):
         priority_emoji = "🟢"
     
     alert = {
-        "alert_id": f"ALERT_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
         "type": "feedback",
         "priority": priority,
         "priority_emoji": priority_emoji,
@@ -86,21 +78,57 @@ def create_admin_alert(feedback_record):
         "status": "unread"
     }
     
-    admin_alerts.insert(0, alert)  # Add to beginning for most recent first
+    # Assigns a unique alert_id and evicts the oldest alert beyond capacity
+    admin_alert_store.add(alert)
     
-    # Keep only last 50 alerts
-    if len(admin_alerts) > 50:
-        admin_alerts.pop()
+    # Push the alert and the updated headline numbers to connected dashboards
+    alert_events.publish("alert", {"alert": alert, "unread_count": admin_alert_store.unread_count})
+    if analytics_store.built:
+        alert_events.publish("aggregates", analytics_store.overview())
     
     logger.info(f"🔔 Admin alert created: {alert['alert_id']} (Priority: {priority})")
     return alert
 
+# Post-submit stages, run in this order by the feedback pipeline
+async def _sentiment_stage(feedback_record):
+    # May also queue a Slack alert for strongly negative feedback
+    return {"sentiment_analysis": await sentiment_service.analyze_sentiment(feedback_record["comment"])}
+
+async def _aggregates_stage(feedback_record):
+    analytics_store.add_feedback(feedback_record)
+
+async def _alert_stage(feedback_record):
+    # Create admin alert for ALL feedback submissions
+    # This ensures admins are aware of all guest feedback
+    alert = create_admin_alert(feedback_record)
+    return {"alert_id": alert["alert_id"]}
+
+async def _recommendations_stage(feedback_record):
+    # Re-indexes the guest's feedback and drops their cached recommendations
+    recommendation_service.add_feedback(feedback_record)
+
+feedback_pipeline = FeedbackPipeline(
+    feedback_log,
+    stages=[
+        ("sentiment", _sentiment_stage),
+        ("aggregates", _aggregates_stage),
+        ("alert", _alert_stage),
+        ("recommendations", _recommendations_stage)
+    ],
+    workers=int(os.getenv("FEEDBACK_PIPELINE_WORKERS", "2"))
+)
+
+async def load_feedback_and_resume_processing():
+    """Load stored feedback into the repository, then re-queue submissions interrupted by a restart"""
+    await feedback_repository.wait_loaded()
+    return feedback_pipeline.resume(feedback_repository.all())
+
 @router.post("/submit")
 async def submit_feedback(
     feedback: FeedbackSubmission,
     current_user: User = Depends(require_auth)
 ):
-    """Submit guest feedback with real-time sentiment analysis and admin alerts"""
+    """Accept guest feedback; sentiment analysis, alerts and aggregates run in the background"""
     try:
         # Enhanced validation
         if not feedback.category or feedback.category.strip() == "":
@@ -115,12 +143,9 @@ async def submit_feedback(
         if not feedback.comment or feedback.comment.strip() == "":
             raise HTTPException(status_code=422, detail="Comment is required")
         
-        # Perform sentiment analysis
-        sentiment_result = await sentiment_service.analyze_sentiment(feedback.comment)
-        
-        # Create feedback record
+        # Create feedback record; sentiment_analysis is added by the pipeline
         feedback_record = {
-            "feedback_id": f"FB_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
+            "feedback_id": id_generator.new_id("FB"),
             "guest_id": current_user.user_id,
             "guest_name": f"{current_user.first_name} {current_user.last_name}",
             "guest_username": current_user.username,
@@ -131,31 +156,27 @@ async def submit_feedback(
             "location": feedback.location,
             "staff_member": feedback.staff_member,
             "anonymous": feedback.anonymous,
-            "sentiment_analysis": sentiment_result,
             "submitted_at": datetime.utcnow().isoformat(),
-            "status": "new"
+            "status": "new",
+            "processing": feedback_pipeline.new_status()
         }
         
-        # Store feedback
-        feedback_storage.append(feedback_record)
+        # Durable intake: log the record (a failed write fails the request), then hand it to the pipeline
         save_feedback_to_file(feedback_record)
+        await feedback_repository.wait_loaded()
+        feedback_record = feedback_repository.add(feedback_record)
+        feedback_pipeline.submit(feedback_record)
         
-        # Create admin alert for ALL feedback submissions
-        # This ensures admins are aware of all guest feedback
-        alert_created = True
-        create_admin_alert(feedback_record)
-        
-        logger.info(f"📝 Feedback submitted: {feedback_record['feedback_id']} (Alert: {alert_created})")
+        logger.info(f"📝 Feedback accepted: {feedback_record['feedback_id']}")
         
         return JSONResponse(
-            status_code=201,
+            status_code=202,
             content={
                 "success": True,
                 "message": "Feedback submitted successfully",
                 "feedback_id": feedback_record["feedback_id"],
-                "sentiment": sentiment_result["sentiment"],
-                "confidence": sentiment_result["confidence"],
-                "alert_triggered": alert_created
+                "status": feedback_record["processing"]["state"],
+                "status_url": f"/api/feedback/{feedback_record['feedback_id']}/status"
             }
         )
         
@@ -165,17 +186,80 @@ async def submit_feedback(
         logger.error(f"❌ Error submitting feedback: {e}")
         raise HTTPException(status_code=500, detail="Failed to submit feedback")
 
+@router.get("/query")
+async def query_feedback(
+    guest_id: Optional[str] = None,
+    category: Optional[str] = None,
+    min_rating: Optional[int] = None,
+    max_rating: Optional[int] = None,
+    sentiment: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = QUERY_DEFAULT_LIMIT,
+    fields: Optional[str] = None,
+    current_user: User = Depends(require_auth)
+):
+    """
+    Page through feedback, newest first. Filters combine; ``fields`` is a
+    comma-separated list of the record fields to return. Guests only see
+    their own feedback.
+    """
+    try:
+        if not auth_service.is_staff(current_user):
+            if guest_id not in (None, current_user.user_id):
+                raise HTTPException(status_code=403, detail="Guests can only query their own feedback")
+            guest_id = current_user.user_id
+        
+        if not 1 <= limit <= QUERY_MAX_LIMIT:
+            raise HTTPException(status_code=422, detail=f"limit must be between 1 and {QUERY_MAX_LIMIT}")
+        
+        window = {}
+        for name, value in (("since", since), ("until", until)):
+            if value:
+                window[name] = parse_timestamp(value)
+                if window[name] is None:
+                    raise HTTPException(status_code=422, detail=f"{name} must be an ISO-8601 timestamp")
+        
+        try:
+            await feedback_repository.wait_loaded()
+            page = feedback_repository.query(
+                guest_id=guest_id,
+                category=category,
+                min_rating=min_rating,
+                max_rating=max_rating,
+                sentiment=sentiment.lower() if sentiment else None,
+                cursor=cursor,
+                limit=limit,
+                fields=[field.strip() for field in fields.split(",") if field.strip()] if fields else None,
+                **window
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        
+        return JSONResponse(
+            status_code=200,
+            content={
+                "success": True,
+                "feedback": page["items"],
+                "count": len(page["items"]),
+                "next_cursor": page["next_cursor"]
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error querying feedback: {e}")
+        raise HTTPException(status_code=500, detail="Failed to query feedback")
+
 @router.get("/my-feedback")
 async def get_my_feedback(current_user: User = Depends(require_auth)):
     """Get current user's feedback history"""
     try:
-        user_feedback = [
-            fb for fb in feedback_storage 
-            if fb["guest_id"] == current_user.user_id
-        ]
-        
-        # Sort by most recent first
-        user_feedback.sort(key=lambda x: x["submitted_at"], reverse=True)
+        # Most recent first, straight from the guest index
+        await feedback_repository.wait_loaded()
+        user_feedback = feedback_repository.for_guest(current_user.user_id, newest_first=True)
         
         return JSONResponse(
             status_code=200,
@@ -197,13 +281,9 @@ async def get_guest_feedback(
 ):
     """Get feedback for a specific guest (admin/staff only)"""
     try:
-        guest_feedback = [
-            fb for fb in feedback_storage 
-            if fb["guest_id"] == guest_id
-        ]
-        
-        # Sort by most recent first
-        guest_feedback.sort(key=lambda x: x["submitted_at"], reverse=True)
+        # Most recent first, straight from the guest index
+        await feedback_repository.wait_loaded()
+        guest_feedback = feedback_repository.for_guest(guest_id, newest_first=True)
         
         return JSONResponse(
             status_code=200,
@@ -230,9 +310,9 @@ async def get_admin_alerts(current_user: User = Depends(require_staff)):
             status_code=200,
             content={
                 "success": True,
-                "alerts": admin_alerts,
-                "unread_count": len([a for a in admin_alerts if a["status"] == "unread"]),
-                "total_count": len(admin_alerts)
+                "alerts": admin_alert_store.recent(),
+                "unread_count": admin_alert_store.unread_count,
+                "total_count": len(admin_alert_store)
             }
         )
         
@@ -250,19 +330,18 @@ async def mark_alert_read(
     """Mark an alert as read"""
     try:
         # Find and update alert
-        for alert in admin_alerts:
-            if alert["alert_id"] == alert_id:
-                alert["status"] = "read"
-                alert["read_at"] = datetime.utcnow().isoformat()
-                alert["read_by"] = current_user.username
-                
-                return JSONResponse(
-                    status_code=200,
-                    content={
-                        "success": True,
-                        "message": "Alert marked as read"
-                    }
-                )
+        if admin_alert_store.mark_read(alert_id, current_user.username):
+            alert_events.publish("alert-read", {
+                "alert_id": alert_id,
+                "unread_count": admin_alert_store.unread_count
+            })
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "success": True,
+                    "message": "Alert marked as read"
+                }
+            )
         
         raise HTTPException(status_code=404, detail="Alert not found")
         
@@ -309,8 +388,8 @@ async def batch_analyze(
         if not texts:
             raise HTTPException(status_code=400, detail="Text list cannot be empty")
         
-        if len(texts) > 10:
-            raise HTTPException(status_code=400, detail="Maximum 10 texts allowed per batch")
+        if len(texts) > BATCH_ANALYZE_LIMIT:
+            raise HTTPException(status_code=400, detail=f"Maximum {BATCH_ANALYZE_LIMIT} texts allowed per batch")
         
         results = await sentiment_service.analyze_batch(texts)
         
@@ -326,3 +405,30 @@ async def batch_analyze(
     except Exception as e:
         logger.error(f"❌ Error batch analyzing sentiment: {e}")
         raise HTTPException(status_code=500, detail="Failed to analyze sentiment batch")
+
+# Registered last: the "/{feedback_id}" segment would otherwise shadow literal routes such as /guest/...
+@router.get("/{feedback_id}/status")
+async def get_feedback_status(
+    feedback_id: str,
+    current_user: User = Depends(require_auth)
+):
+    """Per-stage processing status of a submitted feedback (own feedback, or any for staff)"""
+    await feedback_repository.wait_loaded()
+    feedback_record = feedback_repository.get(feedback_id)
+    if not feedback_record or (feedback_record["guest_id"] != current_user.user_id
+                               and not auth_service.is_staff(current_user)):
+        raise HTTPException(status_code=404, detail="Feedback not found")
+    
+    sentiment_result = feedback_record.get("sentiment_analysis")
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "feedback_id": feedback_id,
+            # Records submitted before the pipeline existed were processed inline
+            "processing": feedback_record.get("processing") or {"state": "complete", "stages": {}},
+            "sentiment": sentiment_result["sentiment"] if sentiment_result else None,
+            "confidence": sentiment_result["confidence"] if sentiment_result else None,
+            "alert_id": feedback_record.get("alert_id")
+        }
+    )
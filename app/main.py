@@ -1,15 +1,18 @@
+import time
+_import_started = time.perf_counter()
+
 import logging
 from fastapi import FastAPI, Request, Depends, HTTPException, Form
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
-import time
+import asyncio
 from dotenv import load_dotenv
 
 from app.api import auth
-from app.api.feedback_api import router as feedback_api_router
+from app.api.feedback_api import router as feedback_api_router, feedback_pipeline, load_feedback_and_resume_processing
 from app.api.recommendations_api import router as recommendations_api_router  
 from app.api.analytics_api import router as analytics_api_router
 from app.api.admin_api import router as admin_api_router
@@ -17,6 +20,7 @@ from app.api.auth import get_current_user, require_auth, require_admin, require_
 from app.services.auth_service import auth_service
 from app.services.sentiment_service import sentiment_service
 from app.services.recommendation_service import recommendation_service
+from app.services.feedback_log import feedback_log
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -75,6 +79,42 @@ app.include_router(feedback_api_router, tags=["feedback-ai"])
 app.include_router(recommendations_api_router, tags=["recommendations-ai"])
 app.include_router(analytics_api_router, tags=["analytics-ai"])
 
+# Keep references to fire-and-forget startup tasks so they are not garbage collected
+background_tasks = set()
+
+# Seconds from importing this module until the app could serve requests
+startup_metrics = {"import_seconds": None, "startup_seconds": None}
+
+@app.on_event("startup")
+async def startup_event():
+    """Kick off background jobs that should not delay serving requests"""
+    # Requests are answered by the keyword fallback until the model finishes loading
+    sentiment_service.start_model_loading()
+    
+    # Claim this worker's writer number in the shared feedback log
+    feedback_log.open()
+    
+    # Score any stored feedback that predates write-time sentiment analysis, load
+    # submitted feedback and finish processing what the last shutdown interrupted
+    for job in (recommendation_service.backfill_sentiment(), load_feedback_and_resume_processing()):
+        task = asyncio.create_task(job)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    
+    startup_metrics["startup_seconds"] = round(time.perf_counter() - _import_started, 3)
+    logger.info(f"⏱️ Startup completed in {startup_metrics['startup_seconds']}s "
+                f"(imports {startup_metrics['import_seconds']}s)")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered state to disk before the process exits"""
+    await feedback_pipeline.stop()
+    sentiment_service.inference_worker.stop(timeout=5)
+    sentiment_service.result_cache.close()
+    sentiment_service.slack_dispatcher.stop(timeout=5)
+    feedback_log.close()
+    auth_service.close()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -84,6 +124,20 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 while the sentiment model is still loading"""
+    model_status = sentiment_service.model_status()
+    ready = model_status["state"] not in ("not_loaded", "loading")
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "sentiment_model": model_status,
+            "startup": startup_metrics
+        }
+    )
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """Root redirect - check authentication and redirect appropriately"""
@@ -557,6 +611,8 @@ async def debug_cookies(request: Request):
         "cookie_header": headers.get("cookie", "No cookie header found")
     }
 
+startup_metrics["import_seconds"] = round(time.perf_counter() - _import_started, 3)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
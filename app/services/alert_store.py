@@ -0,0 +1,128 @@
+import itertools
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from app.services.id_generator import IdGenerator, id_generator
+
+logger = logging.getLogger(__name__)
+
+
+class AlertStore:
+    """
+    Bounded store of admin alerts, oldest evicted first.
+
+    Alerts live in a deque (newest on the right) with an alert_id index, so
+    adding, evicting and marking an alert read are all O(1) and the unread
+    count is maintained rather than recounted. Every alert gets a unique,
+    monotonically increasing ID. When ``persist_path`` is set the store is
+    snapshotted atomically after each change and reloaded on startup.
+    """
+
+    def __init__(self, capacity: int = 50, persist_path: Optional[str] = None,
+                 ids: IdGenerator = id_generator):
+        self.capacity = capacity
+        self.persist_path = persist_path
+        self._lock = threading.Lock()
+        self._alerts: Deque[Dict] = deque()
+        self._by_id: Dict[str, Dict] = {}
+        self._unread = 0
+        self._ids = ids
+        if persist_path:
+            self._load()
+
+    def add(self, alert: Dict) -> Dict:
+        """Store a new alert, assigning its alert_id, and evict the oldest beyond capacity"""
+        with self._lock:
+            alert["alert_id"] = self._ids.new_id("ALERT")
+            self._append_locked(alert)
+            while len(self._alerts) > self.capacity:
+                self._evict_oldest_locked()
+            self._persist_locked()
+        return alert
+
+    def _append_locked(self, alert: Dict):
+        self._alerts.append(alert)
+        self._by_id[alert["alert_id"]] = alert
+        if alert.get("status") == "unread":
+            self._unread += 1
+
+    def _evict_oldest_locked(self):
+        evicted = self._alerts.popleft()
+        self._by_id.pop(evicted["alert_id"], None)
+        if evicted.get("status") == "unread":
+            self._unread -= 1
+
+    def get(self, alert_id: str) -> Optional[Dict]:
+        return self._by_id.get(alert_id)
+
+    def mark_read(self, alert_id: str, read_by: str) -> Optional[Dict]:
+        """Mark an alert read; returns the alert, or None if it is unknown"""
+        with self._lock:
+            alert = self._by_id.get(alert_id)
+            if alert is None:
+                return None
+            if alert.get("status") == "unread":
+                self._unread -= 1
+            alert["status"] = "read"
+            alert["read_at"] = datetime.utcnow().isoformat()
+            alert["read_by"] = read_by
+            self._persist_locked()
+            return dict(alert)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict]:
+        """Alerts newest first"""
+        with self._lock:
+            newest_first = reversed(self._alerts)
+            if limit is not None:
+                newest_first = itertools.islice(newest_first, limit)
+            return [dict(alert) for alert in newest_first]
+
+    @property
+    def unread_count(self) -> int:
+        return self._unread
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    # Persistence
+    def _persist_locked(self):
+        if not self.persist_path:
+            return
+        tmp = self.persist_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"alerts": list(self._alerts)}, f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.persist_path)
+        except OSError as e:
+            logger.error(f"❌ Error persisting admin alerts: {e}")
+
+    def _load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                alerts = json.load(f).get("alerts", [])
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Error loading admin alerts: {e}")
+            return
+
+        for alert in alerts[-self.capacity:]:
+            self._append_locked(alert)
+            # Keep IDs monotonic across restarts, even if the clock was set back
+            self._ids.observe(alert["alert_id"])
+        logger.info(f"🔔 Loaded {len(self._alerts)} admin alerts ({self._unread} unread)")
+
+
+# Global instance
+admin_alert_store = AlertStore(
+    capacity=int(os.getenv("ADMIN_ALERT_CAPACITY", "50")),
+    persist_path=os.getenv("ADMIN_ALERT_STORE_PATH", "app/data/admin_alerts.json")
+)
@@ -0,0 +1,354 @@
+import bisect
+import heapq
+import itertools
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from app.services.feedback_fields import stored_sentiment
+from app.services.feedback_index import GuestFeedbackIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _sentiment_label(feedback: Dict) -> str:
+    """Sentiment bucket used by the dashboard: positive, negative or neutral"""
+    sentiment = (stored_sentiment(feedback) or {}).get("sentiment", "")
+    return sentiment if sentiment in ("positive", "negative") else "neutral"
+
+
+def parse_feedback_timestamp(feedback: Dict) -> Optional[datetime]:
+    """Parse a feedback record's submission time as a naive UTC datetime; None if it has none"""
+    value = feedback.get("submitted_at") or feedback.get("timestamp") or feedback.get("date")
+    return parse_timestamp(value) if value else None
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp (naive means UTC) as a naive UTC datetime"""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def build_feedback_alert(feedback: Dict) -> Optional[Dict]:
+    """Build a dashboard alert for negative or low-rated feedback, or None if it needs no alert"""
+    sentiment_analysis = feedback.get("sentiment_analysis", {})
+    sentiment = sentiment_analysis.get("sentiment", "").lower()
+    confidence = sentiment_analysis.get("confidence", 0)
+    rating = feedback.get("rating", 3)
+
+    # Create alerts for negative sentiment or low ratings
+    if not (sentiment == "negative" or rating <= 2):
+        return None
+
+    return {
+        "alert_id": f"ALERT_{feedback.get('feedback_id', 'unknown')}",
+        "type": "feedback",
+        "priority": "high",
+        "priority_emoji": "🔴",
+        "title": f"Feedback Alert: {feedback.get('subject', 'No subject')}",
+        "message": feedback.get("comment", "")[:150] + ("..." if len(feedback.get("comment", "")) > 150 else ""),
+        "feedback_id": feedback.get("feedback_id", ""),
+        "guest_id": feedback.get("guest_id", ""),
+        "guest_name": feedback.get("guest_name", "Unknown"),
+        "sentiment": sentiment,
+        "rating": rating,
+        "confidence": confidence,
+        "category": feedback.get("category", "general"),
+        "created_at": feedback.get("submitted_at", datetime.utcnow().isoformat()),
+        "status": "unread"
+    }
+
+
+def guest_from_user(user: Dict) -> Dict:
+    """The guest view of a guest account in users.json"""
+    return {
+        'guest_id': user.get('user_id'),
+        'username': user.get('username'),
+        'first_name': user.get('first_name'),
+        'last_name': user.get('last_name'),
+        'email': user.get('email', ''),
+        'loyalty_tier': user.get('loyalty_tier', 'Standard')
+    }
+
+
+class AnalyticsAggregateStore:
+    """
+    In-process aggregates behind the analytics dashboard.
+
+    Counters, the rating histogram, per-day buckets and the most recent
+    alerts are updated as each feedback record arrives, so the dashboard is
+    answered without re-reading or re-scanning the feedback files.
+    """
+
+    def __init__(self, alert_capacity: int = 100):
+        self.alert_capacity = alert_capacity
+        self._lock = threading.Lock()
+        self._alert_sequence = itertools.count()
+        self.built = False
+        # True while the feedback aggregates hold the sample records shown before any real feedback
+        self.sample_feedback = False
+        self._reset_feedback()
+        self._set_guests_locked([])
+
+    def _reset_feedback(self):
+        self.total_feedback = 0
+        self.sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
+        self.rating_distribution = {i: 0 for i in range(1, 6)}
+        self.rating_sum = 0
+        self.rated_count = 0
+        # "YYYY-MM-DD" -> per-day counters plus the day's pre-parsed timestamps
+        # (sorted) and their sentiment labels, so windowed queries cost O(days)
+        self.daily_buckets: Dict[str, Dict] = {}
+        self.day_index: List[str] = []
+        # Min-heap of (created_at, sequence, alert) holding the newest alerts
+        self._alerts: List = []
+        self.feedback_by_guest = GuestFeedbackIndex()
+        # IDs already counted, so a record seen by both a rebuild and the live path counts once
+        self._counted_ids = set()
+
+    def rebuild(self, feedback_records: Iterable[Dict], guest_records: Iterable[Dict], sample_feedback: bool = False):
+        """
+        Recompute every aggregate from scratch. ``sample_feedback`` marks the
+        records as placeholders, dropped as soon as real feedback arrives.
+        """
+        with self._lock:
+            self._reset_feedback()
+            for feedback in feedback_records:
+                self._add_locked(feedback)
+            self._set_guests_locked(guest_records)
+            self.sample_feedback = sample_feedback
+            self.built = True
+        logger.info(f"📊 Analytics aggregates rebuilt: {self.total_feedback} feedback, {self.total_guests} guests")
+
+    def add_feedback(self, feedback: Dict):
+        """Fold one new feedback record into the aggregates"""
+        with self._lock:
+            if not self.built:
+                return
+            if self.sample_feedback:
+                self._reset_feedback()
+                self.sample_feedback = False
+            self._add_locked(feedback)
+
+    def add_guest(self, guest: Dict):
+        """Count a newly created guest (before the first build the rebuild reads it from disk)"""
+        with self._lock:
+            if self.built and guest.get("guest_id") not in self.guests_by_id:
+                self._add_guest_locked(guest)
+
+    def _add_locked(self, feedback: Dict):
+        feedback_id = feedback.get("feedback_id")
+        if feedback_id:
+            if feedback_id in self._counted_ids:
+                return
+            self._counted_ids.add(feedback_id)
+        self.total_feedback += 1
+        sentiment = _sentiment_label(feedback)
+        self.sentiment_counts[sentiment] += 1
+
+        rating = feedback.get("rating")
+        if rating:
+            self.rating_sum += rating
+            self.rated_count += 1
+            if 1 <= rating <= 5:
+                self.rating_distribution[rating] += 1
+
+        self.feedback_by_guest.add(feedback.get("guest_id"), feedback.get("submitted_at", ""), feedback)
+
+        # Undated records count towards the totals but not towards any day
+        submitted_at = parse_feedback_timestamp(feedback)
+        if submitted_at:
+            self._add_to_day_locked(submitted_at, sentiment, feedback.get("rating", 0))
+
+        alert = build_feedback_alert(feedback)
+        if alert:
+            entry = (alert["created_at"], next(self._alert_sequence), alert)
+            if len(self._alerts) < self.alert_capacity:
+                heapq.heappush(self._alerts, entry)
+            elif entry > self._alerts[0]:
+                heapq.heapreplace(self._alerts, entry)
+
+    def _add_to_day_locked(self, submitted_at: datetime, sentiment: str, rating: int):
+        day = submitted_at.strftime("%Y-%m-%d")
+        bucket = self.daily_buckets.get(day)
+        if bucket is None:
+            bucket = {
+                "count": 0, "rating_sum": 0,
+                "positive": 0, "negative": 0, "neutral": 0,
+                "timestamps": [], "sentiments": []
+            }
+            self.daily_buckets[day] = bucket
+            bisect.insort(self.day_index, day)
+
+        bucket["count"] += 1
+        bucket["rating_sum"] += rating or 0
+        bucket[sentiment] += 1
+
+        # Records almost always arrive in time order, making this an append
+        position = bisect.bisect_right(bucket["timestamps"], submitted_at)
+        bucket["timestamps"].insert(position, submitted_at)
+        bucket["sentiments"].insert(position, sentiment)
+
+    def _set_guests_locked(self, guest_records: Iterable[Dict]):
+        self.total_guests = 0
+        self.loyalty_counts = {}
+        self.guests_by_id = {}
+        for guest in guest_records:
+            self._add_guest_locked(guest)
+
+    def _add_guest_locked(self, guest: Dict):
+        self.total_guests += 1
+        self.guests_by_id[guest.get("guest_id")] = guest
+        tier = guest.get("loyalty_tier", "Standard")
+        self.loyalty_counts[tier] = self.loyalty_counts.get(tier, 0) + 1
+
+    # Read side
+    def sentiment_breakdown(self) -> Dict:
+        total = self.total_feedback
+        positive = self.sentiment_counts["positive"]
+        negative = self.sentiment_counts["negative"]
+        neutral = self.sentiment_counts["neutral"]
+        return {
+            "positive": positive,
+            "negative": negative,
+            "neutral": neutral,
+            "positive_percentage": round((positive / total) * 100, 1) if total > 0 else 0,
+            "negative_percentage": round((negative / total) * 100, 1) if total > 0 else 0,
+            "neutral_percentage": round((neutral / total) * 100, 1) if total > 0 else 0
+        }
+
+    def rating_breakdown(self) -> Dict:
+        average_rating = self.rating_sum / self.rated_count if self.rated_count else 0
+        return {
+            "average_rating": round(average_rating, 2),
+            "rating_distribution": dict(self.rating_distribution)
+        }
+
+    def recent_alerts(self, limit: int = 10) -> List[Dict]:
+        """Newest alerts first"""
+        return [alert for _, _, alert in heapq.nlargest(limit, self._alerts)]
+
+    def satisfaction_trends(self, days: int = 7, now: Optional[datetime] = None) -> List[Dict]:
+        """Per-day average rating and satisfaction rate, most recent last"""
+        now = now or datetime.utcnow()
+        trends = []
+        for i in range(days - 1, -1, -1):
+            date = now - timedelta(days=i)
+            bucket = self.daily_buckets.get(date.strftime("%Y-%m-%d"))
+            count = bucket["count"] if bucket else 0
+            trends.append({
+                "date": date.strftime("%Y-%m-%d"),
+                "display_date": date.strftime("%b %d"),
+                "average_rating": round(bucket["rating_sum"] / count, 2) if count else 0,
+                "satisfaction_rate": round((bucket["positive"] / count) * 100, 1) if count else 0,
+                "feedback_count": count
+            })
+        return trends
+
+    def get_guest(self, guest_id: str) -> Optional[Dict]:
+        return self.guests_by_id.get(guest_id)
+
+    def guest_feedback(self, guest_id: str) -> List[Dict]:
+        """A guest's feedback, oldest first"""
+        with self._lock:
+            return self.feedback_by_guest.get(guest_id)
+
+    def sentiment_trends(self, days: int = 30, now: Optional[datetime] = None) -> Dict:
+        """Daily sentiment percentages for feedback submitted within the last ``days`` days"""
+        cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+        cutoff_day = cutoff.strftime("%Y-%m-%d")
+
+        with self._lock:
+            trends = []
+            total_feedback = 0
+            for day in self.day_index[bisect.bisect_left(self.day_index, cutoff_day):]:
+                bucket = self.daily_buckets[day]
+                if day == cutoff_day:
+                    # Only part of the first day falls inside the window
+                    start = bisect.bisect_right(bucket["timestamps"], cutoff)
+                    labels = bucket["sentiments"][start:]
+                    counts = {label: labels.count(label) for label in ("positive", "negative", "neutral")}
+                    total = len(labels)
+                else:
+                    counts = bucket
+                    total = bucket["count"]
+                if not total:
+                    continue
+
+                total_feedback += total
+                trends.append({
+                    "date": day,
+                    "positive_percentage": round((counts["positive"] / total) * 100, 1),
+                    "negative_percentage": round((counts["negative"] / total) * 100, 1),
+                    "neutral_percentage": round((counts["neutral"] / total) * 100, 1),
+                    "total_feedback": total
+                })
+
+        return {
+            "period_days": days,
+            "total_feedback": total_feedback,
+            "trends": trends
+        }
+
+    def loyalty_distribution(self) -> Dict:
+        if not self.total_guests:
+            return {
+                "tiers": [],
+                "total_guests": 0
+            }
+        return {
+            "tiers": [
+                {
+                    "name": tier,
+                    "count": count,
+                    "percentage": round((count / self.total_guests) * 100, 1)
+                }
+                for tier, count in self.loyalty_counts.items()
+            ],
+            "total_guests": self.total_guests
+        }
+
+    def _overview_locked(self, sentiment_breakdown: Dict, rating_breakdown: Dict, alert_count: int) -> Dict:
+        return {
+            "total_guests": self.total_guests,
+            "total_feedback": self.total_feedback,
+            "average_rating": rating_breakdown["average_rating"],
+            "satisfaction_rate": sentiment_breakdown["positive_percentage"],
+            "alert_count": alert_count
+        }
+
+    def overview(self) -> Dict:
+        """Headline dashboard numbers plus sentiment counts, cheap enough to push on every change"""
+        with self._lock:
+            sentiment_breakdown = self.sentiment_breakdown()
+            overview = self._overview_locked(
+                sentiment_breakdown, self.rating_breakdown(), min(len(self._alerts), 10)
+            )
+            overview["sentiment_analysis"] = sentiment_breakdown
+            return overview
+
+    def dashboard(self) -> Dict:
+        """Full dashboard payload, computed from the maintained aggregates"""
+        with self._lock:
+            sentiment_breakdown = self.sentiment_breakdown()
+            rating_breakdown = self.rating_breakdown()
+            recent_alerts = self.recent_alerts()
+            return {
+                "overview": self._overview_locked(sentiment_breakdown, rating_breakdown, len(recent_alerts)),
+                "sentiment_analysis": sentiment_breakdown,
+                "rating_breakdown": rating_breakdown,
+                "recent_alerts": recent_alerts,
+                "satisfaction_trends": self.satisfaction_trends(),
+                "loyalty_distribution": self.loyalty_distribution(),
+                "generated_at": datetime.utcnow().isoformat()
+            }
+
+
+# Global instance
+analytics_store = AnalyticsAggregateStore()
@@ -1,38 +1,82 @@
 import json
+import os
 import secrets
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Set, Tuple
 import logging
 from app.models.user import User, UserLogin, UserSession, CustomerProfile
+from app.services.analytics_store import analytics_store, guest_from_user
+from app.services.session_store import create_session_store
+from app.services.json_stream import load_json_records
 
 logger = logging.getLogger(__name__)
 
 class AuthService:
     def __init__(self):
         self.users_data = self._load_users()
-        self.active_sessions: Dict[str, UserSession] = {}
+        self.users_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'users.json')
+        self.session_store = create_session_store()
+        self.session_store.add_expiry_listener(self._drop_cached_sessions)
+        self.session_store.start_sweeper()
+        # session_token -> (expires_at, validated User, revalidate_at), so authenticated
+        # requests skip the store and the pydantic rebuild; invalidated per user_id.
+        # revalidate_at is None unless the store is shared with other workers.
+        self._session_users: Dict[str, Tuple[datetime, User, Optional[float]]] = {}
+        self._sessions_by_user: Dict[str, Set[str]] = {}
+        self._cache_lock = threading.Lock()
+        self._build_indexes()
     
     def _load_users(self) -> list:
         """Load users from JSON file"""
         try:
             # Try comprehensive users first, fall back to original
             try:
-                with open('app/data/comprehensive_users.json', 'r') as f:
-                    return json.load(f)
+                return list(load_json_records('app/data/comprehensive_users.json'))
             except FileNotFoundError:
-                with open('app/data/users.json', 'r') as f:
-                    return json.load(f)
+                return list(load_json_records('app/data/users.json'))
         except FileNotFoundError:
             return []
     
+    def _build_indexes(self):
+        """Index users by username, user_id and email so lookups don't scan users_data"""
+        self.users_by_username: Dict[str, Dict[str, Any]] = {}
+        self.users_by_id: Dict[str, Dict[str, Any]] = {}
+        self.users_by_email: Dict[str, Dict[str, Any]] = {}
+        self.customer_count = 0
+        for user_data in self.users_data:
+            self._index_user(user_data)
+    
+    def _index_user(self, user_data: Dict[str, Any]):
+        # First record wins, matching the order the old linear scans used
+        if user_data.get('username'):
+            self.users_by_username.setdefault(user_data['username'], user_data)
+        if user_data.get('user_id'):
+            self.users_by_id.setdefault(user_data['user_id'], user_data)
+        if user_data.get('email'):
+            self.users_by_email.setdefault(user_data['email'].lower(), user_data)
+        if user_data.get('role') == 'customer':
+            self.customer_count += 1
+    
+    def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        """Raw user record for a username, or None"""
+        return self.users_by_username.get(username)
+    
+    def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Raw user record for a user_id, or None"""
+        return self.users_by_id.get(user_id)
+    
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Raw user record for an email address (case-insensitive), or None"""
+        return self.users_by_email.get((email or '').lower())
+    
     def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """Authenticate user with username and password"""
-        for user_data in self.users_data:
-            if (user_data['username'] == username and 
-                user_data.get('password_hash') == password):  # In real app, use proper password hashing
-                
-                user = User(**{k: v for k, v in user_data.items() if k != 'password_hash'})
-                return user
+        user_data = self.users_by_username.get(username)
+        if user_data and user_data.get('password_hash') == password:  # In real app, use proper password hashing
+            user = User(**{k: v for k, v in user_data.items() if k != 'password_hash'})
+            return user
         return None
     
     def create_session(self, user: User) -> UserSession:
@@ -48,39 +92,75 @@ class AuthService:
             expires_at=expires_at
         )
         
-        self.active_sessions[session_token] = session
+        self.session_store.put(session)
         return session
     
     def get_user_from_session(self, session_token: str) -> Optional[User]:
         """Get user from session token"""
-        logger.info(f"🔍 Looking for session: {session_token}")
-        logger.info(f"🔍 Active sessions: {list(self.active_sessions.keys())}")
+        cached = self._session_users.get(session_token)
+        if cached is not None:
+            expires_at, user, revalidate_at = cached
+            if datetime.utcnow() < expires_at and (revalidate_at is None or time.monotonic() < revalidate_at):
+                return user
+        
+        logger.debug(f"🔍 Looking for session: {session_token[:8]}...")
         
-        if session_token in self.active_sessions:
-            session = self.active_sessions[session_token]
-            logger.info(f"🔍 Found session for user: {session.user_id}")
+        session = self.session_store.get(session_token)
+        if session is not None:
             if datetime.utcnow() < session.expires_at:
                 # Find user data
-                for user_data in self.users_data:
-                    if user_data['user_id'] == session.user_id:
-                        user = User(**{k: v for k, v in user_data.items() if k != 'password_hash'})
-                        logger.info(f"✅ Session valid for user: {user.username}")
-                        return user
+                user_data = self.users_by_id.get(session.user_id)
+                if user_data:
+                    user = User(**{k: v for k, v in user_data.items() if k != 'password_hash'})
+                    self._cache_session_user(session, user)
+                    logger.debug(f"✅ Session valid for user: {user.username}")
+                    return user
                 logger.warning(f"⚠️ User data not found for session user_id: {session.user_id}")
             else:
                 # Session expired
                 logger.info(f"⏰ Session expired for user: {session.user_id}")
-                del self.active_sessions[session_token]
+                self._forget_session(session_token)
         else:
-            logger.info(f"❌ Session not found: {session_token}")
+            logger.debug(f"❌ Session not found: {session_token[:8]}...")
+            self._drop_cached_sessions([session_token])
         return None
     
+    def _cache_session_user(self, session: UserSession, user: User):
+        revalidate_seconds = self.session_store.revalidate_seconds
+        revalidate_at = time.monotonic() + revalidate_seconds if revalidate_seconds is not None else None
+        with self._cache_lock:
+            self._session_users[session.session_token] = (session.expires_at, user, revalidate_at)
+            self._sessions_by_user.setdefault(session.user_id, set()).add(session.session_token)
+    
+    def _drop_cached_sessions(self, session_tokens: List[str]):
+        with self._cache_lock:
+            for session_token in session_tokens:
+                cached = self._session_users.pop(session_token, None)
+                if cached is None:
+                    continue
+                user_id = cached[1].user_id
+                tokens = self._sessions_by_user.get(user_id)
+                if tokens:
+                    tokens.discard(session_token)
+                    if not tokens:
+                        del self._sessions_by_user[user_id]
+    
+    def _forget_session(self, session_token: str) -> bool:
+        self._drop_cached_sessions([session_token])
+        return self.session_store.delete(session_token)
+    
+    def invalidate_user(self, user_id: str):
+        """Drop cached User objects for a user whose record changed"""
+        with self._cache_lock:
+            for session_token in self._sessions_by_user.pop(user_id, ()):
+                self._session_users.pop(session_token, None)
+    
     def logout_user(self, session_token: str) -> bool:
         """Logout user by removing session"""
-        if session_token in self.active_sessions:
-            del self.active_sessions[session_token]
-            return True
-        return False
+        return self._forget_session(session_token)
+    
+    def close(self):
+        self.session_store.close()
     
     def create_user(self, user_data: dict) -> Optional[User]:
         """Create a new user and save to users.json"""
@@ -88,8 +168,7 @@ class AuthService:
             # Generate a new user ID
             if user_data.get('role') == 'customer':
                 # Count existing guest users to generate next ID
-                guest_count = sum(1 for user in self.users_data if user.get('role') == 'customer')
-                user_id = f"guest_{guest_count + 1:03d}"
+                user_id = f"guest_{self.customer_count + 1:03d}"
                 
                 # Create complete user data
                 new_user = {
@@ -109,29 +188,12 @@ class AuthService:
                 
                 # Add to in-memory data
                 self.users_data.append(new_user)
+                self._index_user(new_user)
+                self.invalidate_user(user_id)
                 
                 # Save to file
-                try:
-                    import os
-                    # Use environment-aware path handling
-                    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                    users_file = os.path.join(base_dir, 'data', 'users.json')
-                    
-                    # Ensure directory exists
-                    data_dir = os.path.dirname(users_file)
-                    if not os.path.exists(data_dir):
-                        os.makedirs(data_dir)
-                        
-                    logger.info(f"Saving user data to {users_file}")
-                    
-                    with open(users_file, 'w') as f:
-                        json.dump(self.users_data, f, indent=2)
-                    logger.info(f"User data saved successfully")
-                except Exception as e:
-                    logger.error(f"Failed to write to users.json: {str(e)}")
-                    logger.error(f"Current directory: {os.getcwd()}")
-                    logger.error(f"Directory listing: {os.listdir(base_dir)}")
-                    raise
+                self._save_users()
+                analytics_store.add_guest(guest_from_user(new_user))
                     
                 # Return the created user (without password)
                 return User(**{k: v for k, v in new_user.items() if k != 'password_hash'})
@@ -143,21 +205,56 @@ class AuthService:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None
     
+    def update_user(self, user_id: str, updates: Dict[str, Any]) -> Optional[User]:
+        """Change a user's record (role, password, name, ...) and drop their cached session users"""
+        user_data = self.users_by_id.get(user_id)
+        if user_data is None:
+            return None
+        updates = dict(updates)
+        if 'password' in updates:
+            updates['password_hash'] = updates.pop('password')
+        if updates.get('username'):
+            updates['username'] = updates['username'].lower()
+        user_data.update(updates)
+        # Username and email are index keys, so rebuild rather than patch
+        self._build_indexes()
+        self.invalidate_user(user_id)
+        self._save_users()
+        return User(**{k: v for k, v in user_data.items() if k != 'password_hash'})
+    
+    def _save_users(self):
+        """Write every user record back to users.json"""
+        try:
+            # Ensure directory exists
+            data_dir = os.path.dirname(self.users_file)
+            if not os.path.exists(data_dir):
+                os.makedirs(data_dir)
+                
+            logger.info(f"Saving user data to {self.users_file}")
+            
+            with open(self.users_file, 'w') as f:
+                json.dump(self.users_data, f, indent=2)
+            logger.info(f"User data saved successfully")
+        except Exception as e:
+            logger.error(f"Failed to write to users.json: {str(e)}")
+            logger.error(f"Current directory: {os.getcwd()}")
+            raise
+    
     def get_customer_profile(self, user_id: str) -> Optional[CustomerProfile]:
         """Get customer profile for customer users"""
-        for user_data in self.users_data:
-            if user_data['user_id'] == user_id and user_data['role'] == 'customer':
-                return CustomerProfile(
-                    user_id=user_id,
-                    guest_id=user_data.get('guest_id'),
-                    loyalty_number=user_data.get('loyalty_number'),
-                    preferences=user_data.get('preferences', {}),
-                    contact_info={
-                        'email': user_data.get('email'),
-                        'first_name': user_data.get('first_name'),
-                        'last_name': user_data.get('last_name')
-                    }
-                )
+        user_data = self.users_by_id.get(user_id)
+        if user_data and user_data['role'] == 'customer':
+            return CustomerProfile(
+                user_id=user_id,
+                guest_id=user_data.get('guest_id'),
+                loyalty_number=user_data.get('loyalty_number'),
+                preferences=user_data.get('preferences', {}),
+                contact_info={
+                    'email': user_data.get('email'),
+                    'first_name': user_data.get('first_name'),
+                    'last_name': user_data.get('last_name')
+                }
+            )
         return None
     
     def is_admin(self, user: User) -> bool:
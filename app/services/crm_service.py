@@ -1,11 +1,17 @@
-import json
-import os
+import heapq
+import itertools
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timedelta
 import logging
 
 from app.models.guest import Guest, GuestType, PreferenceCategory
 from app.models.feedback import Feedback, SentimentLabel
+from app.services.analytics_store import parse_timestamp
+from app.services.feedback_index import GuestFeedbackIndex
+from app.services.crm_storage import CRMStorage, create_crm_storage
+from app.services.id_generator import id_generator
+from app.services.feedback_repository import FeedbackRepository, feedback_repository
+from app.services.recommendation_service import RecommendationService, recommendation_service
 
 logger = logging.getLogger(__name__)
 
@@ -14,54 +20,69 @@ class CRMService:
     Service for managing Customer Relationship Management data
     """
     
-    def __init__(self, data_path: str = "app/data"):
+    def __init__(self, data_path: str = "app/data", storage: Optional[CRMStorage] = None,
+                 submissions: Optional[FeedbackRepository] = None,
+                 recommendations: Optional[RecommendationService] = None):
         """
-        Initialize CRM service with data file paths
+        Initialize CRM service with a storage backend (JSON files by default).
+        Feedback guests submit through the app is read from the shared
+        feedback repository alongside the CRM's own records, and guest
+        profile changes are passed on to the recommendation service.
         """
         self.data_path = data_path
-        self.guests_file = os.path.join(data_path, "comprehensive_guests_data.json")
-        self.feedback_file = os.path.join(data_path, "comprehensive_feedback_data.json")
+        self.storage = storage or create_crm_storage(data_path)
+        self.submissions = submissions or feedback_repository
+        self.recommendations = recommendations or recommendation_service
         self._guests_cache = {}
         self._feedback_cache = {}
+        # guest_id -> feedback IDs ordered by created_at
+        self._feedback_by_guest = GuestFeedbackIndex()
         self._load_data()
     
     def _load_data(self):
         """
-        Load CRM data from JSON files
+        Load CRM data from the storage backend
         """
         try:
             # Load guests data
-            logger.info(f"Looking for guests file at: {self.guests_file}")
-            logger.info(f"File exists: {os.path.exists(self.guests_file)}")
-            if os.path.exists(self.guests_file):
-                with open(self.guests_file, 'r', encoding='utf-8') as f:
-                    guests_data = json.load(f)
-                    self._guests_cache = {guest['guest_id']: guest for guest in guests_data.get('guests', [])}
-                    logger.info(f"Loaded {len(self._guests_cache)} guests from comprehensive data")
+            guests = self.storage.load_guests()
+            if guests is not None:
+                self._guests_cache = guests
+                logger.info(f"Loaded {len(self._guests_cache)} guests from {self.storage.name} storage")
             else:
                 self._guests_cache = {}
                 self._create_sample_guests_data()
                 logger.info("Created sample guests data")
             
             # Load feedback data
-            logger.info(f"Looking for feedback file at: {self.feedback_file}")
-            logger.info(f"File exists: {os.path.exists(self.feedback_file)}")
-            if os.path.exists(self.feedback_file):
-                with open(self.feedback_file, 'r', encoding='utf-8') as f:
-                    feedback_data = json.load(f)
-                    self._feedback_cache = {fb['feedback_id']: fb for fb in feedback_data.get('feedback', [])}
-                    logger.info(f"Loaded {len(self._feedback_cache)} feedback records from comprehensive data")
+            feedback = self.storage.load_feedback()
+            if feedback is not None:
+                self._feedback_cache = feedback
+                logger.info(f"Loaded {len(self._feedback_cache)} feedback records from {self.storage.name} storage")
             else:
                 self._feedback_cache = {}
                 self._create_sample_feedback_data()
                 logger.info("Created sample feedback data")
                 
+            self._rebuild_feedback_index()
             logger.info(f"Loaded {len(self._guests_cache)} guests and {len(self._feedback_cache)} feedback items")
             
         except Exception as e:
             logger.error(f"Error loading CRM data: {str(e)}")
             self._guests_cache = {}
             self._feedback_cache = {}
+            self._feedback_by_guest.clear()
+    
+    @staticmethod
+    def _feedback_time(feedback: Dict[str, Any]) -> str:
+        """Sort key for a guest's feedback history"""
+        return feedback.get('created_at') or feedback.get('timestamp') or feedback.get('submitted_at', '')
+    
+    def _rebuild_feedback_index(self):
+        """Rebuild the guest_id index from the feedback cache"""
+        self._feedback_by_guest.clear()
+        for feedback_id, fb in self._feedback_cache.items():
+            self._feedback_by_guest.add(fb.get('guest_id'), self._feedback_time(fb), feedback_id)
     
     def _create_sample_guests_data(self):
         """
@@ -161,7 +182,7 @@ class CRMService:
         ]
         
         self._guests_cache = {guest['guest_id']: guest for guest in sample_guests}
-        self._save_guests_data()
+        self.storage.put_all_guests(sample_guests)
     
     def _create_sample_feedback_data(self):
         """
@@ -243,29 +264,26 @@ class CRMService:
         ]
         
         self._feedback_cache = {fb['feedback_id']: fb for fb in sample_feedback}
-        self._save_feedback_data()
+        self._rebuild_feedback_index()
+        self.storage.put_all_feedback(sample_feedback)
     
-    def _save_guests_data(self):
+    def _save_guest(self, guest_id: str):
         """
-        Save guests data to JSON file
+        Persist a single guest through the storage backend
         """
         try:
-            os.makedirs(self.data_path, exist_ok=True)
-            with open(self.guests_file, 'w', encoding='utf-8') as f:
-                json.dump({"guests": list(self._guests_cache.values())}, f, indent=2, default=str)
+            self.storage.put_guest(self._guests_cache[guest_id])
         except Exception as e:
-            logger.error(f"Error saving guests data: {str(e)}")
+            logger.error(f"Error saving guest {guest_id}: {str(e)}")
     
-    def _save_feedback_data(self):
+    def _save_feedback(self, feedback_id: str):
         """
-        Save feedback data to JSON file
+        Persist a single feedback record through the storage backend
         """
         try:
-            os.makedirs(self.data_path, exist_ok=True)
-            with open(self.feedback_file, 'w', encoding='utf-8') as f:
-                json.dump({"feedback": list(self._feedback_cache.values())}, f, indent=2, default=str)
+            self.storage.put_feedback(self._feedback_cache[feedback_id])
         except Exception as e:
-            logger.error(f"Error saving feedback data: {str(e)}")
+            logger.error(f"Error saving feedback {feedback_id}: {str(e)}")
     
     # Guest management methods
     def get_all_guests(self) -> List[Dict[str, Any]]:
@@ -284,7 +302,8 @@ class CRMService:
         guest_data['last_updated'] = datetime.now().isoformat()
         
         self._guests_cache[guest_id] = guest_data
-        self._save_guests_data()
+        self._save_guest(guest_id)
+        self.recommendations.invalidate_guest(guest_id)
         return guest_id
     
     def update_guest(self, guest_id: str, update_data: Dict[str, Any]) -> bool:
@@ -294,37 +313,42 @@ class CRMService:
         
         update_data['last_updated'] = datetime.now().isoformat()
         self._guests_cache[guest_id].update(update_data)
-        self._save_guests_data()
+        self._save_guest(guest_id)
+        # Cached recommendations were built from the old profile
+        self.recommendations.update_guest_profile(guest_id, update_data)
         return True
     
     # Feedback management methods
     def get_guest_feedback(self, guest_id: str) -> List[Dict[str, Any]]:
-        """Get all feedback for a specific guest"""
-        return [fb for fb in self._feedback_cache.values() if fb.get('guest_id') == guest_id]
+        """Get all feedback for a specific guest (CRM records and app submissions), oldest first"""
+        return list(heapq.merge(
+            (self._feedback_cache[feedback_id] for feedback_id in self._feedback_by_guest.get(guest_id)),
+            self.submissions.for_guest(guest_id),
+            key=self._feedback_time
+        ))
     
     def get_recent_feedback(self, days: int = 7) -> List[Dict[str, Any]]:
         """Get recent feedback within specified days"""
         cutoff_date = datetime.now() - timedelta(days=days)
         recent_feedback = []
         
-        for fb in self._feedback_cache.values():
-            try:
-                fb_date = datetime.fromisoformat(fb.get('created_at', ''))
-                if fb_date >= cutoff_date:
-                    recent_feedback.append(fb)
-            except ValueError:
-                continue
+        for fb in itertools.chain(self._feedback_cache.values(), self.submissions.all()):
+            # Parsed as naive UTC, so "...Z" timestamps compare with the naive cutoff
+            fb_date = parse_timestamp(self._feedback_time(fb))
+            if fb_date is not None and fb_date >= cutoff_date:
+                recent_feedback.append(fb)
         
-        return sorted(recent_feedback, key=lambda x: x.get('created_at', ''), reverse=True)
+        return sorted(recent_feedback, key=self._feedback_time, reverse=True)
     
     def add_feedback(self, feedback_data: Dict[str, Any]) -> str:
         """Add new feedback"""
-        feedback_id = f"F{len(self._feedback_cache) + 1:03d}"
+        feedback_id = id_generator.new_id("FB")
         feedback_data['feedback_id'] = feedback_id
         feedback_data['created_at'] = datetime.now().isoformat()
         
         self._feedback_cache[feedback_id] = feedback_data
-        self._save_feedback_data()
+        self._feedback_by_guest.add(feedback_data.get('guest_id'), self._feedback_time(feedback_data), feedback_id)
+        self._save_feedback(feedback_id)
         return feedback_id
     
     def update_feedback(self, feedback_id: str, update_data: Dict[str, Any]) -> bool:
@@ -332,29 +356,39 @@ class CRMService:
         if feedback_id not in self._feedback_cache:
             return False
         
-        self._feedback_cache[feedback_id].update(update_data)
-        self._save_feedback_data()
+        feedback = self._feedback_cache[feedback_id]
+        old_guest_id, old_time = feedback.get('guest_id'), self._feedback_time(feedback)
+        feedback.update(update_data)
+        
+        # Re-index only if the fields the index depends on changed
+        if feedback.get('guest_id') != old_guest_id or self._feedback_time(feedback) != old_time:
+            self._feedback_by_guest.remove(old_guest_id, feedback_id)
+            self._feedback_by_guest.add(feedback.get('guest_id'), self._feedback_time(feedback), feedback_id)
+        
+        self._save_feedback(feedback_id)
         return True
     
     def get_feedback_by_guest(self, guest_id: str, days: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get feedback for a specific guest, optionally within specified days"""
-        guest_feedback = [fb for fb in self._feedback_cache.values() if fb.get('guest_id') == guest_id]
+        guest_feedback = list(heapq.merge(
+            (self._feedback_cache[feedback_id] for feedback_id in self._feedback_by_guest.get(guest_id, newest_first=True)),
+            self.submissions.for_guest(guest_id, newest_first=True),
+            key=self._feedback_time,
+            reverse=True
+        ))
         
         if days is not None:
             cutoff_date = datetime.now() - timedelta(days=days)
             filtered_feedback = []
             
             for fb in guest_feedback:
-                try:
-                    fb_date = datetime.fromisoformat(fb.get('created_at', ''))
-                    if fb_date >= cutoff_date:
-                        filtered_feedback.append(fb)
-                except ValueError:
-                    continue
+                fb_date = parse_timestamp(self._feedback_time(fb))
+                if fb_date is not None and fb_date >= cutoff_date:
+                    filtered_feedback.append(fb)
             
             guest_feedback = filtered_feedback
         
-        return sorted(guest_feedback, key=lambda x: x.get('created_at', ''), reverse=True)
+        return guest_feedback
 
     # Analytics methods
     def get_guest_stats(self, guest_id: str) -> Dict[str, Any]:
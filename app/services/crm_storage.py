@@ -0,0 +1,239 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from app.services.json_stream import load_json_records
+
+logger = logging.getLogger(__name__)
+
+
+def _feedback_date(feedback: Dict[str, Any]) -> str:
+    return feedback.get('created_at') or feedback.get('timestamp') or ''
+
+
+def _feedback_sentiment_label(feedback: Dict[str, Any]) -> Optional[str]:
+    if feedback.get('sentiment_label'):
+        return feedback['sentiment_label'].upper()
+    sentiment = feedback.get('sentiment')
+    if isinstance(sentiment, dict) and sentiment.get('label'):
+        return sentiment['label'].upper()
+    return None
+
+
+class CRMStorage:
+    """
+    Persistence interface for CRMService guests and feedback.
+
+    ``load_*`` return a dict keyed by ID, or None when nothing has been
+    stored yet. ``put_*`` persist a single record; ``put_all_*`` persist
+    many at once (sample data, migrations).
+    """
+
+    name = "base"
+
+    def load_guests(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def load_feedback(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def put_guest(self, guest: Dict[str, Any]):
+        raise NotImplementedError
+
+    def put_feedback(self, feedback: Dict[str, Any]):
+        raise NotImplementedError
+
+    def put_all_guests(self, guests: Iterable[Dict[str, Any]]):
+        for guest in guests:
+            self.put_guest(guest)
+
+    def put_all_feedback(self, feedback_items: Iterable[Dict[str, Any]]):
+        for feedback in feedback_items:
+            self.put_feedback(feedback)
+
+    def close(self):
+        pass
+
+
+class JSONCRMStorage(CRMStorage):
+    """
+    The original storage: one JSON document per collection, rewritten in
+    full on every change.
+    """
+
+    name = "json"
+
+    def __init__(self, data_path: str = "app/data"):
+        self.data_path = data_path
+        self.guests_file = os.path.join(data_path, "comprehensive_guests_data.json")
+        self.feedback_file = os.path.join(data_path, "comprehensive_feedback_data.json")
+        self._guests: Dict[str, Dict[str, Any]] = {}
+        self._feedback: Dict[str, Dict[str, Any]] = {}
+
+    def load_guests(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        logger.info(f"Looking for guests file at: {self.guests_file}")
+        if not os.path.exists(self.guests_file):
+            return None
+        self._guests = {guest['guest_id']: guest for guest in load_json_records(self.guests_file, key='guests')}
+        return self._guests
+
+    def load_feedback(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        logger.info(f"Looking for feedback file at: {self.feedback_file}")
+        if not os.path.exists(self.feedback_file):
+            return None
+        self._feedback = {fb['feedback_id']: fb for fb in load_json_records(self.feedback_file, key='feedback')}
+        return self._feedback
+
+    def put_guest(self, guest: Dict[str, Any]):
+        self._guests[guest['guest_id']] = guest
+        self._write(self.guests_file, {"guests": list(self._guests.values())})
+
+    def put_feedback(self, feedback: Dict[str, Any]):
+        self._feedback[feedback['feedback_id']] = feedback
+        self._write(self.feedback_file, {"feedback": list(self._feedback.values())})
+
+    def put_all_guests(self, guests: Iterable[Dict[str, Any]]):
+        self._guests.update((guest['guest_id'], guest) for guest in guests)
+        self._write(self.guests_file, {"guests": list(self._guests.values())})
+
+    def put_all_feedback(self, feedback_items: Iterable[Dict[str, Any]]):
+        self._feedback.update((fb['feedback_id'], fb) for fb in feedback_items)
+        self._write(self.feedback_file, {"feedback": list(self._feedback.values())})
+
+    def _write(self, path: str, document: Dict[str, Any]):
+        try:
+            os.makedirs(self.data_path, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=2, default=str)
+        except Exception as e:
+            logger.error(f"Error saving {path}: {str(e)}")
+
+
+class SQLiteCRMStorage(CRMStorage):
+    """
+    Embedded SQLite storage in WAL mode. Each write touches a single row;
+    feedback is indexed on guest_id, date and sentiment_label.
+    """
+
+    name = "sqlite"
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS guests ("
+        " guest_id TEXT PRIMARY KEY,"
+        " data TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS feedback ("
+        " feedback_id TEXT PRIMARY KEY,"
+        " guest_id TEXT,"
+        " date TEXT,"
+        " sentiment_label TEXT,"
+        " data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_guest_date ON feedback (guest_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_date ON feedback (date)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_sentiment ON feedback (sentiment_label)",
+    )
+    # Statements are constant so sqlite3's statement cache reuses the prepared versions
+    UPSERT_GUEST = "INSERT OR REPLACE INTO guests (guest_id, data) VALUES (?, ?)"
+    UPSERT_FEEDBACK = (
+        "INSERT OR REPLACE INTO feedback (feedback_id, guest_id, date, sentiment_label, data) "
+        "VALUES (?, ?, ?, ?, ?)"
+    )
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+
+    def _load(self, query: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(query).fetchall()
+        if not rows:
+            return None
+        return {record_id: json.loads(data) for record_id, data in rows}
+
+    def load_guests(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self._load("SELECT guest_id, data FROM guests")
+
+    def load_feedback(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        return self._load("SELECT feedback_id, data FROM feedback ORDER BY date")
+
+    def _guest_row(self, guest: Dict[str, Any]):
+        return (guest['guest_id'], json.dumps(guest, default=str))
+
+    def _feedback_row(self, feedback: Dict[str, Any]):
+        return (
+            feedback['feedback_id'],
+            feedback.get('guest_id'),
+            _feedback_date(feedback),
+            _feedback_sentiment_label(feedback),
+            json.dumps(feedback, default=str)
+        )
+
+    def put_guest(self, guest: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.execute(self.UPSERT_GUEST, self._guest_row(guest))
+
+    def put_feedback(self, feedback: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.execute(self.UPSERT_FEEDBACK, self._feedback_row(feedback))
+
+    def put_all_guests(self, guests: Iterable[Dict[str, Any]]):
+        with self._lock, self._conn:
+            self._conn.executemany(self.UPSERT_GUEST, (self._guest_row(g) for g in guests))
+
+    def put_all_feedback(self, feedback_items: Iterable[Dict[str, Any]]):
+        with self._lock, self._conn:
+            self._conn.executemany(self.UPSERT_FEEDBACK, (self._feedback_row(fb) for fb in feedback_items))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_crm_storage(data_path: str = "app/data") -> CRMStorage:
+    """Build the storage backend selected by CRM_STORAGE_BACKEND (json or sqlite)"""
+    backend = os.getenv("CRM_STORAGE_BACKEND", "json").lower()
+    if backend == "sqlite":
+        return SQLiteCRMStorage(os.getenv("CRM_SQLITE_PATH", os.path.join(data_path, "crm.sqlite3")))
+    return JSONCRMStorage(data_path)
+
+
+def migrate_json_to_sqlite(data_path: str, db_path: str) -> Dict[str, int]:
+    """Copy the comprehensive_*_data.json files into a SQLite database"""
+    source = JSONCRMStorage(data_path)
+    target = SQLiteCRMStorage(db_path)
+    try:
+        guests = source.load_guests() or {}
+        feedback = source.load_feedback() or {}
+        target.put_all_guests(guests.values())
+        target.put_all_feedback(feedback.values())
+        return {"guests": len(guests), "feedback": len(feedback)}
+    finally:
+        target.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRM storage maintenance")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    migrate = subcommands.add_parser("migrate", help="Migrate the JSON CRM data files into SQLite")
+    migrate.add_argument("--data-path", default="app/data")
+    migrate.add_argument("--db", default=None, help="SQLite database path (default: <data-path>/crm.sqlite3)")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        db_path = args.db or os.path.join(args.data_path, "crm.sqlite3")
+        counts = migrate_json_to_sqlite(args.data_path, db_path)
+        print(f"✅ Migrated {counts['guests']} guests and {counts['feedback']} feedback records to {db_path}")
+
+
+if __name__ == "__main__":
+    main()
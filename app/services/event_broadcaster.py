@@ -0,0 +1,102 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One connected stream client: a bounded queue of pending events"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Set when the client fell too far behind; its stream is closed so it
+        # reconnects and resumes from the replay buffer
+        self.overflowed = False
+
+
+class EventBroadcaster:
+    """
+    Fan-out of server events to Server-Sent Events clients.
+
+    Every event gets a monotonically increasing ID and is kept in a ring
+    buffer of the last ``history_size`` events, so a client reconnecting
+    with ``Last-Event-ID`` receives what it missed. Each client has its own
+    bounded queue: a client that stops reading is disconnected instead of
+    letting its backlog grow, and catches up from the buffer on reconnect.
+    """
+
+    def __init__(self, history_size: int = 256, client_queue_size: int = 100):
+        self.client_queue_size = client_queue_size
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._history: Deque[Tuple[int, str, Any]] = deque(maxlen=history_size)
+        self._subscribers: Set[Subscription] = set()
+
+    @property
+    def client_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Any) -> int:
+        """Record an event and queue it for every connected client; safe from any thread"""
+        with self._lock:
+            event = (next(self._ids), event_type, data)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(self._deliver, subscription, event)
+            except RuntimeError:
+                # The client's event loop has shut down
+                self.unsubscribe(subscription)
+        return event[0]
+
+    def _deliver(self, subscription: Subscription, event: Tuple[int, str, Any]):
+        if subscription.overflowed:
+            return
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            subscription.overflowed = True
+            logger.warning(f"⚠️ Event stream client fell behind at event {event[0]}; disconnecting")
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Tuple[Subscription, Optional[List[Tuple[int, str, Any]]]]:
+        """
+        Register a client. Returns the subscription and the events to replay
+        after ``last_event_id``; the replay is None when the client missed
+        more than the buffer holds and must reload its state.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), self.client_queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is None:
+                return subscription, []
+            oldest = self._history[0][0] if self._history else 1
+            latest = self._history[-1][0] if self._history else 0
+            # Older than the buffer, or from before a server restart
+            if last_event_id < oldest - 1 or last_event_id > latest:
+                return subscription, None
+            return subscription, [event for event in self._history if event[0] > last_event_id]
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @staticmethod
+    def format_event(event_id: Optional[int], event_type: str, data: Any) -> str:
+        """Serialize one event in text/event-stream framing"""
+        lines = []
+        if event_id is not None:
+            lines.append(f"id: {event_id}")
+        lines.append(f"event: {event_type}")
+        lines.append(f"data: {json.dumps(data, default=str)}")
+        return "\n".join(lines) + "\n\n"
+
+
+# Global instance for admin alerts and dashboard deltas
+alert_events = EventBroadcaster()
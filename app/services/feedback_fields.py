@@ -0,0 +1,37 @@
+from typing import Dict, Optional
+
+
+def feedback_text(feedback: Dict) -> str:
+    """Return the free-text body of a feedback record, whichever schema it uses"""
+    return feedback.get("comment") or feedback.get("content") or feedback.get("feedback_text") or ""
+
+
+def stored_sentiment(feedback: Dict) -> Optional[Dict]:
+    """
+    Return the sentiment stored on a feedback record as {"sentiment", "confidence"}.
+
+    Understands the submission schema (``sentiment_analysis``), the CRM
+    dataset schema (``sentiment.label``) and flat ``sentiment_label`` fields.
+    Returns None when the record has not been scored yet.
+    """
+    analysis = feedback.get("sentiment_analysis")
+    if isinstance(analysis, dict) and analysis.get("sentiment"):
+        return {
+            "sentiment": analysis["sentiment"].lower(),
+            "confidence": analysis.get("confidence", 0.5)
+        }
+
+    sentiment = feedback.get("sentiment")
+    if isinstance(sentiment, dict) and sentiment.get("label"):
+        return {
+            "sentiment": sentiment["label"].lower(),
+            "confidence": sentiment.get("confidence", 0.5)
+        }
+
+    if feedback.get("sentiment_label"):
+        return {
+            "sentiment": feedback["sentiment_label"].lower(),
+            "confidence": feedback.get("confidence_score", 0.5)
+        }
+
+    return None
@@ -0,0 +1,54 @@
+import bisect
+import itertools
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+class GuestFeedbackIndex:
+    """
+    Secondary index from guest_id to that guest's feedback, ordered by time.
+
+    Items can be feedback IDs or the records themselves; they are kept
+    sorted by the supplied time key (ISO-8601 strings sort chronologically)
+    so a guest's history is read without scanning everyone else's.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, List[Tuple[str, int, Any]]] = {}
+        self._sequence = itertools.count()
+
+    def add(self, guest_id: str, time_key: str, item: Any):
+        entries = self._entries.setdefault(guest_id, [])
+        entry = (time_key or "", next(self._sequence), item)
+        if not entries or entry[:2] >= entries[-1][:2]:
+            entries.append(entry)
+        else:
+            # Sequence numbers are unique, so items themselves are never compared
+            bisect.insort(entries, entry)
+
+    def remove(self, guest_id: str, item: Any) -> bool:
+        entries = self._entries.get(guest_id)
+        if not entries:
+            return False
+        for position, (_, _, existing) in enumerate(entries):
+            if existing is item or existing == item:
+                del entries[position]
+                if not entries:
+                    del self._entries[guest_id]
+                return True
+        return False
+
+    def get(self, guest_id: str, newest_first: bool = False) -> List[Any]:
+        entries = self._entries.get(guest_id, [])
+        items = [item for _, _, item in entries]
+        if newest_first:
+            items.reverse()
+        return items
+
+    def count(self, guest_id: str) -> int:
+        return len(self._entries.get(guest_id, ()))
+
+    def clear(self):
+        self._entries.clear()
+
+    def guest_ids(self) -> Iterable[str]:
+        return self._entries.keys()
@@ -0,0 +1,436 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.services.file_lock import lock, try_lock
+from app.services.id_generator import claim_worker_id
+from app.services.json_stream import load_json_records
+
+logger = logging.getLogger(__name__)
+
+# segment-<sequence>-w<writer>.jsonl; segments written before per-writer names have no writer part
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})(?:-w(\d{3}))?\.jsonl$")
+COMPACTION_MARKER = "COMPACTING"
+COMPACTION_LOCK = "COMPACT.lock"
+# Log entries carrying this "_op" change fields of an earlier record instead of adding one
+UPDATE_OP = "update"
+
+
+class FeedbackLog:
+    """
+    Append-only JSON Lines log in front of the feedback snapshot file.
+
+    New records are appended to the active segment instead of rewriting the
+    whole snapshot. Segments are periodically folded back into the snapshot
+    (same JSON array format as before) by a background compaction. Changes
+    to a logged record are appended as update entries and merged into the
+    record when the log is read or compacted.
+
+    Several processes (e.g. uvicorn workers) may write the same log. The
+    first append (or ``open``) claims a writer number in the log directory,
+    and a writer only ever appends to its own segments. Readers merge the
+    segments of every writer, so an update entry can come before the record
+    it targets. Compaction and reads hold a lock file in the log directory:
+    one process compacts at a time, it folds only segments no live writer
+    still appends to, and nobody reads while the snapshot is replaced.
+    """
+
+    def __init__(
+        self,
+        snapshot_file: str,
+        log_dir: Optional[str] = None,
+        fsync_batch_size: int = 16,
+        fsync_interval_ms: int = 200,
+        compact_every: int = 1000,
+    ):
+        self.snapshot_file = snapshot_file
+        self.log_dir = log_dir or os.path.join(os.path.dirname(snapshot_file), "feedback_log")
+        self.fsync_batch_size = max(1, fsync_batch_size)
+        self.fsync_interval = max(0.0, fsync_interval_ms / 1000.0)
+        self.compact_every = compact_every
+
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._active_file = None
+        self._active_segment: Optional[Tuple[int, int]] = None
+        self._appended_since_compaction = 0
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+        self._flusher: Optional[threading.Thread] = None
+        self._compactor: Optional[threading.Thread] = None
+        self._closed = False
+        self.writer_id: Optional[int] = None
+        self._writer_lock = None
+
+        os.makedirs(self.log_dir, exist_ok=True)
+
+    def open(self):
+        """
+        Claim a writer number and start a segment for this process's appends.
+        The app calls this at startup; otherwise the first append does.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Feedback log is closed")
+            if self._active_file is not None:
+                return
+            # The claim lasts until close() (or the process exits) and names this writer's segments
+            self.writer_id, self._writer_lock = claim_worker_id(self.log_dir)
+            with self._shared_lock():
+                self._recover()
+                self._active_segment = self._next_segment()
+                self._active_file = open(self._segment_path(self._active_segment), "a", encoding="utf-8")
+        logger.info(
+            f"📒 Feedback log ready: writer {self.writer_id}, segment {self._active_segment[0]}, "
+            f"{self._appended_since_compaction} records pending compaction"
+        )
+
+    def _shared_lock(self):
+        """Block until no other process is compacting or reading the log; closing the file releases it"""
+        return lock(os.path.join(self.log_dir, COMPACTION_LOCK))
+
+    # Startup recovery
+    def _recover(self):
+        """Finish or roll back an interrupted compaction and repair torn writes (holding the shared lock)"""
+        tmp_snapshot = self.snapshot_file + ".tmp"
+        marker = os.path.join(self.log_dir, COMPACTION_MARKER)
+
+        if os.path.exists(marker):
+            with open(marker, "r") as f:
+                state = json.load(f)
+            # Markers written before per-writer segments name the last folded segment instead
+            compacted = state.get("segments") or [
+                os.path.basename(self._segment_path(segment)) for segment in self._segments()
+                if segment[1] < 0 and segment[0] <= state.get("compacting_through", 0)
+            ]
+            if os.path.exists(tmp_snapshot):
+                # Crashed before the snapshot was replaced: segments are still authoritative
+                os.remove(tmp_snapshot)
+                logger.warning("⚠️ Rolled back interrupted feedback log compaction")
+            else:
+                # Snapshot already contains the sealed segments, finish deleting them
+                for name in compacted:
+                    path = os.path.join(self.log_dir, name)
+                    if os.path.exists(path):
+                        os.remove(path)
+                logger.warning(f"⚠️ Completed interrupted feedback log compaction of {len(compacted)} segments")
+            os.remove(marker)
+        elif os.path.exists(tmp_snapshot):
+            os.remove(tmp_snapshot)
+
+        segments = self._segments()
+        # Segments an earlier process left under this writer number (or unnamed) may end in a torn write
+        for segment in segments:
+            if segment[1] in (self.writer_id, -1):
+                self._repair_segment(self._segment_path(segment))
+        self._appended_since_compaction = sum(
+            self._count_records(self._segment_path(s)) for s in segments
+        )
+
+    def _repair_segment(self, path: str):
+        """Truncate a partially written trailing record left by a crash"""
+        good_offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                good_offset += len(line)
+            size = f.seek(0, os.SEEK_END)
+        if good_offset < size:
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+                f.flush()
+                os.fsync(f.fileno())
+            logger.warning(f"⚠️ Truncated {size - good_offset} bytes of torn write from {path}")
+
+    def _segments(self) -> List[Tuple[int, int]]:
+        """(sequence, writer) of every segment, in read order; writer -1 for unnamed older segments"""
+        segments = []
+        for name in os.listdir(self.log_dir):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                writer = match.group(2)
+                segments.append((int(match.group(1)), int(writer) if writer else -1))
+        return sorted(segments)
+
+    def _segment_path(self, segment: Tuple[int, int]) -> str:
+        sequence, writer = segment
+        name = f"segment-{sequence:06d}.jsonl" if writer < 0 else f"segment-{sequence:06d}-w{writer:03d}.jsonl"
+        return os.path.join(self.log_dir, name)
+
+    def _next_segment(self) -> Tuple[int, int]:
+        """A new segment for this writer, after every existing one (writers racing here tie on the sequence)"""
+        sequence = max((s[0] for s in self._segments()), default=0)
+        if self._active_segment:
+            sequence = max(sequence, self._active_segment[0])
+        return sequence + 1, self.writer_id
+
+    def _count_records(self, path: str) -> int:
+        with open(path, "rb") as f:
+            return sum(1 for line in f if line.strip())
+
+    # Write path
+    def append(self, record: Dict):
+        """Append a single record to the active segment"""
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Feedback log is closed")
+            if self._active_file is None:
+                self.open()
+            self._active_file.write(line)
+            self._active_file.flush()
+            self._unsynced += 1
+            self._appended_since_compaction += 1
+
+            if (self._unsynced >= self.fsync_batch_size
+                    or time.monotonic() - self._last_fsync >= self.fsync_interval):
+                self._fsync_locked()
+            else:
+                self._ensure_flusher()
+
+            if self.compact_every and self._appended_since_compaction >= self.compact_every:
+                self._schedule_compaction()
+
+    def append_update(self, feedback_id: str, fields: Dict):
+        """Append an update that sets ``fields`` on the record with this feedback_id"""
+        self.append({"_op": UPDATE_OP, "feedback_id": feedback_id, "fields": fields})
+
+    def flush(self):
+        """Force pending appends to stable storage"""
+        with self._lock:
+            if self._unsynced and self._active_file is not None and not self._closed:
+                self._fsync_locked()
+
+    def _fsync_locked(self):
+        os.fsync(self._active_file.fileno())
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+
+    def _ensure_flusher(self):
+        """Start the background thread that bounds how long an append stays unsynced"""
+        if self._flusher and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._flush_loop, name="feedback-log-fsync", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.fsync_interval or 0.05)
+            with self._lock:
+                if self._closed or not self._unsynced:
+                    return
+                self._fsync_locked()
+
+    # Compaction
+    def _schedule_compaction(self):
+        if self._compactor and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="feedback-log-compact", daemon=True)
+        self._compactor.start()
+
+    def _rotate_locked(self):
+        """Seal the active segment and open a new one"""
+        self._fsync_locked()
+        self._active_file.close()
+        self._active_segment = self._next_segment()
+        self._active_file = open(self._segment_path(self._active_segment), "a", encoding="utf-8")
+        self._appended_since_compaction = 0
+
+    def _writer_alive(self, writer: int) -> bool:
+        """Whether some open log (in any process) holds this writer number"""
+        if writer == self.writer_id and self._active_file is not None:
+            return True
+        probe = try_lock(os.path.join(self.log_dir, f"worker-{writer:03d}.lock"))
+        if probe is None:
+            return True
+        probe.close()
+        return False
+
+    def _sealed_segments(self) -> List[Tuple[int, int]]:
+        """Every segment except the newest of each live writer, which it may still append to"""
+        segments = self._segments()
+        newest = {writer: (sequence, writer) for sequence, writer in segments}
+        active = {segment for writer, segment in newest.items() if writer >= 0 and self._writer_alive(writer)}
+        return [segment for segment in segments if segment not in active]
+
+    def compact(self):
+        """Fold the sealed segments of every writer into the JSON snapshot"""
+        with self._compaction_lock:
+            with self._lock:
+                if self._closed:
+                    return
+                if self._active_file is not None:
+                    self._rotate_locked()
+
+            # Another process compacting (or reading) already covers, or will cover, these segments
+            shared = try_lock(os.path.join(self.log_dir, COMPACTION_LOCK))
+            if shared is None:
+                logger.info("🗜️ Feedback log is being compacted or read by another process; skipping")
+                return
+            try:
+                self._compact_sealed()
+            finally:
+                shared.close()
+
+    def _compact_sealed(self):
+        sealed = self._sealed_segments()
+        if not sealed:
+            return
+
+        started = time.monotonic()
+        # Two streaming passes keep memory bounded by the updates, not the history:
+        # collect the pending updates, then rewrite the records with them applied
+        updates: Dict[str, Dict] = {}
+        for entry in self._iter_entries(sealed):
+            if entry.get("_op") == UPDATE_OP:
+                updates.setdefault(entry.get("feedback_id"), {}).update(entry.get("fields", {}))
+
+        tmp_snapshot = self.snapshot_file + ".tmp"
+        count = 0
+        with open(tmp_snapshot, "w") as f:
+            # Same layout as json.dump(records, f, indent=2), one record at a time
+            f.write("[")
+            for entry in self._iter_entries(sealed):
+                if entry.get("_op") == UPDATE_OP:
+                    continue
+                entry.update(updates.pop(entry.get("feedback_id"), {}))
+                f.write(",\n  " if count else "\n  ")
+                f.write(json.dumps(entry, indent=2, default=str).replace("\n", "\n  "))
+                count += 1
+            # Updates to records still in a live writer's segment stay update entries
+            for feedback_id, fields in updates.items():
+                entry = {"_op": UPDATE_OP, "feedback_id": feedback_id, "fields": fields}
+                f.write(",\n  " if count else "\n  ")
+                f.write(json.dumps(entry, indent=2, default=str).replace("\n", "\n  "))
+                count += 1
+            f.write("\n]" if count else "]")
+            f.flush()
+            os.fsync(f.fileno())
+
+        marker = os.path.join(self.log_dir, COMPACTION_MARKER)
+        names = [os.path.basename(self._segment_path(segment)) for segment in sealed]
+        self._write_atomic(marker, {"segments": names})
+        os.replace(tmp_snapshot, self.snapshot_file)
+        self._fsync_dir(os.path.dirname(os.path.abspath(self.snapshot_file)))
+        for name in names:
+            os.remove(os.path.join(self.log_dir, name))
+        os.remove(marker)
+
+        logger.info(
+            f"🗜️ Compacted {len(sealed)} feedback log segments: "
+            f"{count} entries in {time.monotonic() - started:.2f}s"
+        )
+
+    def _write_atomic(self, path: str, data: Dict):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _fsync_dir(self, path: str):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    # Read path
+    def _iter_snapshot(self) -> Iterator[Dict]:
+        if os.path.exists(self.snapshot_file):
+            yield from load_json_records(self.snapshot_file)
+
+    def _iter_segment(self, path: str) -> Iterator[Dict]:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"⚠️ Skipping corrupt record at {path}:{line_number}")
+
+    def _iter_entries(self, segments: Optional[List[Tuple[int, int]]] = None) -> Iterator[Dict]:
+        yield from self._iter_snapshot()
+        for segment in self._segments() if segments is None else segments:
+            yield from self._iter_segment(self._segment_path(segment))
+
+    def iter_entries(self) -> Iterator[Dict]:
+        """
+        Stream the snapshot and then every logged entry, one at a time and
+        in order. Update entries (``"_op": "update"``) are included as-is,
+        for the caller to apply; one may precede its record when another
+        writer logged the record. Compaction, in any process, is held off
+        until the iteration finishes, so consume it promptly.
+        """
+        with self._compaction_lock:
+            self.flush()
+            shared = self._shared_lock()
+            try:
+                yield from self._iter_entries()
+            finally:
+                shared.close()
+
+    def _apply_updates(self, entries: Iterable[Dict]) -> List[Dict]:
+        """Fold update entries into the records they target, keeping record order"""
+        records = []
+        by_id: Dict[str, Dict] = {}
+        # Updates read before their record, which another writer logged in a later segment
+        early: Dict[str, Dict] = {}
+        for entry in entries:
+            if entry.get("_op") == UPDATE_OP:
+                target = by_id.get(entry.get("feedback_id"))
+                if target is None:
+                    early.setdefault(entry.get("feedback_id"), {}).update(entry.get("fields", {}))
+                    continue
+                target.update(entry.get("fields", {}))
+                continue
+            entry.update(early.pop(entry.get("feedback_id"), {}))
+            records.append(entry)
+            if entry.get("feedback_id"):
+                by_id[entry["feedback_id"]] = entry
+        for feedback_id in early:
+            logger.warning(f"⚠️ Dropping update for unknown feedback {feedback_id}")
+        return records
+
+    def load_all(self) -> List[Dict]:
+        """Return the snapshot followed by every logged record, in submission order, with updates applied"""
+        return self._apply_updates(self.iter_entries())
+
+    def close(self):
+        """Flush pending appends and close the active segment"""
+        with self._lock:
+            if self._closed:
+                return
+            if self._active_file is not None:
+                self._fsync_locked()
+                self._active_file.close()
+            self._closed = True
+            if self._writer_lock:
+                # Closing the file releases the writer number
+                self._writer_lock.close()
+                self._writer_lock = None
+
+
+# Global instance
+feedback_log = FeedbackLog(
+    os.path.join(os.path.dirname(__file__), "../data/feedback_submissions.json"),
+    fsync_batch_size=int(os.getenv("FEEDBACK_LOG_FSYNC_BATCH", "16")),
+    fsync_interval_ms=int(os.getenv("FEEDBACK_LOG_FSYNC_INTERVAL_MS", "200")),
+    compact_every=int(os.getenv("FEEDBACK_LOG_COMPACT_EVERY", "1000")),
+)
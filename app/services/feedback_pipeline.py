@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from app.services.feedback_log import FeedbackLog
+
+logger = logging.getLogger(__name__)
+
+# A stage receives the feedback record and returns the fields it produced (or None)
+Stage = Callable[[Dict], Awaitable[Optional[Dict]]]
+
+
+class FeedbackPipeline:
+    """
+    Post-submit processing of accepted feedback.
+
+    Intake only validates and logs the record. Queued records then go through
+    the named stages in order on background tasks. Each record carries a
+    ``processing`` status: its overall state and the status of every stage.
+    After each stage, that status and the fields the stage produced are
+    appended to the feedback log as an update. On restart, ``resume``
+    restarts every unfinished record at the first stage that has not
+    succeeded, so a stage that completed never runs twice.
+
+    Workers belong to the event loop that queued the work. If that loop
+    goes away, the next ``submit`` starts fresh workers and they pick up the
+    queue where the old ones stopped.
+    """
+
+    def __init__(self, log: FeedbackLog, stages: List[Tuple[str, Stage]], workers: int = 2):
+        self.log = log
+        self.stages = stages
+        self.worker_count = max(1, workers)
+        self._queue: Deque[Dict] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+
+    def new_status(self) -> Dict:
+        """Initial ``processing`` status for a record entering the pipeline"""
+        return {
+            "state": "pending",
+            "stages": {name: {"status": "pending"} for name, _ in self.stages},
+            "completed_at": None
+        }
+
+    @staticmethod
+    def is_finished(record: Dict) -> bool:
+        return record.get("processing", {}).get("state") in (None, "complete")
+
+    def submit(self, record: Dict):
+        """Queue an accepted record; must be called from the event loop that should process it"""
+        record.setdefault("processing", self.new_status())
+        self._queue.append(record)
+        self._ensure_workers()
+        self._wakeup.set()
+
+    def resume(self, records: Iterable[Dict]) -> int:
+        """Re-queue logged records whose processing never finished; returns how many"""
+        resumed = 0
+        for record in records:
+            if not self.is_finished(record):
+                self.submit(record)
+                resumed += 1
+        if resumed:
+            logger.info(f"🔁 Resumed processing of {resumed} feedback records")
+        return resumed
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._queue)
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if loop is self._loop and any(not worker.done() for worker in self._workers):
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            loop.create_task(self._work(), name=f"feedback-pipeline-{i}")
+            for i in range(self.worker_count)
+        ]
+
+    async def _work(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            record = self._queue.popleft()
+            try:
+                await self.process(record)
+            except Exception as e:
+                logger.error(f"❌ Feedback pipeline error for {record.get('feedback_id')}: {e}")
+
+    async def process(self, record: Dict) -> bool:
+        """Run the record's outstanding stages in order; stops at the first failure"""
+        processing = record.setdefault("processing", self.new_status())
+        processing["state"] = "processing"
+        for name, stage in self.stages:
+            status = processing["stages"].setdefault(name, {"status": "pending"})
+            if status["status"] == "done":
+                continue
+
+            started = time.perf_counter()
+            try:
+                fields = await stage(record) or {}
+            except Exception as e:
+                status.update(status="failed", error=str(e))
+                processing["state"] = "failed"
+                self.failed += 1
+                self._log_update(record, {})
+                logger.error(f"❌ Feedback {record.get('feedback_id')} failed at stage '{name}': {e}")
+                return False
+
+            record.update(fields)
+            status.pop("error", None)
+            status.update(status="done", duration_ms=round((time.perf_counter() - started) * 1000, 1))
+            if name == self.stages[-1][0]:
+                processing["state"] = "complete"
+                processing["completed_at"] = datetime.utcnow().isoformat()
+            self._log_update(record, fields)
+
+        if processing["state"] != "complete":
+            # Every stage had already run before a restart
+            processing["state"] = "complete"
+            processing["completed_at"] = datetime.utcnow().isoformat()
+        self.processed += 1
+        return True
+
+    def _log_update(self, record: Dict, fields: Dict):
+        try:
+            self.log.append_update(record["feedback_id"], {**fields, "processing": record["processing"]})
+        except Exception as e:
+            logger.error(f"❌ Error logging pipeline progress for {record.get('feedback_id')}: {e}")
+
+    async def stop(self):
+        """Cancel the workers; unfinished records are resumed from the log on the next start"""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        if workers and self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.pending_count,
+            "processed": self.processed,
+            "failed": self.failed,
+            "workers": sum(1 for worker in self._workers if not worker.done())
+        }
@@ -0,0 +1,145 @@
+import base64
+import bisect
+import itertools
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.analytics_store import parse_feedback_timestamp
+from app.services.feedback_fields import stored_sentiment
+
+# (feedback_id, insertion sequence): the sequence keeps legacy records that share an ID apart
+Key = Tuple[str, int]
+
+
+def encode_cursor(key: Key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Key:
+    """Inverse of ``encode_cursor``; raises ValueError for anything it did not produce"""
+    try:
+        feedback_id, sequence = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(feedback_id), int(sequence)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _id_bound(moment: datetime) -> str:
+    """Smallest ID issued within ``moment``'s second (feedback IDs start with the UTC time)"""
+    return f"FB_{moment.strftime('%Y%m%d_%H%M%S')}"
+
+
+class FeedbackQueryIndex:
+    """
+    Feedback records ordered by feedback_id, with posting lists for guest
+    and category.
+
+    Generated IDs sort by submission time, so newest-first pagination is a
+    walk backwards from the cursor's position and a date window narrows to
+    an ID range by bisection. A query scans the smallest posting list that
+    its filters allow. It stops after ``limit`` matches or after
+    ``max_scan`` records, whichever comes first, and the returned cursor
+    resumes exactly where the scan stopped. The work per request is
+    therefore bounded by the page, not by the length of the history.
+    """
+
+    INDEXED_FIELDS = ("guest_id", "category")
+
+    def __init__(self, max_scan: int = 5000):
+        self.max_scan = max(1, max_scan)
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._keys: List[Key] = []
+        self._records: Dict[Key, Dict] = {}
+        self._postings: Dict[Tuple[str, str], List[Key]] = {}
+
+    def add(self, record: Dict):
+        with self._lock:
+            self._add_locked(record)
+
+    def _add_locked(self, record: Dict):
+        key = (record.get("feedback_id") or "", next(self._sequence))
+        self._records[key] = record
+        bisect.insort(self._keys, key)
+        for field in self.INDEXED_FIELDS:
+            bisect.insort(self._postings.setdefault((field, record.get(field)), []), key)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def query(
+        self,
+        guest_id: Optional[str] = None,
+        category: Optional[str] = None,
+        min_rating: Optional[int] = None,
+        max_rating: Optional[int] = None,
+        sentiment: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Dict:
+        """One newest-first page of matching feedback and the cursor for the next page (None at the end)"""
+        after = decode_cursor(cursor) if cursor else None
+        indexed = {"guest_id": guest_id, "category": category}
+
+        with self._lock:
+            keys = self._keys
+            for field, value in indexed.items():
+                if value is not None:
+                    postings = self._postings.get((field, value), [])
+                    if len(postings) < len(keys):
+                        keys = postings
+
+            low = bisect.bisect_left(keys, (_id_bound(since),)) if since else 0
+            high = len(keys)
+            if until:
+                high = bisect.bisect_right(keys, (_id_bound(until) + "\uffff",))
+            if after:
+                high = min(high, bisect.bisect_left(keys, after))
+
+            items = []
+            position = high
+            scanned = 0
+            while position > low and len(items) < limit and scanned < self.max_scan:
+                position -= 1
+                scanned += 1
+                record = self._records[keys[position]]
+                if self._matches(record, indexed, min_rating, max_rating, sentiment, since, until):
+                    items.append(self._project(record, fields))
+
+            next_cursor = encode_cursor(keys[position]) if position > low else None
+
+        return {"items": items, "next_cursor": next_cursor, "scanned": scanned}
+
+    @staticmethod
+    def _matches(record: Dict, indexed: Dict, min_rating, max_rating, sentiment, since, until) -> bool:
+        for field, value in indexed.items():
+            if value is not None and record.get(field) != value:
+                return False
+        rating = record.get("rating")
+        if min_rating is not None and (rating is None or rating < min_rating):
+            return False
+        if max_rating is not None and (rating is None or rating > max_rating):
+            return False
+        if sentiment is not None and (stored_sentiment(record) or {}).get("sentiment") != sentiment:
+            return False
+        if since or until:
+            # The ID range is only accurate to the second; the timestamp decides at the edges
+            submitted_at = parse_feedback_timestamp(record)
+            if submitted_at is None:
+                return False
+            if (since and submitted_at < since) or (until and submitted_at > until):
+                return False
+        return True
+
+    @staticmethod
+    def _project(record: Dict, fields: Optional[Sequence[str]]) -> Dict:
+        if not fields:
+            return dict(record)
+        projected = {"feedback_id": record.get("feedback_id")}
+        projected.update({field: record[field] for field in fields if field in record})
+        return projected
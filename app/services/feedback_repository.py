@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.services.feedback_index import GuestFeedbackIndex
+from app.services.feedback_log import UPDATE_OP, FeedbackLog, feedback_log
+from app.services.feedback_query import FeedbackQueryIndex
+from app.services.id_generator import IdGenerator, id_generator
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality string fields shared by many records
+INTERNED_FIELDS = ("guest_id", "guest_name", "guest_username", "category", "location", "staff_member", "status")
+
+
+def _intern_keys(data: Dict) -> Dict:
+    return {sys.intern(key): value for key, value in data.items()}
+
+
+def compact_record(record: Dict) -> Dict:
+    """
+    Return an equivalent record that takes less memory: dict keys and
+    repeated values (guest, category, labels, ...) are interned, and the
+    comment copy inside ``sentiment_analysis`` shares the comment string.
+    """
+    record = _intern_keys(record)
+    for field in INTERNED_FIELDS:
+        if isinstance(record.get(field), str):
+            record[field] = sys.intern(record[field])
+
+    analysis = record.get("sentiment_analysis")
+    if isinstance(analysis, dict):
+        analysis = _intern_keys(analysis)
+        for field in ("sentiment", "model"):
+            if isinstance(analysis.get(field), str):
+                analysis[field] = sys.intern(analysis[field])
+        if isinstance(analysis.get("scores"), dict):
+            analysis["scores"] = _intern_keys(analysis["scores"])
+        if analysis.get("text") == record.get("comment"):
+            analysis["text"] = record.get("comment")
+        record["sentiment_analysis"] = analysis
+
+    processing = record.get("processing")
+    if isinstance(processing, dict):
+        if isinstance(processing.get("state"), str):
+            processing["state"] = sys.intern(processing["state"])
+        for status in processing.get("stages", {}).values():
+            if isinstance(status.get("status"), str):
+                status["status"] = sys.intern(status["status"])
+    return record
+
+
+class FeedbackRepository:
+    """
+    The one in-memory view of submitted feedback.
+
+    Streamed once from the feedback log (snapshot plus segments) and kept
+    current by ``add``. The feedback API, the analytics rebuild and the CRM
+    all read from this view, so they agree and the files are read only
+    once. Records are held in compact form, with ID, guest and query indexes
+    kept alongside them.
+    """
+
+    def __init__(self, log: FeedbackLog, query_max_scan: int = 5000, ids: IdGenerator = id_generator):
+        self.log = log
+        self._ids = ids
+        self._lock = threading.RLock()
+        self._records: List[Dict] = []
+        self._by_id: Dict[str, Dict] = {}
+        self._by_guest = GuestFeedbackIndex()
+        self._query_index = FeedbackQueryIndex(max_scan=query_max_scan)
+        self.loaded = False
+
+    def ensure_loaded(self):
+        """Load the stored feedback the first time any reader needs it (blocks; see ``wait_loaded``)"""
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            started = time.monotonic()
+            # Updates read before their record, which another writer process logged in a later segment
+            early: Dict[str, Dict] = {}
+            # Streamed one entry at a time, so only the compact records stay in memory
+            for entry in self.log.iter_entries():
+                if entry.get("_op") == UPDATE_OP:
+                    target = self._by_id.get(entry.get("feedback_id"))
+                    if target is not None:
+                        target.update(entry.get("fields", {}))
+                    else:
+                        early.setdefault(entry.get("feedback_id"), {}).update(entry.get("fields", {}))
+                else:
+                    entry.update(early.pop(entry.get("feedback_id"), {}))
+                    self._add_locked(compact_record(entry))
+                    # Keep IDs monotonic across restarts, even if the clock was set back
+                    self._ids.observe(entry.get("feedback_id", ""))
+            self.loaded = True
+            logger.info(f"📚 Loaded {len(self._records)} feedback records in {time.monotonic() - started:.2f}s")
+
+    async def wait_loaded(self):
+        """
+        ``ensure_loaded`` for async callers: the load (or the wait for one
+        already running at startup) happens on a worker thread, so the
+        event loop keeps serving other requests meanwhile.
+        """
+        if not self.loaded:
+            await asyncio.get_running_loop().run_in_executor(None, self.ensure_loaded)
+
+    def add(self, record: Dict) -> Dict:
+        """
+        Add a newly submitted (already logged) record and return the instance
+        to use from now on. If the initial load happened to pick the record up
+        from the log, the loaded copy stays the canonical one.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            existing = self._by_id.get(record.get("feedback_id"))
+            if existing is not None:
+                existing.update(record)
+                return existing
+            self._add_locked(record)
+            return record
+
+    def _add_locked(self, record: Dict):
+        self._records.append(record)
+        if record.get("feedback_id"):
+            self._by_id[record["feedback_id"]] = record
+        self._by_guest.add(record.get("guest_id"), record.get("submitted_at", ""), record)
+        self._query_index.add(record)
+
+    def get(self, feedback_id: str) -> Optional[Dict]:
+        self.ensure_loaded()
+        return self._by_id.get(feedback_id)
+
+    def for_guest(self, guest_id: str, newest_first: bool = False) -> List[Dict]:
+        self.ensure_loaded()
+        with self._lock:
+            return self._by_guest.get(guest_id, newest_first=newest_first)
+
+    def all(self) -> List[Dict]:
+        """Every record, in submission order"""
+        self.ensure_loaded()
+        with self._lock:
+            return list(self._records)
+
+    def query(self, **filters) -> Dict:
+        """A page of matching records; see ``FeedbackQueryIndex.query``"""
+        self.ensure_loaded()
+        return self._query_index.query(**filters)
+
+    def __len__(self) -> int:
+        self.ensure_loaded()
+        return len(self._records)
+
+
+# Global instance
+feedback_repository = FeedbackRepository(
+    feedback_log,
+    query_max_scan=int(os.getenv("FEEDBACK_QUERY_MAX_SCAN", "5000"))
+)
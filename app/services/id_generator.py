@@ -0,0 +1,123 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import IO, Callable, Optional, Tuple
+
+from app.services.file_lock import try_lock
+
+# PREFIX_YYYYmmdd_HHMMSSmmm_WWWSSSS: UTC time to the millisecond, worker, per-millisecond sequence
+ID_PATTERN = re.compile(r"^(?P<prefix>[A-Z]+)_(?P<date>\d{8})_(?P<time>\d{9})_(?P<worker>\d{3})(?P<seq>\d{4})$")
+MAX_WORKER_ID = 999
+MAX_SEQUENCE = 9999
+DEFAULT_LOCK_DIR = os.path.join(os.path.dirname(__file__), "../data/id_workers")
+
+
+def _format_ms(ms: int) -> str:
+    moment = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    return f"{moment.strftime('%Y%m%d_%H%M%S')}{ms % 1000:03d}"
+
+
+def _parse_ms(date: str, hms_ms: str) -> int:
+    moment = datetime.strptime(date + hms_ms[:6], "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc)
+    return int(moment.timestamp()) * 1000 + int(hms_ms[6:])
+
+
+def parse_id(value: str) -> Optional[dict]:
+    """Split a generated ID into prefix, epoch milliseconds, worker and sequence; None if not one"""
+    match = ID_PATTERN.match(value or "")
+    if not match:
+        return None
+    ms = _parse_ms(match.group("date"), match.group("time"))
+    return {
+        "prefix": match.group("prefix"),
+        "ms": ms,
+        "worker": int(match.group("worker")),
+        "sequence": int(match.group("seq"))
+    }
+
+
+def claim_worker_id(lock_dir: str) -> Tuple[int, IO]:
+    """
+    Lock the first free worker number in ``lock_dir``, starting from one
+    derived from the PID. The number stays claimed while the returned lock
+    file is open, so processes sharing the directory never get the same one.
+    """
+    start = os.getpid() % (MAX_WORKER_ID + 1)
+    for offset in range(MAX_WORKER_ID + 1):
+        worker_id = (start + offset) % (MAX_WORKER_ID + 1)
+        lock_file = try_lock(os.path.join(lock_dir, f"worker-{worker_id:03d}.lock"))
+        if lock_file is not None:
+            return worker_id, lock_file
+    raise RuntimeError(f"All {MAX_WORKER_ID + 1} ID worker numbers in {lock_dir} are taken; set ID_WORKER_ID")
+
+
+class IdGenerator:
+    """
+    Snowflake-style IDs for feedback, alerts and CRM records.
+
+    An ID is the UTC time to the millisecond, this process's worker number
+    and a sequence within the millisecond, e.g.
+    ``FB_20240115_093012345_0070003``. IDs from one generator are strictly
+    increasing in string order, even if the clock steps backwards or a
+    millisecond's sequence runs out. In both cases the generator keeps
+    counting on its last millisecond. IDs from different workers never
+    collide, and sorting them orders them by time. Because of that
+    ordering, the IDs can be used directly as range-scan keys and
+    pagination cursors.
+
+    Without an explicit ``worker_id`` the generator claims a free worker
+    number under ``lock_dir``. An explicit ID must be unique across every
+    process issuing IDs into the same data.
+    """
+
+    def __init__(self, worker_id: Optional[int] = None, clock: Callable[[], float] = time.time,
+                 lock_dir: str = DEFAULT_LOCK_DIR):
+        self._worker_lock = None
+        if worker_id is None:
+            worker_id, self._worker_lock = claim_worker_id(lock_dir)
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def new_id(self, prefix: str) -> str:
+        with self._lock:
+            ms = max(int(self.clock() * 1000), self._last_ms)
+            if ms == self._last_ms:
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    ms += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = ms
+            sequence = self._sequence
+        return f"{prefix}_{_format_ms(ms)}_{self.worker_id:03d}{sequence:04d}"
+
+    def observe(self, existing_id: str):
+        """Make sure IDs issued from now on sort after an ID issued earlier (e.g. before a restart)"""
+        parsed = parse_id(existing_id)
+        if not parsed:
+            return
+        with self._lock:
+            if parsed["ms"] >= self._last_ms:
+                # Move past that millisecond entirely: another worker may own higher suffixes in it
+                self._last_ms = parsed["ms"]
+                self._sequence = MAX_SEQUENCE
+
+
+def _worker_id_from_env() -> Optional[int]:
+    value = os.getenv("ID_WORKER_ID")
+    return int(value) if value else None
+
+
+# Global instance
+id_generator = IdGenerator(
+    worker_id=_worker_id_from_env(),
+    lock_dir=os.getenv("ID_WORKER_LOCK_DIR", DEFAULT_LOCK_DIR)
+)
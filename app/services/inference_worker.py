@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None):
+    """Complete a future on its own event loop, ignoring callers that gave up"""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class MicroBatchWorker:
+    """
+    Runs a blocking batch function on a dedicated thread.
+
+    Concurrent submissions are gathered into micro-batches of up to
+    ``max_batch_size`` texts, waiting at most ``max_wait_ms`` for more work
+    to arrive, so the event loop never blocks on model inference.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[str]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5,
+        name: str = "inference-worker",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the worker thread if it is not already running"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            logger.info(
+                f"🧵 {self.name} started (max_batch_size={self.max_batch_size}, "
+                f"max_wait_ms={self.max_wait * 1000:.0f})"
+            )
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the worker after the queued work has been processed"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    async def submit(self, texts: List[str]) -> List[Any]:
+        """Queue texts for inference and wait for their results, in input order"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((texts, loop, future))
+        return await future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            size = len(item[0])
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch: List):
+        texts = [text for item in batch for text in item[0]]
+        try:
+            results = self.batch_fn(texts)
+            error = None
+        except Exception as e:
+            logger.error(f"❌ {self.name} batch of {len(texts)} failed: {e}")
+            results, error = None, e
+
+        offset = 0
+        for item_texts, loop, future in batch:
+            chunk = results[offset:offset + len(item_texts)] if error is None else None
+            offset += len(item_texts)
+            try:
+                loop.call_soon_threadsafe(_resolve, future, chunk, error)
+            except RuntimeError:
+                # The caller's event loop has already shut down
+                continue
@@ -0,0 +1,124 @@
+import json
+from typing import Any, Iterator, Optional, TextIO
+
+CHUNK_SIZE = 64 * 1024
+# A single record larger than this is treated as a corrupt file rather than buffered further
+MAX_RECORD_SIZE = 64 * 1024 * 1024
+_WHITESPACE = " \t\r\n"
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """A text buffer over a file that is refilled in chunks and trimmed as values are consumed"""
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read another chunk; False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the buffer only holds the value being parsed
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file) without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value, reading more of the file until it is complete"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if len(self.buffer) - self.pos <= MAX_RECORD_SIZE and self.fill():
+                    continue
+                raise
+            # A number (or literal) cut off at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_array(reader: _Reader) -> Iterator[Any]:
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("]")
+        return
+
+
+def _iter_member(reader: _Reader, key: str) -> Iterator[Any]:
+    """Stream the array stored under ``key`` in an object, skipping its other members"""
+    reader.expect("{")
+    while reader.peek() != "}":
+        name = reader.value()
+        reader.expect(":")
+        if name == key and reader.peek() == "[":
+            yield from _iter_array(reader)
+        else:
+            reader.value()
+        if reader.peek() != ",":
+            break
+        reader.pos += 1
+    reader.expect("}")
+
+
+def iter_json_records(f: TextIO, key: Optional[str] = None, lines: bool = False,
+                      chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the records of a JSON document one at a time, so memory is bounded
+    by the largest record rather than by the file.
+
+    Understands a top-level array (``[{...}, ...]``), an object holding the
+    records in an array under ``key`` (``{"guests": [...]}``, other members
+    are skipped) and, with ``lines``, JSON Lines.
+    """
+    reader = _Reader(f, chunk_size)
+    if lines:
+        while reader.peek():
+            yield reader.value()
+        return
+
+    first = reader.peek()
+    if first == "[":
+        yield from _iter_array(reader)
+    elif first == "{" and key is not None:
+        yield from _iter_member(reader, key)
+    elif first:
+        raise ValueError(f"Expected a JSON array{' or object' if key else ''} but found {first!r}")
+
+
+def load_json_records(path: str, key: Optional[str] = None) -> Iterator[Any]:
+    """``iter_json_records`` over a file; ``.jsonl`` files are read as JSON Lines"""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_json_records(f, key, lines=path.endswith(".jsonl"))
@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+POSITIVE_KEYWORDS = (
+    "excellent", "amazing", "wonderful", "great", "fantastic", "love", "perfect",
+    "outstanding", "exceptional", "brilliant", "superb", "awesome", "incredible",
+    "good", "nice", "happy", "satisfied", "pleased", "comfortable", "clean",
+    "friendly", "helpful", "professional", "recommend", "beautiful", "relaxing"
+)
+NEGATIVE_KEYWORDS = (
+    "terrible", "awful", "horrible", "hate", "worst", "disappointing", "bad",
+    "poor", "unacceptable", "disgusting", "rude", "slow", "dirty", "broken",
+    "uncomfortable", "noisy", "expensive", "crowded", "unfriendly", "unhelpful",
+    "unprofessional", "outdated", "smelly", "cold", "hot", "boring"
+)
+NEGATIONS = frozenset((
+    "not", "no", "never", "nothing", "nobody", "none", "neither", "nor",
+    "hardly", "barely", "without", "cannot"
+))
+
+# Words (with an optional contraction such as "wasn't") and the punctuation
+# that ends a negation's scope
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?|[.!?;,]")
+_CLAUSE_BREAK = frozenset(".!?;,")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall((text or "").lower().replace("’", "'"))
+
+
+def load_lexicon(path: str) -> Dict[str, float]:
+    """
+    Read a lexicon file: {"positive": {word: weight}, "negative": {word: weight}}.
+    Returns signed weights (negative words are stored below zero).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    lexicon = {word.lower(): abs(float(weight)) for word, weight in document.get("positive", {}).items()}
+    lexicon.update({word.lower(): -abs(float(weight)) for word, weight in document.get("negative", {}).items()})
+    return lexicon
+
+
+class KeywordSentimentEngine:
+    """
+    Lexicon-based sentiment used when the model is unavailable.
+
+    Text is tokenized once and each token is looked up in a dict of signed
+    weights, so "hot" no longer matches inside "photo". A negation word
+    ("not", "never", "wasn't", ...) flips the polarity of the next
+    ``negation_window`` tokens, up to the end of the clause. Plural forms
+    fall back to their singular entry.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None, negation_window: int = 3):
+        if lexicon is None:
+            lexicon = {word: 1.0 for word in POSITIVE_KEYWORDS}
+            lexicon.update({word: -1.0 for word in NEGATIVE_KEYWORDS})
+        self.lexicon = lexicon
+        self.negation_window = negation_window
+
+    @classmethod
+    def from_env(cls) -> "KeywordSentimentEngine":
+        """Default lexicon, with SENTIMENT_LEXICON_PATH entries added or overriding it"""
+        engine = cls()
+        path = os.getenv("SENTIMENT_LEXICON_PATH")
+        if path:
+            try:
+                engine.lexicon.update(load_lexicon(path))
+                logger.info(f"📚 Loaded sentiment lexicon from {path}")
+            except (OSError, ValueError) as e:
+                logger.error(f"❌ Error loading sentiment lexicon {path}: {e}")
+        return engine
+
+    def _weight(self, token: str) -> float:
+        weight = self.lexicon.get(token)
+        if weight is None and len(token) > 3 and token.endswith("s"):
+            weight = self.lexicon.get(token[:-1])
+        return weight or 0.0
+
+    def score(self, text: str) -> Tuple[float, float]:
+        """Weighted positive and negative evidence in a text"""
+        positive = negative = 0.0
+        negated_for = 0
+        for token in tokenize(text):
+            if token in _CLAUSE_BREAK:
+                negated_for = 0
+                continue
+            if token in NEGATIONS or token.endswith("n't"):
+                negated_for = self.negation_window
+                continue
+
+            weight = self._weight(token)
+            if negated_for:
+                negated_for -= 1
+                weight = -weight
+            if weight > 0:
+                positive += weight
+            elif weight < 0:
+                negative -= weight
+        return positive, negative
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """(sentiment, confidence) for one text"""
+        positive, negative = self.score(text)
+        if positive > negative:
+            return "positive", min(0.9, 0.6 + (positive * 0.1))
+        if negative > positive:
+            return "negative", min(0.9, 0.6 + (negative * 0.1))
+        return "neutral", 0.5
+
+    def analyze_batch(self, texts: Iterable[str], model: str = "fallback-keyword-based") -> List[Dict]:
+        """Analysis result dicts, in the services' result shape, for a batch of texts"""
+        timestamp = datetime.utcnow().isoformat()
+        results = []
+        for text in texts:
+            sentiment, confidence = self.classify(text)
+            results.append({
+                "text": text,
+                "sentiment": sentiment,
+                "confidence": confidence,
+                "scores": {
+                    "positive": confidence if sentiment == "positive" else 1 - confidence,
+                    "negative": confidence if sentiment == "negative" else 1 - confidence
+                },
+                "timestamp": timestamp,
+                "is_negative": sentiment == "negative" and confidence > 0.7,
+                "model": model
+            })
+        return results
+
+    def analyze(self, text: str, model: str = "fallback-keyword-based") -> Dict:
+        return self.analyze_batch([text], model=model)[0]
+
+
+# Shared by the full and the lightweight deployment sentiment services
+keyword_engine = KeywordSentimentEngine.from_env()
@@ -0,0 +1,220 @@
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class SlackDispatcher:
+    """
+    Background delivery of Slack webhook alerts.
+
+    ``enqueue`` never blocks on the network: attachments are appended to a
+    JSON Lines queue file and handed to a dispatcher thread, which waits
+    ``coalesce_window_ms`` to gather bursts into a single digest message and
+    posts it over a pooled ``requests.Session``. Failed deliveries are
+    retried with exponential backoff and jitter; messages that still fail
+    after ``max_attempts`` (or are rejected outright with a 4xx) are moved
+    to the dead-letter file. Undelivered attachments survive restarts.
+    """
+
+    def __init__(
+        self,
+        webhook_url: Optional[str],
+        queue_path: Optional[str] = None,
+        dead_letter_path: Optional[str] = None,
+        coalesce_window_ms: float = 2000,
+        max_digest_size: int = 20,
+        max_attempts: int = 5,
+        base_backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        timeout_seconds: float = 10.0,
+    ):
+        self.webhook_url = webhook_url
+        self.queue_path = queue_path
+        self.dead_letter_path = dead_letter_path
+        self.coalesce_window = coalesce_window_ms / 1000.0
+        self.max_digest_size = max_digest_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff_seconds
+        self.max_backoff = max_backoff_seconds
+        self.timeout = timeout_seconds
+
+        self.session = requests.Session()
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Deque[Dict] = deque()
+        self._ids = itertools.count(1)
+        self.delivered = 0
+        self.dead_lettered = 0
+
+        if queue_path:
+            self._load_queue()
+
+    # Producer side
+    def enqueue(self, attachment: Dict):
+        """Queue one Slack attachment for delivery"""
+        if not self.webhook_url:
+            logger.warning("⚠️ Slack webhook URL not configured")
+            return
+        entry = {"id": next(self._ids), "attachment": attachment, "enqueued_at": datetime.utcnow().isoformat()}
+        with self._cond:
+            self._pending.append(entry)
+            self._append_to_queue_file(entry)
+            self._cond.notify()
+        self.start()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="slack-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the dispatcher; anything undelivered stays in the queue file for the next start"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self.session.close()
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "delivered": self.delivered,
+            "dead_lettered": self.dead_lettered
+        }
+
+    # Dispatcher thread
+    def _run(self):
+        while not self._stop_event.is_set():
+            with self._cond:
+                while not self._pending and not self._stop_event.is_set():
+                    self._cond.wait()
+            # Let a burst accumulate so it goes out as one digest
+            if self._stop_event.wait(self.coalesce_window):
+                return
+
+            with self._cond:
+                batch = list(itertools.islice(self._pending, self.max_digest_size))
+            if not batch:
+                continue
+            if self._deliver(batch):
+                with self._cond:
+                    for _ in batch:
+                        self._pending.popleft()
+                    self._rewrite_queue_file()
+
+    def _deliver(self, batch: List[Dict]) -> bool:
+        """Post one digest, retrying with backoff; False only when interrupted by stop()"""
+        message = self._build_message([entry["attachment"] for entry in batch])
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            delay = None
+            try:
+                response = self.session.post(self.webhook_url, json=message, timeout=self.timeout)
+                if 200 <= response.status_code < 300:
+                    self.delivered += len(batch)
+                    logger.info(f"✅ Slack alert sent for {len(batch)} feedback item(s)")
+                    return True
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code == 429:
+                    retry_after = response.headers.get("Retry-After", "")
+                    delay = float(retry_after) if retry_after.isdigit() else None
+                elif 400 <= response.status_code < 500:
+                    # The webhook rejected the payload; retrying will not help
+                    break
+            except requests.RequestException as e:
+                error = str(e)
+
+            if attempt == self.max_attempts:
+                break
+            if delay is None:
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+            logger.warning(f"⚠️ Slack delivery attempt {attempt} failed ({error}); retrying in {delay:.1f}s")
+            if self._stop_event.wait(delay):
+                return False
+
+        logger.error(f"❌ Slack delivery failed after retries, dead-lettering {len(batch)} item(s): {error}")
+        self._dead_letter(batch, error)
+        return True
+
+    @staticmethod
+    def _build_message(attachments: List[Dict]) -> Dict:
+        if len(attachments) == 1:
+            return {"text": "🚨 Negative Guest Feedback Alert", "attachments": attachments}
+        return {"text": f"🚨 {len(attachments)} Negative Guest Feedback Alerts", "attachments": attachments}
+
+    # Persistence
+    def _load_queue(self):
+        if not os.path.exists(self.queue_path):
+            return
+        last_id = 0
+        try:
+            with open(self.queue_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._pending.append(entry)
+                    last_id = max(last_id, entry.get("id", 0))
+        except OSError as e:
+            logger.error(f"❌ Error loading Slack queue: {e}")
+            return
+        self._ids = itertools.count(last_id + 1)
+        if self._pending and self.webhook_url:
+            logger.info(f"📨 Resuming delivery of {len(self._pending)} queued Slack alerts")
+            self.start()
+
+    def _append_to_queue_file(self, entry: Dict):
+        if not self.queue_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.queue_path)), exist_ok=True)
+            with open(self.queue_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+        except OSError as e:
+            logger.error(f"❌ Error persisting Slack alert: {e}")
+
+    def _rewrite_queue_file(self):
+        """Replace the queue file with the still-pending entries"""
+        if not self.queue_path:
+            return
+        try:
+            if not self._pending:
+                open(self.queue_path, "w").close()
+                return
+            tmp = self.queue_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for entry in self._pending:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            os.replace(tmp, self.queue_path)
+        except OSError as e:
+            logger.error(f"❌ Error rewriting Slack queue: {e}")
+
+    def _dead_letter(self, batch: List[Dict], error: Optional[str]):
+        self.dead_lettered += len(batch)
+        if not self.dead_letter_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_path)), exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for entry in batch:
+                    record = dict(entry, error=error, failed_at=datetime.utcnow().isoformat())
+                    f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            logger.error(f"❌ Error writing Slack dead-letter file: {e}")
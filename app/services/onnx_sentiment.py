@@ -0,0 +1,119 @@
+import inspect
+import json
+import logging
+import os
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+LABELS_FILE = "labels.json"
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def export_quantized_model(model_name: str, export_dir: str) -> str:
+    """
+    Export a Hugging Face sequence-classification model to ONNX and apply
+    int8 dynamic quantization. Returns the path of the quantized model.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(export_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = os.path.join(export_dir, "model.onnx")
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # Newer torch defaults to the dynamo exporter; the TorchScript one needs no extra packages
+        export_kwargs["dynamo"] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"}
+            },
+            opset_version=14,
+            **export_kwargs
+        )
+
+    quantized_path = os.path.join(export_dir, QUANTIZED_MODEL_FILE)
+    quantize_dynamic(fp32_path, quantized_path, weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+
+    tokenizer.save_pretrained(export_dir)
+    with open(os.path.join(export_dir, LABELS_FILE), "w", encoding="utf-8") as f:
+        json.dump({str(k): v for k, v in model.config.id2label.items()}, f)
+    logger.info(f"📦 Exported int8 ONNX model for {model_name} to {quantized_path}")
+    return quantized_path
+
+
+class OnnxSentimentEngine:
+    """
+    CPU sentiment inference with ONNX Runtime on an int8-quantized export of
+    the model.
+
+    The export is created on first use and reused from ``export_dir``
+    afterwards. Calling the engine mirrors the transformers pipeline with
+    ``return_all_scores=True``: one list of {"label", "score"} dicts per
+    text, so it is a drop-in ``sentiment_analyzer``.
+    """
+
+    def __init__(self, model_name: str, export_dir: str, num_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = os.path.join(export_dir, QUANTIZED_MODEL_FILE)
+        if not os.path.exists(model_path):
+            export_quantized_model(model_name, export_dir)
+
+        self.model_name = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        with open(os.path.join(export_dir, LABELS_FILE), "r", encoding="utf-8") as f:
+            labels = json.load(f)
+        self.labels = [labels[str(i)] for i in range(len(labels))]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, texts: List[str], truncation: bool = True, padding: bool = True,
+                 batch_size: int = 16) -> List[List[Dict]]:
+        if isinstance(texts, str):
+            texts = [texts]
+        results = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + batch_size],
+                truncation=truncation,
+                padding=padding,
+                return_tensors="np"
+            )
+            logits = self.session.run(["logits"], {
+                "input_ids": encoded["input_ids"].astype(np.int64),
+                "attention_mask": encoded["attention_mask"].astype(np.int64)
+            })[0]
+            for row in _softmax(logits):
+                results.append([
+                    {"label": label, "score": float(score)} for label, score in zip(self.labels, row)
+                ])
+        return results
@@ -0,0 +1,115 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Attributes each category is indexed on (the ones recommendation scoring rewards)
+CATEGORY_FACETS = {
+    "dining": ("cuisine", "price_tier"),
+    "amenities": ("price_tier",),
+    "activities": ("activity_level", "price_tier"),
+}
+
+
+class CatalogSnapshot:
+    """
+    One immutable, fully indexed version of the recommendation catalog.
+
+    For every combination of a category's facets (none, each one alone,
+    all together) items are bucketed by their facet values, and each bucket
+    is pre-sorted by rating. Because scoring only adds bonuses for matching
+    facets, the best ``k`` items always lie within the first ``k`` of the
+    buckets a guest's preferences select, so candidate generation is
+    independent of catalog size.
+    """
+
+    def __init__(self, document: Dict, version: str):
+        self.version = version
+        self.room_services: List[Dict] = document.get("room_services", [])
+        self.items: Dict[str, List[Dict]] = {}
+        self._indexes: Dict[str, Dict[Tuple[str, ...], Dict[Tuple, List[Tuple[int, Dict]]]]] = {}
+
+        for category, facets in CATEGORY_FACETS.items():
+            items = document.get(category, [])
+            self.items[category] = items
+            indexes = {}
+            for size in range(len(facets) + 1):
+                for subset in itertools.combinations(facets, size):
+                    buckets: Dict[Tuple, List[Tuple[int, Dict]]] = {}
+                    for position, item in enumerate(items):
+                        key = tuple(item.get(facet) for facet in subset)
+                        buckets.setdefault(key, []).append((position, item))
+                    for bucket in buckets.values():
+                        bucket.sort(key=lambda entry: (-entry[1].get("rating", 0), entry[0]))
+                    indexes[subset] = buckets
+            self._indexes[category] = indexes
+
+    def candidates(self, category: str, wanted: Dict[str, str], per_bucket: int) -> Iterable[Tuple[int, Dict]]:
+        """(catalog position, item) pairs that can make a top-``per_bucket`` list for these preferences"""
+        found: Dict[int, Dict] = {}
+        for subset, buckets in self._indexes[category].items():
+            bucket = buckets.get(tuple(wanted.get(facet) for facet in subset), ())
+            for position, item in bucket[:per_bucket]:
+                found[position] = item
+        return found.items()
+
+
+class RecommendationCatalog:
+    """
+    The recommendation catalog loaded from a JSON data file.
+
+    The file is re-checked at most every ``check_interval`` seconds and
+    reloaded when its modification time changes, so catalog edits go live
+    without a restart. A file that fails to load leaves the previous
+    snapshot in service.
+    """
+
+    def __init__(self, path: str, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self._next_check = 0.0
+        self._snapshot = CatalogSnapshot({}, "empty")
+        self._reload_if_changed()
+
+    def current(self) -> CatalogSnapshot:
+        """The live snapshot, reloading first if the file changed"""
+        if time.monotonic() >= self._next_check:
+            self._reload_if_changed()
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self.current().version
+
+    def _reload_if_changed(self):
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+            except OSError:
+                if self._mtime_ns is None:
+                    logger.warning(f"Recommendation catalog not found at {self.path}")
+                return
+            if mtime_ns == self._mtime_ns:
+                return
+
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    document = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"❌ Error loading recommendation catalog, keeping previous version: {e}")
+                return
+
+            # The file's mtime is part of the version so edits that forget to bump it still count
+            version = f"{document.get('version', '0')}@{mtime_ns}"
+            self._snapshot = CatalogSnapshot(document, version)
+            self._mtime_ns = mtime_ns
+            counts = {category: len(items) for category, items in self._snapshot.items.items()}
+            logger.info(f"📖 Loaded recommendation catalog {version}: {counts}")
@@ -1,46 +1,79 @@
-import json
+import asyncio
+import heapq
 import logging
+import os
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import random
 from app.services.sentiment_service import sentiment_service
+from app.services.crm_storage import CRMStorage, create_crm_storage
+from app.services.feedback_fields import feedback_text, stored_sentiment
+from app.services.feedback_index import GuestFeedbackIndex
+from app.services.recommendation_catalog import RecommendationCatalog
+from app.services.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
 class RecommendationService:
-    def __init__(self):
+    def __init__(self, storage: Optional[CRMStorage] = None):
+        # CRM guests and feedback, read and (for backfilled sentiment) written through the CRM storage backend
+        self.storage = storage or create_crm_storage()
         self.guests_data = self._load_guests_data()
         self.feedback_data = self._load_feedback_data()
-        self.recommendations_cache = {}
+        # Full recommendation sets keyed by (guest_id, catalog version); catalog edits miss naturally
+        self.recommendations_cache = LRUCache(
+            max_entries=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1000")),
+            ttl_seconds=float(os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", "300"))
+        )
+        # Venues, amenities and activities come from a versioned data file that hot-reloads
+        self.catalog = RecommendationCatalog(
+            os.getenv("RECOMMENDATION_CATALOG_PATH", "app/data/recommendation_catalog.json"),
+            check_interval=float(os.getenv("RECOMMENDATION_CATALOG_CHECK_SECONDS", "2"))
+        )
+        self._build_indexes()
+    
+    def _build_indexes(self):
+        """Index guests by ID and feedback by guest_id so lookups don't scan the datasets"""
+        self._guests_by_id = {guest.get("guest_id"): guest for guest in self.guests_data}
+        self._feedback_by_guest = GuestFeedbackIndex()
+        for feedback in self.feedback_data:
+            self._feedback_by_guest.add(
+                feedback.get("guest_id"),
+                feedback.get("timestamp") or feedback.get("submitted_at", ""),
+                feedback
+            )
     
     def _load_guests_data(self) -> List[Dict]:
-        """Load guests data from JSON file"""
-        try:
-            with open('app/data/comprehensive_guests_data.json', 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            logger.warning("Guests data file not found, using empty data")
+        """Load guests data from the CRM storage"""
+        guests = self.storage.load_guests()
+        if guests is None:
+            logger.warning("Guests data not found, using empty data")
             return []
+        return list(guests.values())
     
     def _load_feedback_data(self) -> List[Dict]:
-        """Load feedback data from JSON file"""
-        try:
-            with open('app/data/comprehensive_feedback_data.json', 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            logger.warning("Feedback data file not found, using empty data")
+        """Load feedback data from the CRM storage"""
+        feedback = self.storage.load_feedback()
+        if feedback is None:
+            logger.warning("Feedback data not found, using empty data")
             return []
+        return list(feedback.values())
     
     async def get_personalized_recommendations(self, guest_id: str) -> Dict:
         """Generate personalized recommendations for a guest"""
         try:
+            cache_key = (guest_id, self.catalog.version)
+            cached = self.recommendations_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
             # Find guest data
             guest = self._find_guest(guest_id)
             if not guest:
                 return self._get_default_recommendations()
             
             # Analyze guest preferences and feedback
-            preferences = await self._analyze_guest_preferences(guest)
+            preferences = self._analyze_guest_preferences(guest)
             
             # Generate recommendations based on preferences
             recommendations = {
@@ -55,7 +88,7 @@ class RecommendationService:
             }
             
             # Cache recommendations
-            self.recommendations_cache[guest_id] = recommendations
+            self.recommendations_cache.set(cache_key, recommendations)
             
             return recommendations
             
@@ -63,15 +96,38 @@ class RecommendationService:
             logger.error(f"❌ Error generating recommendations for guest {guest_id}: {e}")
             return self._get_default_recommendations()
     
+    def invalidate_guest(self, guest_id: str) -> int:
+        """Drop every cached recommendation set for a guest, whatever catalog version it was built on"""
+        stale = [key for key, _ in self.recommendations_cache.items() if key[0] == guest_id]
+        for key in stale:
+            self.recommendations_cache.delete(key)
+        return len(stale)
+    
+    def add_feedback(self, feedback: Dict):
+        """Index newly submitted feedback so the guest's next recommendations reflect it"""
+        self.feedback_data.append(feedback)
+        self._feedback_by_guest.add(
+            feedback.get("guest_id"),
+            feedback.get("timestamp") or feedback.get("submitted_at", ""),
+            feedback
+        )
+        self.invalidate_guest(feedback.get("guest_id"))
+    
+    def update_guest_profile(self, guest_id: str, update_data: Dict) -> bool:
+        """Apply profile changes (preferences, loyalty tier, ...) and drop the guest's cached recommendations"""
+        self.invalidate_guest(guest_id)
+        guest = self._guests_by_id.get(guest_id)
+        if guest is None:
+            return False
+        guest.update(update_data)
+        return True
+    
     def _find_guest(self, guest_id: str) -> Optional[Dict]:
         """Find guest by ID"""
-        for guest in self.guests_data:
-            if guest.get("guest_id") == guest_id:
-                return guest
-        return None
+        return self._guests_by_id.get(guest_id)
     
-    async def _analyze_guest_preferences(self, guest: Dict) -> Dict:
-        """Analyze guest preferences from profile and feedback"""
+    def _analyze_guest_preferences(self, guest: Dict) -> Dict:
+        """Analyze guest preferences from profile and stored feedback scores (no model inference)"""
         preferences = {
             "cuisine_preference": guest.get("preferences", {}).get("cuisine", "international"),
             "activity_level": guest.get("preferences", {}).get("activity_level", "moderate"),
@@ -82,204 +138,85 @@ class RecommendationService:
         }
         
         # Analyze feedback sentiment for this guest
-        guest_feedback = [f for f in self.feedback_data if f.get("guest_id") == guest.get("guest_id")]
+        guest_feedback = self._feedback_by_guest.get(guest.get("guest_id"))
         
         if guest_feedback:
             for feedback in guest_feedback[-5:]:  # Last 5 feedback entries
-                sentiment_result = await sentiment_service.analyze_sentiment(feedback.get("feedback_text", ""))
-                preferences["sentiment_history"].append(sentiment_result)
+                # Scores are written at submit time (or by the backfill job); unscored entries only count their rating
+                sentiment_result = stored_sentiment(feedback)
+                if sentiment_result:
+                    preferences["sentiment_history"].append(sentiment_result)
                 preferences["previous_ratings"].append(feedback.get("rating", 3))
             
             # Calculate personalization score
             avg_rating = sum(preferences["previous_ratings"]) / len(preferences["previous_ratings"])
-            avg_sentiment = sum(1 if s["sentiment"] == "positive" else 0 for s in preferences["sentiment_history"]) / len(preferences["sentiment_history"])
-            preferences["personalization_score"] = (avg_rating / 5.0 + avg_sentiment) / 2
+            if preferences["sentiment_history"]:
+                avg_sentiment = sum(1 if s["sentiment"] == "positive" else 0 for s in preferences["sentiment_history"]) / len(preferences["sentiment_history"])
+                preferences["personalization_score"] = (avg_rating / 5.0 + avg_sentiment) / 2
+            else:
+                preferences["personalization_score"] = avg_rating / 5.0
         
         return preferences
     
+    async def backfill_sentiment(self) -> int:
+        """Score loaded feedback that has no stored sentiment; returns the number of records updated"""
+        missing = [f for f in self.feedback_data if stored_sentiment(f) is None and feedback_text(f)]
+        if not missing:
+            return 0
+        
+        try:
+            # Score with the model rather than the keyword fallback when it can be loaded
+            await sentiment_service.wait_for_model()
+            results = await sentiment_service.analyze_batch([feedback_text(f) for f in missing], send_alerts=False)
+            scored = []
+            for feedback, result in zip(missing, results):
+                if "error" not in result:
+                    feedback["sentiment_analysis"] = result
+                    scored.append(feedback)
+            # Store the scores so the next start has nothing left to backfill
+            if scored:
+                await asyncio.get_running_loop().run_in_executor(None, self.storage.put_all_feedback, scored)
+            logger.info(f"🔁 Backfilled sentiment for {len(scored)} feedback records")
+            return len(scored)
+        except Exception as e:
+            logger.error(f"❌ Error backfilling feedback sentiment: {e}")
+            return 0
+    
+    def _top_recommendations(self, category: str, preferences: Dict, wanted: Dict, score_fn, k: int = 3) -> List[Dict]:
+        """Score the indexed candidates for a category and keep the best k with a heap"""
+        snapshot = self.catalog.current()
+        scored = [
+            # Ties on the (capped) score go to the higher-rated, then earlier-listed item
+            ((score_fn(item, preferences), item.get("rating", 0), -position), item)
+            for position, item in snapshot.candidates(category, wanted, k)
+        ]
+        top = heapq.nlargest(k, scored, key=lambda entry: entry[0])
+        return [dict(item, recommendation_score=rank[0]) for rank, item in top]
+    
     def _get_dining_recommendations(self, preferences: Dict) -> List[Dict]:
         """Generate dining recommendations"""
-        all_dining = [
-            {
-                "name": "Skyline Rooftop Restaurant",
-                "cuisine": "international",
-                "price_tier": "premium",
-                "rating": 4.8,
-                "description": "Exquisite fine dining with panoramic city views",
-                "image": "/static/images/dining/skyline.jpg",
-                "specialties": ["Wagyu Beef", "Fresh Seafood", "Craft Cocktails"]
-            },
-            {
-                "name": "Garden Bistro",
-                "cuisine": "mediterranean",
-                "price_tier": "standard",
-                "rating": 4.5,
-                "description": "Fresh Mediterranean cuisine in a garden setting",
-                "image": "/static/images/dining/garden.jpg",
-                "specialties": ["Fresh Salads", "Grilled Fish", "Organic Vegetables"]
-            },
-            {
-                "name": "Spice Route",
-                "cuisine": "asian",
-                "price_tier": "standard",
-                "rating": 4.6,
-                "description": "Authentic Asian flavors with modern presentation",
-                "image": "/static/images/dining/spice.jpg",
-                "specialties": ["Dim Sum", "Curry Dishes", "Sushi"]
-            },
-            {
-                "name": "Local Harvest",
-                "cuisine": "local",
-                "price_tier": "budget",
-                "rating": 4.3,
-                "description": "Farm-to-table local cuisine with seasonal ingredients",
-                "image": "/static/images/dining/harvest.jpg",
-                "specialties": ["Seasonal Menu", "Local Ingredients", "Comfort Food"]
-            }
-        ]
-        
-        # Filter and score based on preferences
-        scored_dining = []
-        for restaurant in all_dining:
-            score = self._calculate_dining_score(restaurant, preferences)
-            restaurant["recommendation_score"] = score
-            scored_dining.append(restaurant)
-        
-        # Sort by score and return top 3
-        scored_dining.sort(key=lambda x: x["recommendation_score"], reverse=True)
-        return scored_dining[:3]
+        wanted = {
+            "cuisine": preferences.get("cuisine_preference", "international"),
+            "price_tier": preferences.get("budget_tier", "standard")
+        }
+        return self._top_recommendations("dining", preferences, wanted, self._calculate_dining_score)
     
     def _get_amenity_recommendations(self, preferences: Dict) -> List[Dict]:
         """Generate amenity recommendations"""
-        all_amenities = [
-            {
-                "name": "Luxury Spa & Wellness Center",
-                "category": "wellness",
-                "price_tier": "premium",
-                "rating": 4.9,
-                "description": "Full-service spa with massage, facials, and wellness treatments",
-                "image": "/static/images/amenities/spa.jpg",
-                "services": ["Hot Stone Massage", "Aromatherapy", "Yoga Classes"]
-            },
-            {
-                "name": "Fitness Center & Pool",
-                "category": "fitness",
-                "price_tier": "standard",
-                "rating": 4.4,
-                "description": "State-of-the-art gym with Olympic-size pool",
-                "image": "/static/images/amenities/fitness.jpg",
-                "services": ["24/7 Gym Access", "Personal Training", "Swimming Pool"]
-            },
-            {
-                "name": "Business Center",
-                "category": "business",
-                "price_tier": "standard",
-                "rating": 4.2,
-                "description": "Fully equipped business center with meeting rooms",
-                "image": "/static/images/amenities/business.jpg",
-                "services": ["Meeting Rooms", "High-Speed Internet", "Printing Services"]
-            },
-            {
-                "name": "Kids Club",
-                "category": "family",
-                "price_tier": "budget",
-                "rating": 4.6,
-                "description": "Supervised activities and entertainment for children",
-                "image": "/static/images/amenities/kids.jpg",
-                "services": ["Supervised Play", "Arts & Crafts", "Movie Nights"]
-            }
-        ]
-        
-        # Filter and score based on preferences
-        scored_amenities = []
-        for amenity in all_amenities:
-            score = self._calculate_amenity_score(amenity, preferences)
-            amenity["recommendation_score"] = score
-            scored_amenities.append(amenity)
-        
-        # Sort by score and return top 3
-        scored_amenities.sort(key=lambda x: x["recommendation_score"], reverse=True)
-        return scored_amenities[:3]
+        wanted = {"price_tier": preferences.get("budget_tier", "standard")}
+        return self._top_recommendations("amenities", preferences, wanted, self._calculate_amenity_score)
     
     def _get_activity_recommendations(self, preferences: Dict) -> List[Dict]:
         """Generate activity recommendations"""
-        all_activities = [
-            {
-                "name": "City Walking Tour",
-                "category": "cultural",
-                "activity_level": "moderate",
-                "price_tier": "budget",
-                "duration": "3 hours",
-                "rating": 4.7,
-                "description": "Guided tour of historic city landmarks and hidden gems",
-                "image": "/static/images/activities/walking.jpg"
-            },
-            {
-                "name": "Adventure Sports Package",
-                "category": "adventure",
-                "activity_level": "high",
-                "price_tier": "premium",
-                "duration": "Full day",
-                "rating": 4.8,
-                "description": "Thrilling outdoor activities including zip-lining and rock climbing",
-                "image": "/static/images/activities/adventure.jpg"
-            },
-            {
-                "name": "Cooking Class Experience",
-                "category": "culinary",
-                "activity_level": "low",
-                "price_tier": "standard",
-                "duration": "4 hours",
-                "rating": 4.5,
-                "description": "Learn to cook local dishes with professional chefs",
-                "image": "/static/images/activities/cooking.jpg"
-            },
-            {
-                "name": "Wine Tasting Tour",
-                "category": "leisure",
-                "activity_level": "low",
-                "price_tier": "premium",
-                "duration": "5 hours",
-                "rating": 4.6,
-                "description": "Visit local wineries and taste premium wines",
-                "image": "/static/images/activities/wine.jpg"
-            }
-        ]
-        
-        # Filter and score based on preferences
-        scored_activities = []
-        for activity in all_activities:
-            score = self._calculate_activity_score(activity, preferences)
-            activity["recommendation_score"] = score
-            scored_activities.append(activity)
-        
-        # Sort by score and return top 3
-        scored_activities.sort(key=lambda x: x["recommendation_score"], reverse=True)
-        return scored_activities[:3]
+        wanted = {
+            "activity_level": preferences.get("activity_level", "moderate"),
+            "price_tier": preferences.get("budget_tier", "standard")
+        }
+        return self._top_recommendations("activities", preferences, wanted, self._calculate_activity_score)
     
     def _get_room_service_recommendations(self, preferences: Dict) -> List[Dict]:
         """Generate room service recommendations"""
-        services = [
-            {
-                "name": "24/7 Concierge Service",
-                "category": "concierge",
-                "description": "Personal assistance with reservations, tickets, and local information",
-                "available": "24/7"
-            },
-            {
-                "name": "In-Room Dining",
-                "category": "dining",
-                "description": "Gourmet meals delivered to your room",
-                "available": "6:00 AM - 11:00 PM"
-            },
-            {
-                "name": "Laundry & Dry Cleaning",
-                "category": "housekeeping",
-                "description": "Professional laundry and dry cleaning services",
-                "available": "8:00 AM - 6:00 PM"
-            }
-        ]
-        return services
+        return [dict(service) for service in self.catalog.current().room_services]
     
     def _calculate_dining_score(self, restaurant: Dict, preferences: Dict) -> float:
         """Calculate recommendation score for dining"""
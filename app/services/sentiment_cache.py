@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import Dict, Optional
+
+from app.services.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different copies of a comment share a cache entry"""
+    text = unicodedata.normalize("NFC", text or "")
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+class SentimentCache:
+    """
+    Content-addressed cache of per-label sentiment scores.
+
+    Entries are keyed by a hash of the normalized text plus the model ID, so
+    a comment is only ever scored once per model. When ``persist_path`` is
+    set, new entries are appended to a JSON Lines file and reloaded on
+    startup.
+    """
+
+    def __init__(self, max_entries: int = 10000, persist_path: Optional[str] = None):
+        self._cache = LRUCache(max_entries=max_entries)
+        self.persist_path = persist_path
+        self._persist_file = None
+        if persist_path:
+            self._load()
+
+    @staticmethod
+    def make_key(text: str, model_id: str) -> str:
+        payload = f"{model_id}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        return self._cache.get(key)
+
+    def put(self, key: str, scores: Dict[str, float]):
+        self._cache.set(key, scores)
+        if self._persist_file:
+            try:
+                self._persist_file.write(json.dumps({"k": key, "v": scores}) + "\n")
+                self._persist_file.flush()
+            except OSError as e:
+                logger.error(f"❌ Error persisting sentiment cache entry: {e}")
+
+    def stats(self) -> Dict:
+        stats = self._cache.stats()
+        stats["persistent"] = bool(self.persist_path)
+        return stats
+
+    def _load(self):
+        """Replay the persisted entries and start appending new ones"""
+        lines = 0
+        try:
+            if os.path.exists(self.persist_path):
+                with open(self.persist_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        lines += 1
+                        try:
+                            entry = json.loads(line)
+                            self._cache.set(entry["k"], entry["v"])
+                        except (ValueError, KeyError):
+                            continue
+
+            # Rewrite the file once it holds mostly superseded or evicted entries
+            if lines > 2 * self._cache.max_entries:
+                tmp = self.persist_path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    for key, scores in self._cache.items():
+                        f.write(json.dumps({"k": key, "v": scores}) + "\n")
+                os.replace(tmp, self.persist_path)
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+            self._persist_file = open(self.persist_path, "a", encoding="utf-8")
+            logger.info(f"💾 Loaded {len(self._cache)} cached sentiment results from {self.persist_path}")
+        except OSError as e:
+            logger.error(f"❌ Sentiment cache persistence disabled: {e}")
+            self._persist_file = None
+
+    def close(self):
+        if self._persist_file:
+            self._persist_file.close()
+            self._persist_file = None
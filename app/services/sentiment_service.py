@@ -4,66 +4,230 @@ import logging
 from typing import Dict, List, Union
 import logging
 from typing import Dict, List, Optional
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
-import requests
 import json
 import os
+import threading
+import time
 from datetime import datetime
+from app.services.inference_worker import MicroBatchWorker
+from app.services.sentiment_cache import SentimentCache
+from app.services.notification_dispatcher import SlackDispatcher
+from app.services.keyword_sentiment import keyword_engine
 
 logger = logging.getLogger(__name__)
 
 class SentimentAnalysisService:
     def __init__(self):
         self.model_name = "distilbert-base-uncased-finetuned-sst-2-english"
+        # "torch" runs the transformers pipeline; "onnx" runs an int8-quantized ONNX export
+        self.engine = os.getenv("SENTIMENT_ENGINE", "torch").lower()
+        # Quantized scores differ slightly, so each engine gets its own cache entries
+        self.model_id = self.model_name if self.engine == "torch" else f"{self.model_name}+onnx-int8"
         self.sentiment_analyzer = None
         self.slack_webhook_url = os.getenv("SLACK_WEBHOOK_URL")
-        self._initialize_model()
+        # Alerts are queued and posted from a background thread, coalescing bursts into digests
+        self.slack_dispatcher = SlackDispatcher(
+            self.slack_webhook_url,
+            queue_path=os.getenv("SLACK_QUEUE_PATH", "app/data/slack_queue.jsonl"),
+            dead_letter_path=os.getenv("SLACK_DEAD_LETTER_PATH", "app/data/slack_dead_letter.jsonl"),
+            coalesce_window_ms=float(os.getenv("SLACK_COALESCE_MS", "2000"))
+        )
+        self.max_batch_size = int(os.getenv("SENTIMENT_MAX_BATCH_SIZE", "16"))
+        # Model inference runs on a dedicated thread so the event loop never blocks on it
+        self.inference_worker = MicroBatchWorker(
+            self._score_texts,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=float(os.getenv("SENTIMENT_MAX_WAIT_MS", "5")),
+            name="sentiment-inference"
+        )
+        # Scores keyed by normalized text + model ID, so repeated comments skip the model
+        self.result_cache = SentimentCache(
+            max_entries=int(os.getenv("SENTIMENT_CACHE_SIZE", "10000")),
+            persist_path=os.getenv("SENTIMENT_CACHE_PATH") or None
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # The model loads in the background (keyword fallback serves until it is ready),
+        # eagerly at construction, or not at all for fast-start deployments
+        self.model_loading = os.getenv("SENTIMENT_MODEL_LOADING", "background").lower()
+        self.model_state = "not_loaded"
+        self._model_lock = threading.Lock()
+        self.model_error: Optional[str] = None
+        self.model_load_seconds: Optional[float] = None
+        self._model_settled = threading.Event()
+        self._model_loader: Optional[threading.Thread] = None
+        if self.model_loading == "eager":
+            self._initialize_model()
+        elif self.model_loading == "disabled":
+            self.model_state = "disabled"
+            self._model_settled.set()
+            logger.info("⚡ Fast start: sentiment model disabled, using keyword analysis")
+    
+    def start_model_loading(self):
+        """Load the model on a background thread; no-op once loading has started"""
+        with self._model_lock:
+            if self.model_state != "not_loaded":
+                return
+            self.model_state = "loading"
+            self._model_loader = threading.Thread(
+                target=self._initialize_model, name="sentiment-model-loader", daemon=True
+            )
+            self._model_loader.start()
+    
+    async def wait_for_model(self, timeout: Optional[float] = None) -> bool:
+        """Start loading if needed and wait until the model is ready or has failed; True if it is usable"""
+        self.start_model_loading()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._model_settled.wait, timeout)
+        return self.sentiment_analyzer is not None
+    
+    def model_status(self) -> Dict:
+        """Model readiness for the /ready endpoint"""
+        return {
+            "state": self.model_state,
+            "model": self.model_name,
+            "engine": self.engine,
+            "serving": "model" if self.sentiment_analyzer else "keyword-fallback",
+            "load_seconds": self.model_load_seconds,
+            "error": self.model_error
+        }
     
     def _initialize_model(self):
         """Initialize the sentiment analysis model"""
+        self.model_state = "loading"
+        started = time.perf_counter()
         try:
-            logger.info("🤖 Initializing DistilBERT sentiment analysis model...")
-            self.sentiment_analyzer = pipeline(
-                "sentiment-analysis",
-                model=self.model_name,
-                tokenizer=self.model_name,
-                return_all_scores=True
-            )
+            logger.info(f"🤖 Initializing DistilBERT sentiment analysis model ({self.engine} engine)...")
+            if self.engine == "onnx":
+                from app.services.onnx_sentiment import OnnxSentimentEngine
+                self.sentiment_analyzer = OnnxSentimentEngine(
+                    self.model_name,
+                    export_dir=os.getenv("SENTIMENT_ONNX_DIR", "app/data/onnx_models/distilbert-sst2"),
+                    num_threads=int(os.getenv("SENTIMENT_ONNX_THREADS", "0"))
+                )
+            else:
+                # Imported here so importing the app does not pay for torch and transformers
+                from transformers import pipeline
+                self.sentiment_analyzer = pipeline(
+                    "sentiment-analysis",
+                    model=self.model_name,
+                    tokenizer=self.model_name,
+                    return_all_scores=True
+                )
+            self.model_state = "ready"
             logger.info("✅ Sentiment analysis model initialized successfully")
         except Exception as e:
             logger.error(f"❌ Failed to initialize sentiment model: {e}")
             # Fallback to a simpler approach if model loading fails
             self.sentiment_analyzer = None
+            self.model_state = "failed"
+            self.model_error = str(e)
+        finally:
+            self.model_load_seconds = round(time.perf_counter() - started, 3)
+            self._model_settled.set()
+            logger.info(f"⏱️ Sentiment model load finished in {self.model_load_seconds}s ({self.model_state})")
+    
+    def _score_texts(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Run the model on a batch of texts (blocking, called on the inference thread)"""
+        # Bucket texts of similar length together so each padded batch wastes little compute
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        results = self.sentiment_analyzer(
+            [texts[i] for i in order],
+            truncation=True,
+            padding=True,
+            batch_size=self.max_batch_size
+        )
+        
+        # Restore input order
+        sentiment_scores = [None] * len(texts)
+        for position, text_results in zip(order, results):
+            sentiment_scores[position] = {result['label'].lower(): result['score'] for result in text_results}
+        return sentiment_scores
+    
+    async def _score_cached(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Score texts, serving repeats from the cache and sharing in-flight inference"""
+        sentiment_scores = [None] * len(texts)
+        to_score: Dict[str, List[int]] = {}
+        in_flight: Dict[str, List[int]] = {}
+        
+        for i, text in enumerate(texts):
+            key = self.result_cache.make_key(text, self.model_id)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                sentiment_scores[i] = cached
+            elif key in to_score:
+                to_score[key].append(i)
+            elif key in self._inflight:
+                in_flight.setdefault(key, []).append(i)
+            else:
+                to_score[key] = [i]
+        
+        if to_score:
+            loop = asyncio.get_running_loop()
+            keys = list(to_score)
+            for key in keys:
+                self._inflight[key] = loop.create_future()
+            try:
+                results = await self.inference_worker.submit([texts[to_score[key][0]] for key in keys])
+            except BaseException as e:
+                # Always release the keys, or later requests for these texts would wait forever
+                for key in keys:
+                    future = self._inflight.pop(key)
+                    if isinstance(e, Exception):
+                        future.set_exception(e)
+                        future.exception()  # waiters see the error; don't log it as unretrieved
+                    else:
+                        # This request was cancelled; waiters score the text themselves
+                        future.cancel()
+                raise
+            for key, scores in zip(keys, results):
+                self.result_cache.put(key, scores)
+                self._inflight.pop(key).set_result(scores)
+                for i in to_score[key]:
+                    sentiment_scores[i] = scores
+        
+        for key, positions in in_flight.items():
+            future = self._inflight.get(key)
+            if future is None:
+                scores = self.result_cache.get(key)
+            else:
+                try:
+                    scores = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        raise
+                    scores = (await self._score_cached([texts[positions[0]]]))[0]
+            for i in positions:
+                sentiment_scores[i] = scores
+        
+        return sentiment_scores
+    
+    def _build_result(self, text: str, sentiment_scores: Dict[str, float]) -> Dict:
+        """Build the analysis result dict from per-label model scores"""
+        primary_sentiment = max(sentiment_scores, key=sentiment_scores.get)
+        confidence = sentiment_scores[primary_sentiment]
+        
+        return {
+            "text": text,
+            "sentiment": primary_sentiment,
+            "confidence": confidence,
+            "scores": sentiment_scores,
+            "timestamp": datetime.utcnow().isoformat(),
+            "is_negative": primary_sentiment == "negative" and confidence > 0.7,
+            "model": "distilbert-base-uncased-finetuned-sst-2-english"
+        }
     
     async def analyze_sentiment(self, text: str) -> Dict:
         """Analyze sentiment of given text"""
         try:
             if not self.sentiment_analyzer:
-                # Fallback sentiment analysis
+                # Fallback sentiment analysis while the model is loading (or unavailable)
+                self.start_model_loading()
                 return self._fallback_sentiment_analysis(text)
             
-            # Use DistilBERT for sentiment analysis
-            results = self.sentiment_analyzer(text)
-            
-            # Extract scores
-            sentiment_scores = {}
-            for result in results[0]:
-                sentiment_scores[result['label'].lower()] = result['score']
-            
-            # Determine primary sentiment
-            primary_sentiment = max(sentiment_scores, key=sentiment_scores.get)
-            confidence = sentiment_scores[primary_sentiment]
-            
-            analysis_result = {
-                "text": text,
-                "sentiment": primary_sentiment,
-                "confidence": confidence,
-                "scores": sentiment_scores,
-                "timestamp": datetime.utcnow().isoformat(),
-                "is_negative": primary_sentiment == "negative" and confidence > 0.7,
-                "model": "distilbert-base-uncased-finetuned-sst-2-english"
-            }
+            # Use DistilBERT for sentiment analysis, micro-batched with concurrent requests
+            sentiment_scores = (await self._score_cached([text]))[0]
+            analysis_result = self._build_result(text, sentiment_scores)
             
             # Trigger alert for negative sentiment
             if analysis_result["is_negative"]:
@@ -73,112 +237,77 @@ class SentimentAnalysisService:
             
         except Exception as e:
             logger.error(f"❌ Sentiment analysis failed: {e}")
-            return {
-                "text": text,
-                "sentiment": "neutral",
-                "confidence": 0.5,
-                "scores": {"positive": 0.5, "negative": 0.5},
-                "timestamp": datetime.utcnow().isoformat(),
-                "is_negative": False,
-                "error": str(e)
-            }
+            return self._error_result(text, e)
     
-    def _fallback_sentiment_analysis(self, text: str) -> Dict:
-        """Simple fallback sentiment analysis using keyword matching"""
-        positive_keywords = [
-            "excellent", "amazing", "wonderful", "great", "fantastic", "love", "perfect",
-            "outstanding", "exceptional", "brilliant", "superb", "awesome", "incredible",
-            "good", "nice", "happy", "satisfied", "pleased", "comfortable", "clean",
-            "friendly", "helpful", "professional", "recommend", "beautiful", "relaxing"
-        ]
-        negative_keywords = [
-            "terrible", "awful", "horrible", "hate", "worst", "disappointing", "bad",
-            "poor", "unacceptable", "disgusting", "rude", "slow", "dirty", "broken",
-            "uncomfortable", "noisy", "expensive", "crowded", "unfriendly", "unhelpful",
-            "unprofessional", "outdated", "smelly", "cold", "hot", "boring"
-        ]
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_keywords if word in text_lower)
-        negative_count = sum(1 for word in negative_keywords if word in text_lower)
-        
-        if positive_count > negative_count:
-            sentiment = "positive"
-            confidence = min(0.9, 0.6 + (positive_count * 0.1))
-        elif negative_count > positive_count:
-            sentiment = "negative"
-            confidence = min(0.9, 0.6 + (negative_count * 0.1))
-        else:
-            sentiment = "neutral"
-            confidence = 0.5
-        
+    def _error_result(self, text: str, error: Exception) -> Dict:
+        """Neutral result returned when analysis fails"""
         return {
             "text": text,
-            "sentiment": sentiment,
-            "confidence": confidence,
-            "scores": {
-                "positive": confidence if sentiment == "positive" else 1 - confidence,
-                "negative": confidence if sentiment == "negative" else 1 - confidence
-            },
+            "sentiment": "neutral",
+            "confidence": 0.5,
+            "scores": {"positive": 0.5, "negative": 0.5},
             "timestamp": datetime.utcnow().isoformat(),
-            "is_negative": sentiment == "negative" and confidence > 0.7,
-            "model": "fallback-keyword-based"
+            "is_negative": False,
+            "error": str(error)
         }
     
+    def _fallback_sentiment_analysis(self, text: str) -> Dict:
+        """Simple fallback sentiment analysis using keyword matching"""
+        return keyword_engine.analyze(text, model="fallback-keyword-based")
+    
     async def _send_slack_alert(self, analysis_result: Dict):
-        """Send alert to Slack when negative sentiment is detected"""
-        if not self.slack_webhook_url:
-            logger.warning("⚠️ Slack webhook URL not configured")
-            return
+        """Queue a Slack alert for negative sentiment; delivery happens off the event loop"""
+        self.slack_dispatcher.enqueue(self._slack_attachment(analysis_result))
+    
+    def _slack_attachment(self, analysis_result: Dict) -> Dict:
+        """Format one negative analysis result as a Slack attachment"""
+        return {
+            "color": "danger",
+            "fields": [
+                {
+                    "title": "Feedback Text",
+                    "value": analysis_result["text"][:200] + "..." if len(analysis_result["text"]) > 200 else analysis_result["text"],
+                    "short": False
+                },
+                {
+                    "title": "Sentiment",
+                    "value": f"{analysis_result['sentiment'].upper()} ({analysis_result['confidence']:.2%})",
+                    "short": True
+                },
+                {
+                    "title": "Timestamp",
+                    "value": analysis_result["timestamp"],
+                    "short": True
+                }
+            ]
+        }
+    
+    async def _send_slack_digest(self, analysis_results: List[Dict]):
+        """Queue several negative results; the dispatcher posts them as one digest message"""
+        for analysis_result in analysis_results:
+            self.slack_dispatcher.enqueue(self._slack_attachment(analysis_result))
+    
+    async def analyze_batch(self, texts: List[str], send_alerts: bool = True) -> List[Dict]:
+        """Analyze sentiment for multiple texts in batched forward passes, preserving input order"""
+        if not texts:
+            return []
+        
+        if not self.sentiment_analyzer:
+            self.start_model_loading()
+            return keyword_engine.analyze_batch(texts, model="fallback-keyword-based")
         
         try:
-            message = {
-                "text": "🚨 Negative Guest Feedback Alert",
-                "attachments": [
-                    {
-                        "color": "danger",
-                        "fields": [
-                            {
-                                "title": "Feedback Text",
-                                "value": analysis_result["text"][:200] + "..." if len(analysis_result["text"]) > 200 else analysis_result["text"],
-                                "short": False
-                            },
-                            {
-                                "title": "Sentiment",
-                                "value": f"{analysis_result['sentiment'].upper()} ({analysis_result['confidence']:.2%})",
-                                "short": True
-                            },
-                            {
-                                "title": "Timestamp",
-                                "value": analysis_result["timestamp"],
-                                "short": True
-                            }
-                        ]
-                    }
-                ]
-            }
-            
-            response = requests.post(
-                self.slack_webhook_url,
-                json=message,
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                logger.info("✅ Slack alert sent successfully")
-            else:
-                logger.error(f"❌ Failed to send Slack alert: {response.status_code}")
-                
+            batch_scores = await self._score_cached(list(texts))
+            results = [self._build_result(text, scores) for text, scores in zip(texts, batch_scores)]
         except Exception as e:
-            logger.error(f"❌ Error sending Slack alert: {e}")
-    
-    async def analyze_batch(self, texts: List[str]) -> List[Dict]:
-        """Analyze sentiment for multiple texts"""
-        results = []
-        for text in texts:
-            result = await self.analyze_sentiment(text)
-            results.append(result)
+            logger.error(f"❌ Batch sentiment analysis failed: {e}")
+            return [self._error_result(text, e) for text in texts]
+        
+        # Alert once for the whole batch instead of once per negative text
+        negative_results = [r for r in results if r["is_negative"]]
+        if send_alerts and negative_results:
+            await self._send_slack_digest(negative_results)
+        
         return results
 
 # Global instance
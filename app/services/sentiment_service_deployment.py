@@ -8,6 +8,7 @@ import requests
 import json
 import os
 from datetime import datetime
+from app.services.keyword_sentiment import keyword_engine
 
 logger = logging.getLogger(__name__)
 
@@ -43,45 +44,7 @@ class SentimentAnalysisService:
     
     def _fallback_sentiment_analysis(self, text: str) -> Dict:
         """Simple fallback sentiment analysis using keyword matching"""
-        positive_keywords = [
-            "excellent", "amazing", "wonderful", "great", "fantastic", "love", "perfect",
-            "outstanding", "exceptional", "brilliant", "superb", "awesome", "incredible",
-            "good", "nice", "happy", "satisfied", "pleased", "comfortable", "clean",
-            "friendly", "helpful", "professional", "recommend", "beautiful", "relaxing"
-        ]
-        negative_keywords = [
-            "terrible", "awful", "horrible", "hate", "worst", "disappointing", "bad",
-            "poor", "unacceptable", "disgusting", "rude", "slow", "dirty", "broken",
-            "uncomfortable", "noisy", "expensive", "crowded", "unfriendly", "unhelpful",
-            "unprofessional", "outdated", "smelly", "cold", "hot", "boring"
-        ]
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_keywords if word in text_lower)
-        negative_count = sum(1 for word in negative_keywords if word in text_lower)
-        
-        if positive_count > negative_count:
-            sentiment = "positive"
-            confidence = min(0.9, 0.6 + (positive_count * 0.1))
-        elif negative_count > positive_count:
-            sentiment = "negative"
-            confidence = min(0.9, 0.6 + (negative_count * 0.1))
-        else:
-            sentiment = "neutral"
-            confidence = 0.5
-        
-        return {
-            "text": text,
-            "sentiment": sentiment,
-            "confidence": confidence,
-            "scores": {
-                "positive": confidence if sentiment == "positive" else 1 - confidence,
-                "negative": confidence if sentiment == "negative" else 1 - confidence
-            },
-            "timestamp": datetime.utcnow().isoformat(),
-            "is_negative": sentiment == "negative" and confidence > 0.7,
-            "model": "lightweight-deployment"
-        }
+        return keyword_engine.analyze(text, model="lightweight-deployment")
     
     async def _send_slack_alert(self, analysis_result: Dict):
         """Send alert to Slack when negative sentiment is detected"""
@@ -131,13 +94,9 @@ class SentimentAnalysisService:
         except Exception as e:
             logger.error(f"❌ Error sending Slack alert: {e}")
     
-    async def analyze_batch(self, texts: List[str]) -> List[Dict]:
-        """Analyze sentiment for multiple texts"""
-        results = []
-        for text in texts:
-            result = await self.analyze_sentiment(text)
-            results.append(result)
-        return results
+    async def analyze_batch(self, texts: List[str], send_alerts: bool = True) -> List[Dict]:
+        """Analyze sentiment for multiple texts in one pass of the keyword engine"""
+        return keyword_engine.analyze_batch(texts, model="lightweight-deployment")
 
 # Global instance
 sentiment_service = SentimentAnalysisService()
@@ -0,0 +1,223 @@
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.models.user import UserSession
+
+logger = logging.getLogger(__name__)
+
+
+def _expiry_timestamp(session: UserSession) -> float:
+    """Session expiry as epoch seconds (expires_at is naive UTC)"""
+    expires_at = session.expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at.timestamp()
+
+
+class SessionStore:
+    """
+    Storage for login sessions keyed by session token.
+
+    Expired sessions are removed by ``sweep()``, which a background thread
+    runs every ``sweep_interval_seconds`` once ``start_sweeper()`` is called.
+    Listeners registered with ``add_expiry_listener`` receive the swept
+    tokens so callers can drop anything cached against them.
+
+    ``revalidate_seconds`` is None for stores that only this process can
+    change; shared stores set it so callers re-check cached sessions that
+    another worker may have logged out.
+    """
+
+    name = "base"
+    revalidate_seconds: Optional[float] = None
+
+    def __init__(self, sweep_interval_seconds: float = 300):
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._expiry_listeners: List[Callable[[List[str]], None]] = []
+        self._stop_event = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def get(self, session_token: str) -> Optional[UserSession]:
+        raise NotImplementedError
+
+    def put(self, session: UserSession):
+        raise NotImplementedError
+
+    def delete(self, session_token: str) -> bool:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _sweep_expired(self, now: float) -> List[str]:
+        """Remove sessions that expired at or before ``now``; returns their tokens"""
+        raise NotImplementedError
+
+    def add_expiry_listener(self, listener: Callable[[List[str]], None]):
+        self._expiry_listeners.append(listener)
+
+    def sweep(self) -> List[str]:
+        expired = self._sweep_expired(time.time())
+        if expired:
+            logger.info(f"🧹 Swept {len(expired)} expired sessions ({self.name} store)")
+            for listener in self._expiry_listeners:
+                listener(expired)
+        return expired
+
+    def start_sweeper(self):
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop_event.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name=f"session-sweeper-{self.name}", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop_event.wait(self.sweep_interval_seconds):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"❌ Session sweep failed: {e}")
+
+    def close(self):
+        self._stop_event.set()
+        if self._sweeper:
+            self._sweeper.join(timeout=1)
+            self._sweeper = None
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local sessions in a dict, with a min-heap of (expiry, token) so
+    a sweep only touches the sessions that have actually expired.
+    """
+
+    name = "memory"
+
+    def __init__(self, sweep_interval_seconds: float = 300):
+        super().__init__(sweep_interval_seconds)
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, UserSession] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+    def get(self, session_token: str) -> Optional[UserSession]:
+        return self._sessions.get(session_token)
+
+    def put(self, session: UserSession):
+        with self._lock:
+            self._sessions[session.session_token] = session
+            heapq.heappush(self._expiry_heap, (_expiry_timestamp(session), session.session_token))
+
+    def delete(self, session_token: str) -> bool:
+        # The heap entry is left behind and discarded when it reaches the top
+        with self._lock:
+            return self._sessions.pop(session_token, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _sweep_expired(self, now: float) -> List[str]:
+        expired = []
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, session_token = heapq.heappop(self._expiry_heap)
+                session = self._sessions.get(session_token)
+                # Skip tokens already logged out or re-stored with a later expiry
+                if session is not None and _expiry_timestamp(session) <= now:
+                    del self._sessions[session_token]
+                    expired.append(session_token)
+        return expired
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a SQLite database (WAL mode), so logins survive a restart
+    and any process on the host opening the same file sees them, so a
+    login is honoured by every worker.
+    """
+
+    name = "sqlite"
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS sessions ("
+        " session_token TEXT PRIMARY KEY,"
+        " user_id TEXT NOT NULL,"
+        " expires_at REAL NOT NULL,"
+        " data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)",
+    )
+
+    def __init__(self, db_path: str, sweep_interval_seconds: float = 300, revalidate_seconds: float = 5):
+        super().__init__(sweep_interval_seconds)
+        self.db_path = db_path
+        self.revalidate_seconds = revalidate_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+
+    def get(self, session_token: str) -> Optional[UserSession]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE session_token = ?", (session_token,)
+            ).fetchone()
+        return UserSession(**json.loads(row[0])) if row else None
+
+    def put(self, session: UserSession):
+        row = (
+            session.session_token,
+            session.user_id,
+            _expiry_timestamp(session),
+            json.dumps(session.dict(), default=str)
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_token, user_id, expires_at, data) VALUES (?, ?, ?, ?)",
+                row
+            )
+
+    def delete(self, session_token: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE session_token = ?", (session_token,))
+        return cursor.rowcount > 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def _sweep_expired(self, now: float) -> List[str]:
+        with self._lock, self._conn:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT session_token FROM sessions WHERE expires_at <= ?", (now,)
+            )]
+            if expired:
+                self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+        return expired
+
+    def close(self):
+        super().close()
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by SESSION_STORE (memory or sqlite)"""
+    sweep_interval = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "300"))
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            os.getenv("SESSION_DB_PATH", "app/data/sessions.sqlite3"),
+            sweep_interval_seconds=sweep_interval,
+            revalidate_seconds=float(os.getenv("SESSION_REVALIDATE_SECONDS", "5"))
+        )
+    return InMemorySessionStore(sweep_interval_seconds=sweep_interval)
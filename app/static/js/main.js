@@ -94,14 +94,9 @@ class GuestExperienceApp {
                 this.showAlert('success', 'Feedback submitted successfully! Thank you for your input.');
                 form.reset();
                 
-                // Show sentiment analysis result
-                if (result.sentiment) {
-                    this.displaySentimentResult(result);
-                }
-                
-                // If negative sentiment, show alert was triggered
-                if (result.alert_triggered) {
-                    this.showAlert('info', 'Alert has been sent to management for immediate attention.');
+                // Sentiment analysis and alerts run in the background; follow the status URL
+                if (result.status_url) {
+                    this.showFeedbackOutcome(result.status_url);
                 }
             } else {
                 this.showAlert('danger', 'Failed to submit feedback: ' + (result.detail || 'Unknown error'));
@@ -114,6 +109,41 @@ class GuestExperienceApp {
         }
     }
 
+    async showFeedbackOutcome(statusUrl, attempts = 20, intervalMs = 500) {
+        const status = await this.pollFeedbackStatus(statusUrl, attempts, intervalMs);
+        if (!status) return;
+        
+        // Show sentiment analysis result
+        if (status.sentiment) {
+            this.displaySentimentResult(status);
+        }
+        
+        // If negative sentiment, show alert was triggered
+        if (status.alert_id) {
+            this.showAlert('info', 'Alert has been sent to management for immediate attention.');
+        }
+    }
+
+    async pollFeedbackStatus(statusUrl, attempts, intervalMs) {
+        for (let attempt = 0; attempt < attempts; attempt++) {
+            try {
+                const response = await fetch(statusUrl, { credentials: 'include' });
+                if (!response.ok) return null;
+                
+                const status = await response.json();
+                const state = status.processing && status.processing.state;
+                if (state === 'complete' || state === 'failed') {
+                    return status;
+                }
+            } catch (error) {
+                console.error('Error checking feedback status:', error);
+                return null;
+            }
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+        return null;
+    }
+
     async loadRecommendations(guestId = null) {
         const container = document.getElementById('recommendations-container');
         if (!container) return;
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Latency/throughput comparison of the sentiment inference engines.
+
+Compares the transformers (torch) pipeline with the int8-quantized ONNX
+Runtime engine on CPU:
+
+    python benchmark_sentiment_engines.py --runs 200 --batch-size 16
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+
+SAMPLE_TEXTS = [
+    "The room was spotless and the staff were wonderful.",
+    "Terrible service, the air conditioning never worked and nobody helped.",
+    "Check-in was fine.",
+    "I loved the spa but breakfast was cold and overpriced.",
+    "Great location, friendly concierge, would definitely stay again.",
+    "The bathroom was dirty and the bed was uncomfortable.",
+    "Average stay, nothing special but nothing wrong either.",
+    "Room service was slow and the food arrived cold, very disappointing.",
+]
+
+
+def load_torch_engine():
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", model=MODEL_NAME, tokenizer=MODEL_NAME, return_all_scores=True)
+
+
+def load_onnx_engine(export_dir):
+    from app.services.onnx_sentiment import OnnxSentimentEngine
+    return OnnxSentimentEngine(MODEL_NAME, export_dir=export_dir)
+
+
+def benchmark(engine, runs, batch_size):
+    # Warm up so one-off graph and allocator setup is not measured
+    for text in SAMPLE_TEXTS:
+        engine([text], truncation=True, padding=True)
+
+    latencies = []
+    for i in range(runs):
+        text = SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]
+        started = time.perf_counter()
+        engine([text], truncation=True, padding=True)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    batch = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(batch_size * 8)]
+    started = time.perf_counter()
+    engine(batch, truncation=True, padding=True, batch_size=batch_size)
+    throughput = len(batch) / (time.perf_counter() - started)
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "throughput": throughput
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare torch and ONNX int8 sentiment inference on CPU")
+    parser.add_argument("--runs", type=int, default=100, help="single-text calls used for latency percentiles")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--onnx-dir", default=None, help="reuse an existing ONNX export (default: temporary)")
+    args = parser.parse_args()
+
+    export_dir = args.onnx_dir or tempfile.mkdtemp(prefix="onnx-sentiment-")
+    engines = {}
+
+    started = time.perf_counter()
+    engines["torch"] = load_torch_engine()
+    load_times = {"torch": time.perf_counter() - started}
+
+    started = time.perf_counter()
+    engines["onnx-int8"] = load_onnx_engine(export_dir)
+    load_times["onnx-int8"] = time.perf_counter() - started
+    model_mb = os.path.getsize(os.path.join(export_dir, "model.int8.onnx")) / 1e6
+
+    print(f"🧪 {args.runs} single-text runs, batch throughput at batch size {args.batch_size}")
+    print(f"{'engine':<10} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>9}")
+    for name, engine in engines.items():
+        result = benchmark(engine, args.runs, args.batch_size)
+        print(f"{name:<10} {load_times[name]:>8.2f} {result['p50_ms']:>8.2f} "
+              f"{result['p95_ms']:>8.2f} {result['throughput']:>9.1f}")
+    print(f"📦 int8 ONNX model size: {model_mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+from app.services.alert_store import AlertStore
+
+
+def test_eviction_unread_count_and_persistence(tmp_path):
+    """Alerts are bounded, IDs stay unique across restarts, unread counts track changes"""
+    path = str(tmp_path / "admin_alerts.json")
+    store = AlertStore(capacity=3, persist_path=path)
+    alerts = [store.add({"title": f"Alert {i}", "status": "unread"}) for i in range(5)]
+
+    assert len({alert["alert_id"] for alert in alerts}) == 5
+    assert [a["title"] for a in store.recent()] == ["Alert 4", "Alert 3", "Alert 2"]
+    assert [a["title"] for a in store.recent(2)] == ["Alert 4", "Alert 3"]
+    assert store.get(alerts[0]["alert_id"]) is None
+    assert store.unread_count == 3
+
+    assert store.mark_read(alerts[3]["alert_id"], "admin")["read_by"] == "admin"
+    assert store.mark_read(alerts[3]["alert_id"], "admin") is not None
+    assert store.mark_read(alerts[0]["alert_id"], "admin") is None
+    assert store.unread_count == 2
+
+    reloaded = AlertStore(capacity=3, persist_path=path)
+    assert [a["alert_id"] for a in reloaded.recent()] == [a["alert_id"] for a in store.recent()]
+    assert reloaded.unread_count == 2
+    newest = reloaded.add({"title": "Alert 5", "status": "unread"})
+    assert newest["alert_id"] > alerts[-1]["alert_id"]
@@ -0,0 +1,144 @@
+import random
+from datetime import datetime, timedelta
+
+from app.services.analytics_store import AnalyticsAggregateStore
+
+NOW = datetime(2030, 6, 15, 12, 0, 0)
+
+
+def _feedback(count, seed=5):
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        submitted_at = NOW - timedelta(minutes=rng.randint(0, 60 * 24 * 20), seconds=i)
+        records.append({
+            "feedback_id": f"FB_{i:04d}",
+            "guest_id": rng.choice(["G001", "G002", "G003"]),
+            "rating": rng.randint(1, 5),
+            "comment": "x",
+            "sentiment_analysis": {"sentiment": rng.choice(["positive", "negative", "neutral"]), "confidence": 0.8},
+            "submitted_at": submitted_at.isoformat() + ("Z" if i % 3 == 0 else "")
+        })
+    return records
+
+
+def _state(store):
+    return {
+        "total_feedback": store.total_feedback,
+        "sentiment_counts": store.sentiment_counts,
+        "rating_distribution": store.rating_distribution,
+        "rating": (store.rating_sum, store.rated_count),
+        "daily_buckets": store.daily_buckets,
+        "day_index": store.day_index,
+        "recent_alerts": store.recent_alerts(),
+        "guest_feedback": {g: store.guest_feedback(g) for g in ("G001", "G002", "G003")},
+    }
+
+
+def test_incremental_updates_match_a_full_rebuild():
+    records = _feedback(400)
+    guests = [{"guest_id": "G001", "loyalty_tier": "Gold"}, {"guest_id": "G002"}]
+
+    incremental = AnalyticsAggregateStore()
+    incremental.rebuild([], guests)
+    for record in records:
+        incremental.add_feedback(record)
+    # A record seen again (rebuild raced with the live path) is counted once
+    incremental.add_feedback(records[0])
+
+    rebuilt = AnalyticsAggregateStore()
+    rebuilt.rebuild(records, guests)
+
+    assert _state(incremental) == _state(rebuilt)
+    assert incremental.total_feedback == 400
+    assert sum(bucket["count"] for bucket in rebuilt.daily_buckets.values()) == 400
+    for trend in (lambda s: s.sentiment_trends(days=10, now=NOW), lambda s: s.satisfaction_trends(days=10, now=NOW)):
+        assert trend(incremental) == trend(rebuilt)
+
+
+def _at(moment, sentiment, rating=4):
+    return {"sentiment_analysis": {"sentiment": sentiment}, "rating": rating, "submitted_at": moment.isoformat()}
+
+
+def test_sentiment_trends_window_boundary_and_empty_days():
+    cutoff = NOW - timedelta(days=7)
+    store = AnalyticsAggregateStore()
+    store.rebuild([
+        _at(cutoff - timedelta(seconds=1), "negative"),
+        _at(cutoff, "negative"),
+        _at(cutoff + timedelta(seconds=1), "positive"),
+        _at(cutoff + timedelta(hours=1), "neutral"),
+        _at(NOW - timedelta(days=2), "negative"),
+        _at(NOW, "positive"),
+    ], [])
+
+    trends = store.sentiment_trends(days=7, now=NOW)
+    # The cutoff day only counts records strictly after the cutoff; days without feedback are left out
+    assert [(t["date"], t["total_feedback"]) for t in trends["trends"]] == [
+        ("2030-06-08", 2), ("2030-06-13", 1), ("2030-06-15", 1)
+    ]
+    assert trends["total_feedback"] == 4
+    assert trends["trends"][0]["positive_percentage"] == 50.0
+    assert trends["trends"][0]["negative_percentage"] == 0.0
+    assert AnalyticsAggregateStore().sentiment_trends(days=7, now=NOW) == {"period_days": 7, "total_feedback": 0, "trends": []}
+
+
+def test_satisfaction_trends_include_empty_days():
+    store = AnalyticsAggregateStore()
+    store.rebuild([
+        _at(NOW - timedelta(days=7), "positive", 5),
+        _at(NOW - timedelta(days=6, hours=11), "positive", 5),
+        _at(NOW - timedelta(days=6), "negative", 2),
+        _at(NOW.replace(hour=0, minute=0), "negative", 1),
+    ], [])
+
+    trends = store.satisfaction_trends(days=7, now=NOW)
+    assert [t["date"] for t in trends] == [f"2030-06-{day:02d}" for day in range(9, 16)]
+    assert [t["feedback_count"] for t in trends] == [2, 0, 0, 0, 0, 0, 1]
+    assert trends[0]["average_rating"] == 3.5 and trends[0]["satisfaction_rate"] == 50.0
+    assert trends[1] == {
+        "date": "2030-06-10", "display_date": "Jun 10",
+        "average_rating": 0, "satisfaction_rate": 0, "feedback_count": 0
+    }
+    assert trends[-1]["average_rating"] == 1.0
+
+
+def test_undated_feedback_stays_out_of_the_day_buckets():
+    store = AnalyticsAggregateStore()
+    store.rebuild([
+        {"feedback_id": "FB_1", "rating": 1, "sentiment_analysis": {"sentiment": "negative"}},
+        dict(_at(NOW, "positive"), feedback_id="FB_2"),
+        {"feedback_id": "FB_3", "rating": 5, "timestamp": (NOW - timedelta(days=1)).isoformat() + "Z"},
+    ], [])
+
+    assert store.total_feedback == 3
+    assert store.day_index == ["2030-06-14", "2030-06-15"]
+    assert store.sentiment_trends(days=3650, now=NOW)["total_feedback"] == 2
+
+
+def test_new_guests_and_first_real_feedback_update_the_aggregates():
+    store = AnalyticsAggregateStore()
+    store.add_guest({"guest_id": "G000"})  # before the first build the rebuild reads guests from disk
+    sample = [dict(_at(NOW, "negative", 1), feedback_id="FB_SAMPLE_001")]
+    store.rebuild(sample, [{"guest_id": "G001", "loyalty_tier": "Gold"}], sample_feedback=True)
+    assert store.total_guests == 1 and store.total_feedback == 1
+
+    store.add_guest({"guest_id": "G002"})
+    store.add_guest({"guest_id": "G001", "loyalty_tier": "Gold"})
+    assert store.total_guests == 2
+    assert store.loyalty_counts == {"Gold": 1, "Standard": 1}
+
+    # The sample feedback makes way for the first real record; the guests stay
+    store.add_feedback(dict(_at(NOW, "positive", 5), feedback_id="FB_1", guest_id="G002"))
+    store.add_feedback(dict(_at(NOW, "positive", 4), feedback_id="FB_2", guest_id="G002"))
+    assert store.total_feedback == 2
+    assert store.sentiment_counts == {"positive": 2, "negative": 0, "neutral": 0}
+    assert store.total_guests == 2
+
+
+def test_dashboard_guests_include_crm_guests_and_guest_accounts():
+    from app.api.analytics_api import _load_guest_data
+
+    guest_ids = [guest["guest_id"] for guest in _load_guest_data()]
+    assert "G1001" in guest_ids and "guest_001" in guest_ids
+    assert len(guest_ids) == len(set(guest_ids))
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import admin_api
+from app.services import auth_service
+from app.services.analytics_store import AnalyticsAggregateStore
+from app.services.auth_service import AuthService
+
+
+def test_role_and_password_changes_invalidate_cached_session_users(tmp_path):
+    service = AuthService()
+    service.users_file = str(tmp_path / "users.json")
+    service.users_data = [{
+        "user_id": "staff_001", "username": "sam", "email": "Sam@Example.com", "role": "staff",
+        "first_name": "Sam", "last_name": "Lee", "password_hash": "old-password"
+    }]
+    service._build_indexes()
+
+    session = service.create_session(service.authenticate_user("sam", "old-password"))
+    cached = service.get_user_from_session(session.session_token)
+    assert cached.role == "staff"
+    assert service.get_user_from_session(session.session_token) is cached
+
+    service.update_user("staff_001", {"role": "admin"})
+    assert session.session_token not in service._session_users
+    assert service.get_user_from_session(session.session_token).role == "admin"
+
+    service.get_user_from_session(session.session_token)  # cached again
+    service.update_user("staff_001", {"password": "new-password", "email": "sam.lee@example.com"})
+    assert session.session_token not in service._session_users
+    assert service.authenticate_user("sam", "old-password") is None
+    assert service.authenticate_user("sam", "new-password").email == "sam.lee@example.com"
+    assert service.get_user_by_email("SAM.LEE@example.com")["user_id"] == "staff_001"
+    assert service.get_user_by_email("sam@example.com") is None
+    assert "new-password" in (tmp_path / "users.json").read_text()
+    service.close()
+
+
+def test_created_guests_reach_the_analytics_aggregates(tmp_path, monkeypatch):
+    store = AnalyticsAggregateStore()
+    store.rebuild([], [{"guest_id": "G1001"}])
+    monkeypatch.setattr(auth_service, "analytics_store", store)
+    service = AuthService()
+    service.users_file = str(tmp_path / "users.json")
+
+    user = service.create_user({
+        "username": "Nia", "email": "nia@example.com", "role": "customer",
+        "first_name": "Nia", "last_name": "Park", "password": "pw", "loyalty_tier": "Gold"
+    })
+    assert store.total_guests == 2
+    assert store.guests_by_id[user.user_id]["loyalty_tier"] == "Gold"
+    service.close()
+
+
+def test_admin_user_edit_reaches_cached_sessions(tmp_path, monkeypatch):
+    service = AuthService()
+    service.users_file = str(tmp_path / "users.json")
+    monkeypatch.setattr(admin_api, "auth_service", service)
+    session = service.create_session(service.authenticate_user("sam", "sam123"))
+    user_id = service.get_user_from_session(session.session_token).user_id
+
+    response = asyncio.run(admin_api.update_user(user_id, admin_api.UserUpdate(role="staff"), user=None))
+    assert response["user"].role == "staff"
+    assert service.get_user_from_session(session.session_token).role == "staff"
+
+    with pytest.raises(HTTPException) as taken:
+        asyncio.run(admin_api.update_user(user_id, admin_api.UserUpdate(username="ADMIN"), user=None))
+    assert taken.value.status_code == 400
+    with pytest.raises(HTTPException) as missing:
+        asyncio.run(admin_api.update_user("guest_999", admin_api.UserUpdate(first_name="X"), user=None))
+    assert missing.value.status_code == 404
+    service.close()
@@ -0,0 +1,46 @@
+import json
+import os
+import shutil
+
+from app.services.crm_service import CRMService
+from app.services.crm_storage import SQLiteCRMStorage, migrate_json_to_sqlite
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "app", "data")
+DATA_FILES = ("comprehensive_guests_data.json", "comprehensive_feedback_data.json")
+
+
+def test_sqlite_storage_round_trip(tmp_path):
+    db_path = str(tmp_path / "crm.sqlite3")
+    storage = SQLiteCRMStorage(db_path)
+    assert storage.load_guests() is None
+
+    crm = CRMService(data_path=str(tmp_path), storage=storage)
+    guest_id = crm.create_guest({"first_name": "Ana", "preferences": {"cuisine": "local"}})
+    feedback_id = crm.add_feedback({"guest_id": guest_id, "rating": 2, "sentiment_label": "negative"})
+    crm.update_feedback(feedback_id, {"rating": 3})
+    storage.close()
+
+    reopened = SQLiteCRMStorage(db_path)
+    assert reopened.load_guests()[guest_id]["preferences"] == {"cuisine": "local"}
+    assert reopened.load_feedback()[feedback_id]["rating"] == 3
+    row = reopened._conn.execute(
+        "SELECT guest_id, sentiment_label FROM feedback WHERE feedback_id = ?", (feedback_id,)
+    ).fetchone()
+    assert row == (guest_id, "NEGATIVE")
+    reopened.close()
+
+
+def test_migration_copies_every_json_record(tmp_path):
+    for name in DATA_FILES:
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path / name)
+    guests = json.loads((tmp_path / DATA_FILES[0]).read_text(encoding="utf-8"))["guests"]
+    feedback = json.loads((tmp_path / DATA_FILES[1]).read_text(encoding="utf-8"))["feedback"]
+
+    db_path = str(tmp_path / "crm.sqlite3")
+    counts = migrate_json_to_sqlite(str(tmp_path), db_path)
+    assert counts == {"guests": len(guests), "feedback": len(feedback)}
+
+    storage = SQLiteCRMStorage(db_path)
+    assert storage.load_guests() == {guest["guest_id"]: guest for guest in guests}
+    assert storage.load_feedback() == {fb["feedback_id"]: fb for fb in feedback}
+    storage.close()
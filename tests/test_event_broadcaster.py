@@ -0,0 +1,29 @@
+import asyncio
+
+from app.services.event_broadcaster import EventBroadcaster
+
+
+def test_resume_and_backpressure():
+    """Reconnecting clients replay missed events; slow clients are cut off, not buffered forever"""
+    async def scenario():
+        broadcaster = EventBroadcaster(history_size=3, client_queue_size=2)
+        for i in range(4):
+            broadcaster.publish("alert", {"n": i})
+
+        _, replay = broadcaster.subscribe(last_event_id=2)
+        assert [event[0] for event in replay] == [3, 4]
+        _, replay = broadcaster.subscribe(last_event_id=0)
+        assert replay is None
+
+        slow, _ = broadcaster.subscribe()
+        for i in range(3):
+            broadcaster.publish("alert", {"n": i})
+        await asyncio.sleep(0)
+        assert slow.overflowed
+        assert slow.queue.qsize() == 2
+
+    asyncio.run(scenario())
+
+
+def test_format_event():
+    assert EventBroadcaster.format_event(7, "alert", {"a": 1}) == 'id: 7\nevent: alert\ndata: {"a": 1}\n\n'
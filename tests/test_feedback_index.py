@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from app.services.crm_service import CRMService
+from app.services.feedback_index import GuestFeedbackIndex
+from app.services.feedback_log import FeedbackLog
+from app.services.feedback_repository import FeedbackRepository
+
+
+def test_lookup_by_guest_in_time_order():
+    index = GuestFeedbackIndex()
+    index.add("G1", "2030-01-02T00:00:00", "FB_2")
+    index.add("G2", "2030-01-01T00:00:00", "FB_X")
+    index.add("G1", "2030-01-03T00:00:00", "FB_3")
+    index.add("G1", "2030-01-01T00:00:00", "FB_1")
+    index.add("G1", "2030-01-03T00:00:00", "FB_4")
+
+    assert index.get("G1") == ["FB_1", "FB_2", "FB_3", "FB_4"]
+    assert index.get("G1", newest_first=True) == ["FB_4", "FB_3", "FB_2", "FB_1"]
+    assert index.get("G3") == [] and index.count("G1") == 4
+
+    assert index.remove("G1", "FB_3") and not index.remove("G1", "FB_3")
+    assert index.get("G1") == ["FB_1", "FB_2", "FB_4"]
+    assert index.remove("G2", "FB_X") and "G2" not in index.guest_ids()
+
+
+def test_crm_time_windows_and_reindex_on_update(tmp_path):
+    log = FeedbackLog(str(tmp_path / "feedback_submissions.json"), compact_every=0)
+    crm = CRMService(data_path=str(tmp_path / "crm"), submissions=FeedbackRepository(log))
+    now = datetime.now()
+
+    old_id = crm.add_feedback({"guest_id": "G900", "rating": 4})
+    crm.update_feedback(old_id, {"created_at": (now - timedelta(days=20)).isoformat()})
+    new_id = crm.add_feedback({"guest_id": "G900", "rating": 2})
+
+    assert [fb["feedback_id"] for fb in crm.get_feedback_by_guest("G900")] == [new_id, old_id]
+    assert [fb["feedback_id"] for fb in crm.get_feedback_by_guest("G900", days=7)] == [new_id]
+    assert [fb["feedback_id"] for fb in crm.get_guest_feedback("G900")] == [old_id, new_id]
+
+    # Moving feedback to another guest, or back in time, re-indexes it
+    crm.update_feedback(new_id, {"guest_id": "G901"})
+    assert [fb["feedback_id"] for fb in crm.get_feedback_by_guest("G900")] == [old_id]
+    assert [fb["feedback_id"] for fb in crm.get_feedback_by_guest("G901")] == [new_id]
+
+    crm.update_feedback(old_id, {"guest_id": "G901", "created_at": (now + timedelta(days=1)).isoformat()})
+    assert [fb["feedback_id"] for fb in crm.get_guest_feedback("G901")] == [new_id, old_id]
+    assert crm.get_feedback_by_guest("G900") == []
+    log.close()
@@ -0,0 +1,85 @@
+import json
+import os
+
+from app.services.feedback_log import FeedbackLog
+
+
+def test_append_and_compact(tmp_path):
+    """Appended records survive compaction into the JSON snapshot"""
+    snapshot = tmp_path / "feedback_submissions.json"
+    snapshot.write_text(json.dumps([{"feedback_id": "FB_OLD"}]))
+
+    log = FeedbackLog(str(snapshot), compact_every=0)
+    log.append({"feedback_id": "FB_NEW_1"})
+    log.append({"feedback_id": "FB_NEW_2"})
+    assert [r["feedback_id"] for r in log.load_all()] == ["FB_OLD", "FB_NEW_1", "FB_NEW_2"]
+
+    log.compact()
+    assert len(json.loads(snapshot.read_text())) == 3
+    assert [r["feedback_id"] for r in log.load_all()] == ["FB_OLD", "FB_NEW_1", "FB_NEW_2"]
+    log.close()
+
+
+def test_recovery_truncates_torn_write(tmp_path):
+    """A partially written trailing record is dropped on startup"""
+    snapshot = tmp_path / "feedback_submissions.json"
+    log = FeedbackLog(str(snapshot), compact_every=0)
+    log.append({"feedback_id": "FB_1"})
+    log.close()
+
+    segments = sorted(name for name in os.listdir(log.log_dir) if name.startswith("segment-"))
+    segment = os.path.join(log.log_dir, segments[-1])
+    with open(segment, "a") as f:
+        f.write('{"feedback_id": "FB_2"')
+
+    recovered = FeedbackLog(str(snapshot), compact_every=0)
+    assert [r["feedback_id"] for r in recovered.load_all()] == ["FB_1"]
+    recovered.append({"feedback_id": "FB_3"})
+    assert [r["feedback_id"] for r in recovered.load_all()] == ["FB_1", "FB_3"]
+    recovered.close()
+
+
+def test_two_writers_share_one_log(tmp_path):
+    """Two processes (here: two open logs) append to their own segments and compact safely"""
+    snapshot = str(tmp_path / "feedback_submissions.json")
+    first = FeedbackLog(snapshot, compact_every=0)
+    second = FeedbackLog(snapshot, compact_every=0)
+    first.open()
+    second.open()
+    assert first.writer_id != second.writer_id
+
+    first.append({"feedback_id": "FB_1", "state": "new"})
+    second.append({"feedback_id": "FB_2", "state": "new"})
+    second.append_update("FB_1", {"state": "done"})
+    first.append_update("FB_2", {"state": "done"})
+
+    # The other writer's active segment is left alone; the update to its record is carried over
+    first.compact()
+    assert json.loads(open(snapshot).read()) == [
+        {"feedback_id": "FB_1", "state": "new"},
+        {"_op": "update", "feedback_id": "FB_2", "fields": {"state": "done"}}
+    ]
+    records = {r["feedback_id"]: r for r in second.load_all()}
+    assert records == {"FB_1": {"feedback_id": "FB_1", "state": "done"}, "FB_2": {"feedback_id": "FB_2", "state": "done"}}
+    first.append({"feedback_id": "FB_3"})
+
+    second.close()
+    first.compact()
+    assert json.loads(open(snapshot).read()) == [
+        {"feedback_id": "FB_1", "state": "done"}, {"feedback_id": "FB_2", "state": "done"}, {"feedback_id": "FB_3"}
+    ]
+    assert [r["feedback_id"] for r in first.load_all()] == ["FB_1", "FB_2", "FB_3"]
+    first.close()
+
+
+def test_opening_the_log_does_not_claim_a_writer(tmp_path):
+    """Importing the app (tests, maintenance scripts) next to a running server only reads the log"""
+    snapshot = str(tmp_path / "feedback_submissions.json")
+    writer = FeedbackLog(snapshot, compact_every=0)
+    writer.append({"feedback_id": "FB_1"})
+
+    reader = FeedbackLog(snapshot, compact_every=0)
+    assert reader.writer_id is None
+    assert [r["feedback_id"] for r in reader.load_all()] == ["FB_1"]
+    reader.close()
+    writer.close()
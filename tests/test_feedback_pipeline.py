@@ -0,0 +1,95 @@
+import asyncio
+
+from app.services.feedback_log import FeedbackLog
+from app.services.feedback_pipeline import FeedbackPipeline
+
+
+def test_stages_run_in_background_and_resume_after_restart(tmp_path):
+    """Stage results are logged as updates; a restart resumes at the failed stage only"""
+    snapshot = str(tmp_path / "feedback_submissions.json")
+    calls = []
+    alerts_up = {"value": False}
+
+    async def sentiment(record):
+        calls.append("sentiment")
+        return {"sentiment_analysis": {"sentiment": "negative"}}
+
+    async def alert(record):
+        calls.append("alert")
+        if not alerts_up["value"]:
+            raise RuntimeError("alert store unavailable")
+        return {"alert_id": "ALERT_1"}
+
+    stages = [("sentiment", sentiment), ("alert", alert)]
+
+    async def first_run():
+        log = FeedbackLog(snapshot, compact_every=0)
+        pipeline = FeedbackPipeline(log, stages)
+        record = {"feedback_id": "FB_1", "comment": "cold room", "processing": pipeline.new_status()}
+        log.append(record)
+        pipeline.submit(record)
+        assert record["processing"]["state"] == "pending"
+        while record["processing"]["state"] in ("pending", "processing"):
+            await asyncio.sleep(0.01)
+        await pipeline.stop()
+        log.close()
+        return record
+
+    record = asyncio.run(first_run())
+    assert record["processing"]["state"] == "failed"
+    assert record["processing"]["stages"]["alert"]["error"] == "alert store unavailable"
+
+    log = FeedbackLog(snapshot, compact_every=0)
+    [logged] = log.load_all()
+    assert logged["sentiment_analysis"] == {"sentiment": "negative"}
+    assert logged["processing"]["stages"]["sentiment"]["status"] == "done"
+
+    alerts_up["value"] = True
+    calls.clear()
+
+    async def second_run():
+        pipeline = FeedbackPipeline(log, stages)
+        assert pipeline.resume([logged]) == 1
+        while not FeedbackPipeline.is_finished(logged):
+            await asyncio.sleep(0.01)
+        await pipeline.stop()
+
+    asyncio.run(second_run())
+    assert calls == ["alert"]
+    log.compact()
+    [compacted] = log.load_all()
+    assert compacted["alert_id"] == "ALERT_1"
+    assert compacted["processing"]["state"] == "complete"
+    log.close()
+
+
+def test_guest_routes_are_not_shadowed_by_the_status_route():
+    from starlette.routing import Match
+    from app.api.feedback_api import router
+
+    scope = {"type": "http", "method": "GET", "path": "/api/feedback/guest/status"}
+    matched = next(route for route in router.routes if route.matches(scope)[0] == Match.FULL)
+    assert matched.path == "/api/feedback/guest/{guest_id}"
+
+
+def test_status_of_feedback_submitted_before_the_pipeline(tmp_path, monkeypatch):
+    import json
+    from app.api import feedback_api
+    from app.models.user import User
+    from app.services.feedback_repository import FeedbackRepository
+
+    snapshot = tmp_path / "feedback_submissions.json"
+    snapshot.write_text(json.dumps([{
+        "feedback_id": "FB_20250702_143433", "guest_id": "guest_001", "rating": 2, "comment": "Cold room",
+        "sentiment_analysis": {"sentiment": "negative", "confidence": 0.9}, "submitted_at": "2025-07-02T14:34:33"
+    }]))
+    log = FeedbackLog(str(snapshot), compact_every=0)
+    monkeypatch.setattr(feedback_api, "feedback_repository", FeedbackRepository(log))
+    guest = User(user_id="guest_001", username="guest", email="g@example.com", role="customer",
+                 first_name="G", last_name="Uest")
+
+    response = asyncio.run(feedback_api.get_feedback_status("FB_20250702_143433", current_user=guest))
+    body = json.loads(response.body)
+    assert body["processing"]["state"] == "complete"
+    assert body["sentiment"] == "negative"
+    log.close()
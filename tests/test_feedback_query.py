@@ -0,0 +1,69 @@
+import random
+from datetime import datetime, timedelta
+
+from app.services.feedback_query import FeedbackQueryIndex
+from app.services.id_generator import IdGenerator
+
+
+def _records(count):
+    rng = random.Random(3)
+    now = [1_700_000_000.0]
+    generator = IdGenerator(worker_id=1, clock=lambda: now[0])
+    records = []
+    for _ in range(count):
+        now[0] += rng.uniform(0, 120)
+        records.append({
+            "feedback_id": generator.new_id("FB"),
+            "guest_id": rng.choice(["g1", "g2", "g3"]),
+            "category": rng.choice(["room", "dining", "spa"]),
+            "rating": rng.randint(1, 5),
+            "sentiment_analysis": {"sentiment": rng.choice(["positive", "negative"])},
+            "submitted_at": datetime.utcfromtimestamp(now[0]).isoformat(),
+            "comment": "x" * 50
+        })
+    return records
+
+
+def _walk(index, **filters):
+    pages, cursor = [], None
+    while True:
+        page = index.query(cursor=cursor, **filters)
+        assert page["scanned"] <= index.max_scan
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_exactly_the_matching_records():
+    records = _records(1000)
+    index = FeedbackQueryIndex(max_scan=50)
+    for record in reversed(records):
+        index.add(record)
+
+    since = datetime.fromisoformat(records[200]["submitted_at"])
+    until = datetime.fromisoformat(records[800]["submitted_at"])
+    filters = {"guest_id": "g2", "min_rating": 2, "max_rating": 4, "sentiment": "negative",
+               "since": since, "until": until}
+    pages = _walk(index, limit=7, fields=["rating"], **filters)
+
+    expected = [
+        r["feedback_id"] for r in reversed(records[200:801])
+        if r["guest_id"] == "g2" and 2 <= r["rating"] <= 4 and r["sentiment_analysis"]["sentiment"] == "negative"
+    ]
+    assert [item["feedback_id"] for page in pages for item in page] == expected
+    assert all(len(page) <= 7 for page in pages)
+    assert set(pages[0][0]) == {"feedback_id", "rating"}
+
+
+def test_new_records_appear_on_the_first_page():
+    index = FeedbackQueryIndex()
+    records = _records(30)
+    for record in records[:-1]:
+        index.add(record)
+    first = index.query(limit=5)
+    index.add(records[-1])
+    assert index.query(limit=1)["items"][0]["feedback_id"] == records[-1]["feedback_id"]
+    # An existing cursor keeps paging from where it was
+    assert index.query(limit=5, cursor=first["next_cursor"])["items"][0]["feedback_id"] == records[-7]["feedback_id"]
+    assert index.query(since=datetime(2100, 1, 1) - timedelta(days=1))["items"] == []
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from app.services.crm_service import CRMService
+from app.services.feedback_log import FeedbackLog
+from app.services.feedback_repository import FeedbackRepository
+from app.services.id_generator import IdGenerator
+
+
+def _submission(feedback_id, guest_id, submitted_at):
+    comment = f"Comment for {feedback_id}"
+    return {
+        "feedback_id": feedback_id,
+        "guest_id": guest_id,
+        "category": "room",
+        "rating": 4,
+        "comment": comment,
+        "sentiment_analysis": {"text": comment, "sentiment": "positive", "confidence": 0.9},
+        "submitted_at": submitted_at
+    }
+
+
+def test_repository_is_the_shared_view_after_restart(tmp_path):
+    snapshot = tmp_path / "feedback_submissions.json"
+    snapshot.write_text(json.dumps([_submission("FB_1", "G001", "2030-01-01T10:00:00")]))
+    log = FeedbackLog(str(snapshot), compact_every=0)
+    log.append(_submission("FB_2", "G001", "2030-01-02T10:00:00"))
+
+    repository = FeedbackRepository(log)
+    assert [r["feedback_id"] for r in repository.for_guest("G001", newest_first=True)] == ["FB_2", "FB_1"]
+    loaded = repository.get("FB_2")
+    assert loaded["sentiment_analysis"]["text"] is loaded["comment"]
+
+    # A record the initial load already picked up from the log is not duplicated
+    live = _submission("FB_2", "G001", "2030-01-02T10:00:00")
+    assert repository.add(live) is loaded
+    assert len(repository) == 2
+
+    crm = CRMService(data_path=str(tmp_path / "crm"), submissions=repository)
+    history = crm.get_feedback_by_guest("G001")
+    assert [fb["feedback_id"] for fb in history[:2]] == ["FB_2", "FB_1"]
+    assert history[2]["feedback_id"] == "F001"
+    log.close()
+
+
+def test_crm_date_filters_accept_utc_suffixed_timestamps(tmp_path):
+    log = FeedbackLog(str(tmp_path / "feedback_submissions.json"), compact_every=0)
+    an_hour_ago = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    recent = dict(_submission("FB_1", "G001", an_hour_ago), timestamp=an_hour_ago + "Z")
+    old = dict(_submission("FB_2", "G001", "2020-01-01T10:00:00"), timestamp="2020-01-01T10:00:00Z")
+    for record in (recent, old):
+        log.append(record)
+
+    crm = CRMService(data_path=str(tmp_path / "crm"), submissions=FeedbackRepository(log))
+    assert [fb["feedback_id"] for fb in crm.get_feedback_by_guest("G001", days=7)] == ["FB_1"]
+    assert "FB_1" in [fb["feedback_id"] for fb in crm.get_recent_feedback(days=7)]
+    assert "FB_2" not in [fb["feedback_id"] for fb in crm.get_recent_feedback(days=7)]
+    log.close()
+
+
+def test_waiting_for_the_load_does_not_block_the_event_loop(tmp_path):
+    log = FeedbackLog(str(tmp_path / "feedback_submissions.json"), compact_every=0)
+    for i in range(5):
+        log.append(_submission(f"FB_{i}", "G001", f"2030-01-0{i + 1}T10:00:00"))
+    repository = FeedbackRepository(log)
+    entries = log.iter_entries
+
+    def slow_entries():
+        for entry in entries():
+            time.sleep(0.05)
+            yield entry
+
+    log.iter_entries = slow_entries
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        startup = asyncio.create_task(repository.wait_loaded())
+        await asyncio.sleep(0.02)
+        # A request arriving mid-load waits without stalling the loop
+        await repository.wait_loaded()
+        await startup
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 10
+    assert len(repository) == 5
+    log.close()
+
+
+def test_ids_issued_after_a_restart_sort_after_the_loaded_ones(tmp_path):
+    log = FeedbackLog(str(tmp_path / "feedback_submissions.json"), compact_every=0)
+    stored_id = IdGenerator(worker_id=1, clock=lambda: 1900000000.0).new_id("FB")
+    log.append(_submission(stored_id, "G001", "2030-03-17T17:46:40"))
+    log.append(_submission("FB_20250702_143433", "G001", "2025-07-02T14:34:33"))
+
+    # The clock now reads earlier than when the stored record was issued
+    ids = IdGenerator(worker_id=2, clock=lambda: 1800000000.0)
+    FeedbackRepository(log, ids=ids).ensure_loaded()
+    assert ids.new_id("FB") > stored_id
+    log.close()
+
+
+def test_update_logged_by_another_writer_before_its_record_is_applied(tmp_path):
+    snapshot = str(tmp_path / "feedback_submissions.json")
+    first = FeedbackLog(snapshot, compact_every=0)
+    second = FeedbackLog(snapshot, compact_every=0)
+    first.open()
+    second.open()
+
+    # The second writer's segment is read after the first's, so the update comes first
+    second.append(_submission("FB_1", "G001", "2030-01-01T10:00:00"))
+    first.append_update("FB_1", {"rating": 1})
+
+    repository = FeedbackRepository(FeedbackLog(snapshot, compact_every=0))
+    assert repository.get("FB_1")["rating"] == 1
+    assert [r["rating"] for r in repository.log.load_all()] == [1]
+    first.close()
+    second.close()
@@ -0,0 +1,46 @@
+import threading
+
+from app.services.id_generator import IdGenerator, parse_id
+
+
+def test_ids_are_unique_and_sorted_under_contention():
+    generator = IdGenerator(worker_id=7, clock=lambda: 1_700_000_000.123)
+    ids = []
+
+    def issue():
+        ids.extend(generator.new_id("FB") for _ in range(3000))
+
+    threads = [threading.Thread(target=issue) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == 12000
+    ordered = sorted(ids)
+    assert ordered[0] == "FB_20231114_221320123_0070000"
+    # 10,000 IDs fit in the frozen millisecond, the rest borrow the next one
+    assert parse_id(ordered[-1])["ms"] == 1_700_000_000_124
+
+
+def test_clock_going_backwards_and_restarts_keep_order():
+    now = [1_700_000_000.5]
+    generator = IdGenerator(worker_id=1, clock=lambda: now[0])
+    first = generator.new_id("ALERT")
+    now[0] -= 60
+    second = generator.new_id("ALERT")
+    assert second > first
+
+    restarted = IdGenerator(worker_id=1, clock=lambda: now[0])
+    restarted.observe(second)
+    assert restarted.new_id("ALERT") > second
+    assert parse_id("F001") is None
+
+
+def test_default_worker_ids_are_claimed_exclusively(tmp_path):
+    generators = [IdGenerator(lock_dir=str(tmp_path)) for _ in range(3)]
+    assert len({generator.worker_id for generator in generators}) == 3
+
+    released = generators[0].worker_id
+    generators[0]._worker_lock.close()
+    assert IdGenerator(lock_dir=str(tmp_path)).worker_id == released
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.services.inference_worker import MicroBatchWorker
+
+
+def test_concurrent_submits_share_one_batch():
+    batches = []
+
+    def batch_fn(texts):
+        batches.append(list(texts))
+        return [text.upper() for text in texts]
+
+    worker = MicroBatchWorker(batch_fn, max_batch_size=16, max_wait_ms=200)
+
+    async def run():
+        return await asyncio.gather(
+            worker.submit(["a", "b"]),
+            worker.submit(["c"]),
+            worker.submit(["d", "e", "f"])
+        )
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        worker.stop(timeout=5)
+
+    assert results == [["A", "B"], ["C"], ["D", "E", "F"]]
+    assert batches == [["a", "b", "c", "d", "e", "f"]]
+
+
+def test_batch_errors_reach_every_caller_in_the_batch():
+    def batch_fn(texts):
+        raise ValueError("model failed")
+
+    worker = MicroBatchWorker(batch_fn, max_batch_size=4, max_wait_ms=200)
+
+    async def run():
+        return await asyncio.gather(worker.submit(["a"]), worker.submit(["b"]), return_exceptions=True)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        worker.stop(timeout=5)
+
+    assert [str(result) for result in results] == ["model failed", "model failed"]
@@ -0,0 +1,40 @@
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from app.services.json_stream import iter_json_records, load_json_records
+
+
+RECORDS = [{"id": i, "name": "é" * (i % 40), "scores": [i, 1.5, None], "big": 12345678901234} for i in range(500)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_all_document_shapes_round_trip(chunk_size):
+    def stream(text, **kwargs):
+        return list(iter_json_records(io.StringIO(text), chunk_size=chunk_size, **kwargs))
+
+    assert stream(json.dumps(RECORDS, indent=2)) == RECORDS
+    assert stream(json.dumps({"meta": {"guests": 1}, "guests": RECORDS, "z": [1]}), key="guests") == RECORDS
+    assert stream("\n".join(json.dumps(r) for r in RECORDS) + "\n", lines=True) == RECORDS
+    assert stream("[1, 23, 456]") == [1, 23, 456]
+    assert stream('{"other": []}', key="guests") == []
+    with pytest.raises(ValueError):
+        stream('[{"id": 1}, {"id": ')
+
+
+def test_memory_stays_bounded_by_the_record(tmp_path):
+    path = tmp_path / "feedback.json"
+    record = {"comment": "x" * 200, "rating": 4, "sentiment_analysis": {"sentiment": "positive"}}
+    with open(path, "w") as f:
+        f.write("[" + ",".join(json.dumps(dict(record, feedback_id=f"FB_{i}")) for i in range(50000)) + "]")
+    assert path.stat().st_size > 10_000_000
+
+    tracemalloc.start()
+    count = sum(1 for _ in load_json_records(str(path)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert count == 50000
+    assert peak < 1_000_000
@@ -0,0 +1,23 @@
+import json
+
+from app.services.keyword_sentiment import KeywordSentimentEngine, load_lexicon
+
+
+def test_whole_words_and_negation():
+    """Keywords match whole tokens only, and negation flips the following words"""
+    engine = KeywordSentimentEngine()
+    assert engine.classify("They took a photo of the shotel sign") == ("neutral", 0.5)
+    assert engine.classify("The room was not clean and the staff weren't helpful")[0] == "negative"
+    assert engine.classify("Not bad, really. Great pool")[0] == "positive"
+    assert engine.classify("Clean rooms")[0] == "positive"
+
+
+def test_batch_results_and_custom_lexicon(tmp_path):
+    lexicon_path = tmp_path / "lexicon.json"
+    lexicon_path.write_text(json.dumps({"positive": {"spotless": 3}, "negative": {"mould": 2}}))
+    engine = KeywordSentimentEngine(load_lexicon(str(lexicon_path)))
+
+    results = engine.analyze_batch(["Spotless bathroom", "Mould in the shower", "Fine"])
+    assert [r["sentiment"] for r in results] == ["positive", "negative", "neutral"]
+    assert results[0]["confidence"] == 0.9
+    assert results[1]["is_negative"] and results[1]["model"] == "fallback-keyword-based"
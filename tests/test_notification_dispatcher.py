@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.notification_dispatcher import SlackDispatcher
+
+
+@pytest.fixture
+def webhook():
+    """Local stand-in for a Slack webhook that answers with a scripted list of status codes"""
+    received = []
+    statuses = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append(json.loads(body))
+            status = statuses.pop(0) if statuses else 200
+            self.send_response(status)
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/hook", received, statuses
+    server.shutdown()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_burst_is_coalesced_and_retried(webhook, tmp_path):
+    """A burst becomes one digest, and a 5xx is retried until it is delivered"""
+    url, received, statuses = webhook
+    statuses.append(503)
+    queue_path = tmp_path / "queue.jsonl"
+    dispatcher = SlackDispatcher(url, queue_path=str(queue_path), coalesce_window_ms=50, base_backoff_seconds=0.01)
+
+    for i in range(3):
+        dispatcher.enqueue({"text": f"alert {i}"})
+
+    assert _wait_for(lambda: dispatcher.stats()["delivered"] == 3)
+    assert len(received) == 2
+    assert received[1]["text"] == "🚨 3 Negative Guest Feedback Alerts"
+    assert [a["text"] for a in received[1]["attachments"]] == ["alert 0", "alert 1", "alert 2"]
+    assert queue_path.read_text() == ""
+    dispatcher.stop()
+
+
+def test_rejected_alerts_are_dead_lettered(webhook, tmp_path):
+    """A 4xx is not retried; the alert goes to the dead-letter file"""
+    url, received, statuses = webhook
+    statuses.append(400)
+    dead_letter_path = tmp_path / "dead.jsonl"
+    dispatcher = SlackDispatcher(url, dead_letter_path=str(dead_letter_path), coalesce_window_ms=10)
+
+    dispatcher.enqueue({"text": "bad payload"})
+
+    assert _wait_for(lambda: dispatcher.stats()["dead_lettered"] == 1)
+    assert len(received) == 1
+    record = json.loads(dead_letter_path.read_text())
+    assert record["attachment"] == {"text": "bad payload"}
+    assert record["error"].startswith("HTTP 400")
+    dispatcher.stop()
+
+
+def test_undelivered_alerts_survive_restart(webhook, tmp_path):
+    """Alerts still queued at shutdown are delivered by the next dispatcher"""
+    url, received, _ = webhook
+    queue_path = tmp_path / "queue.jsonl"
+    stopped = SlackDispatcher(url, queue_path=str(queue_path), coalesce_window_ms=60000)
+    stopped.enqueue({"text": "queued before restart"})
+    stopped.stop()
+    assert received == []
+
+    resumed = SlackDispatcher(url, queue_path=str(queue_path), coalesce_window_ms=10)
+    assert _wait_for(lambda: resumed.stats()["delivered"] == 1)
+    assert received[0]["attachments"] == [{"text": "queued before restart"}]
+    resumed.stop()
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("transformers")
+
+from app.services.onnx_sentiment import OnnxSentimentEngine
+
+MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+
+SAMPLE_TEXTS = [
+    "The room was spotless and the staff were wonderful.",
+    "Terrible service, the air conditioning never worked and nobody helped.",
+    "Check-in was fine.",
+    "I loved the spa but breakfast was cold and overpriced.",
+]
+
+
+@pytest.fixture(scope="module")
+def engines(tmp_path_factory):
+    from transformers import pipeline
+    try:
+        torch_pipeline = pipeline("sentiment-analysis", model=MODEL_NAME, tokenizer=MODEL_NAME, return_all_scores=True)
+        onnx_engine = OnnxSentimentEngine(MODEL_NAME, export_dir=str(tmp_path_factory.mktemp("onnx")))
+    except OSError as e:
+        pytest.skip(f"model not available: {e}")
+    return torch_pipeline, onnx_engine
+
+
+def test_onnx_matches_torch(engines):
+    """The int8 engine agrees with the torch pipeline on labels and stays close on scores"""
+    torch_pipeline, onnx_engine = engines
+    torch_results = torch_pipeline(SAMPLE_TEXTS, truncation=True, padding=True)
+    onnx_results = onnx_engine(SAMPLE_TEXTS, truncation=True, padding=True)
+
+    assert len(onnx_results) == len(torch_results)
+    for torch_scores, onnx_scores in zip(torch_results, onnx_results):
+        expected = {r["label"]: r["score"] for r in torch_scores}
+        actual = {r["label"]: r["score"] for r in onnx_scores}
+        assert actual.keys() == expected.keys()
+        assert max(actual, key=actual.get) == max(expected, key=expected.get)
+        for label, score in expected.items():
+            assert actual[label] == pytest.approx(score, abs=0.05)
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import random
+
+from app.services.recommendation_catalog import RecommendationCatalog
+
+
+def _write_catalog(path, dining, version="1"):
+    path.write_text(json.dumps({"version": version, "dining": dining}))
+
+
+def test_candidates_contain_the_true_top_k(tmp_path):
+    """Indexed candidates always include the best items a full scan would pick"""
+    rng = random.Random(7)
+    dining = [
+        {
+            "name": f"Venue {i}",
+            "cuisine": rng.choice(["asian", "local", "international", "mediterranean"]),
+            "price_tier": rng.choice(["budget", "standard", "premium"]),
+            "rating": round(rng.uniform(3.0, 5.0), 1)
+        }
+        for i in range(2000)
+    ]
+    path = tmp_path / "catalog.json"
+    _write_catalog(path, dining)
+    snapshot = RecommendationCatalog(str(path)).current()
+
+    wanted = {"cuisine": "asian", "price_tier": "premium"}
+
+    def rank(entry):
+        position, item = entry
+        score = item["rating"] / 5.0 + 0.3 * (item["cuisine"] == "asian") + 0.2 * (item["price_tier"] == "premium")
+        return (score, item["rating"], -position)
+
+    candidates = list(snapshot.candidates("dining", wanted, 3))
+    assert len(candidates) <= 12
+    expected = sorted(enumerate(dining), key=rank, reverse=True)[:3]
+    assert sorted(candidates, key=rank, reverse=True)[:3] == expected
+
+
+def test_catalog_hot_reloads_on_change(tmp_path):
+    path = tmp_path / "catalog.json"
+    _write_catalog(path, [{"name": "Old", "cuisine": "local", "price_tier": "budget", "rating": 4.0}])
+    catalog = RecommendationCatalog(str(path), check_interval=0)
+    first_version = catalog.version
+
+    _write_catalog(path, [{"name": "New", "cuisine": "local", "price_tier": "budget", "rating": 4.5}], version="2")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert catalog.current().items["dining"][0]["name"] == "New"
+    assert catalog.version != first_version
+
+    path.write_text("{ not json")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000))
+    assert catalog.current().items["dining"][0]["name"] == "New"
+
+
+def test_recommendations_are_cached_until_invalidated(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.json"
+    _write_catalog(path, [{"name": "Old", "cuisine": "local", "price_tier": "budget", "rating": 4.0}])
+    monkeypatch.setenv("RECOMMENDATION_CATALOG_PATH", str(path))
+    monkeypatch.setenv("RECOMMENDATION_CATALOG_CHECK_SECONDS", "0")
+
+    from app.services.recommendation_service import RecommendationService
+    service = RecommendationService()
+    service.guests_data = [{"guest_id": "G1", "first_name": "Ana", "preferences": {"cuisine": "local"}}]
+    service._build_indexes()
+
+    first = asyncio.run(service.get_personalized_recommendations("G1"))
+    assert asyncio.run(service.get_personalized_recommendations("G1")) is first
+
+    service.add_feedback({"guest_id": "G1", "rating": 1, "submitted_at": "2024-01-01T00:00:00"})
+    rescored = asyncio.run(service.get_personalized_recommendations("G1"))
+    assert rescored is not first
+    assert rescored["personalization_score"] == 0.2
+
+    assert service.update_guest_profile("G1", {"first_name": "Ann"})
+    assert asyncio.run(service.get_personalized_recommendations("G1"))["guest_name"].startswith("Ann")
+
+    _write_catalog(path, [{"name": "New", "cuisine": "local", "price_tier": "budget", "rating": 4.5}], version="2")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert asyncio.run(service.get_personalized_recommendations("G1"))["dining"][0]["name"] == "New"
+
+
+def test_crm_profile_edits_invalidate_cached_recommendations(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.json"
+    _write_catalog(path, [
+        {"name": "Harbour Grill", "cuisine": "seafood", "price_tier": "budget", "rating": 4.0},
+        {"name": "Trattoria", "cuisine": "italian", "price_tier": "budget", "rating": 4.0}
+    ])
+    monkeypatch.setenv("RECOMMENDATION_CATALOG_PATH", str(path))
+
+    from app.services.crm_service import CRMService
+    from app.services.recommendation_service import RecommendationService
+    service = RecommendationService()
+    service.guests_data = [{"guest_id": "G001", "first_name": "Ana", "preferences": {"cuisine": "seafood"}}]
+    service._build_indexes()
+    crm = CRMService(data_path=str(tmp_path / "crm"), recommendations=service)
+
+    first = asyncio.run(service.get_personalized_recommendations("G001"))
+    assert first["dining"][0]["name"] == "Harbour Grill"
+
+    assert crm.update_guest("G001", {"preferences": {"cuisine": "italian"}})
+    assert len(service.recommendations_cache) == 0
+    assert asyncio.run(service.get_personalized_recommendations("G001"))["dining"][0]["name"] == "Trattoria"
+
+
+def test_backfilled_sentiment_is_stored_and_not_redone(tmp_path, monkeypatch):
+    from app.services import recommendation_service as module
+    from app.services.crm_storage import JSONCRMStorage
+
+    (tmp_path / "comprehensive_feedback_data.json").write_text(json.dumps({"feedback": [
+        {"feedback_id": "F1", "guest_id": "G1", "comment": "Lovely stay", "rating": 5},
+        {"feedback_id": "F2", "guest_id": "G1", "comment": "Fine", "sentiment": {"label": "neutral"}}
+    ]}))
+    scored = []
+
+    async def analyze_batch(texts, send_alerts=True):
+        scored.extend(texts)
+        return [{"sentiment": "positive", "confidence": 0.9} for _ in texts]
+
+    async def wait_for_model(timeout=None):
+        return True
+
+    monkeypatch.setattr(module.sentiment_service, "analyze_batch", analyze_batch)
+    monkeypatch.setattr(module.sentiment_service, "wait_for_model", wait_for_model)
+
+    assert asyncio.run(module.RecommendationService(JSONCRMStorage(str(tmp_path))).backfill_sentiment()) == 1
+    assert scored == ["Lovely stay"]
+
+    # After a restart the stored score is used and nothing is scored again
+    restarted = module.RecommendationService(JSONCRMStorage(str(tmp_path)))
+    assert asyncio.run(restarted.backfill_sentiment()) == 0
+    stored = {fb["feedback_id"]: fb for fb in restarted.feedback_data}
+    assert stored["F1"]["sentiment_analysis"]["sentiment"] == "positive"
+    assert stored["F2"]["sentiment"] == {"label": "neutral"}
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.sentiment_service import SentimentAnalysisService
+
+
+class StubModel:
+    """Stands in for the transformers pipeline; counts the texts it scores"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, texts, **kwargs):
+        self.release.wait(5)
+        self.calls.append(list(texts))
+        return [
+            [{"label": "NEGATIVE", "score": 0.9}, {"label": "POSITIVE", "score": 0.1}]
+            if "bad" in text else
+            [{"label": "NEGATIVE", "score": 0.1}, {"label": "POSITIVE", "score": 0.9}]
+            for text in texts
+        ]
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    monkeypatch.setenv("SENTIMENT_MODEL_LOADING", "disabled")
+    monkeypatch.setenv("SLACK_QUEUE_PATH", str(tmp_path / "slack_queue.jsonl"))
+    monkeypatch.setenv("SLACK_DEAD_LETTER_PATH", str(tmp_path / "slack_dead_letter.jsonl"))
+    monkeypatch.setenv("SENTIMENT_CACHE_PATH", str(tmp_path / "sentiment_cache.jsonl"))
+    services = []
+
+    def make():
+        service = SentimentAnalysisService()
+        service.sentiment_analyzer = StubModel()
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.inference_worker.stop(timeout=5)
+        service.result_cache.close()
+
+
+def test_repeats_are_served_from_the_cache_and_persisted(make_service):
+    service = make_service()
+
+    async def run():
+        first = await service.analyze_sentiment("Lovely pool")
+        second = await service.analyze_sentiment("  lovely   POOL ")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["sentiment"] == second["sentiment"] == "positive"
+    assert service.sentiment_analyzer.calls == [["Lovely pool"]]
+
+    service.result_cache.close()
+    restarted = make_service()
+    assert asyncio.run(restarted.analyze_sentiment("Lovely pool"))["sentiment"] == "positive"
+    assert restarted.sentiment_analyzer.calls == []
+
+
+def test_concurrent_requests_share_in_flight_inference(make_service):
+    service = make_service()
+    model = service.sentiment_analyzer
+    model.release.clear()
+
+    async def run():
+        owner = asyncio.create_task(service.analyze_sentiment("Great spa"))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(service.analyze_sentiment("great spa"))
+        await asyncio.sleep(0.05)
+        model.release.set()
+        return await asyncio.gather(owner, waiter)
+
+    results = asyncio.run(run())
+    assert [r["sentiment"] for r in results] == ["positive", "positive"]
+    assert model.calls == [["Great spa"]]
+    assert service._inflight == {}
+
+
+def test_cancelled_request_releases_its_in_flight_texts(make_service):
+    service = make_service()
+    model = service.sentiment_analyzer
+    model.release.clear()
+
+    async def run():
+        owner = asyncio.create_task(service.analyze_sentiment("bad food"))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.create_task(service.analyze_sentiment("bad food"))
+        await asyncio.sleep(0.05)
+        owner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        model.release.set()
+        later = await asyncio.wait_for(service.analyze_sentiment("bad food"), timeout=5)
+        return await asyncio.wait_for(waiter, timeout=5), later
+
+    waited, later = asyncio.run(run())
+    assert waited["sentiment"] == later["sentiment"] == "negative"
+    assert service._inflight == {}
+
+
+def test_batches_are_length_sorted_and_returned_in_input_order(make_service):
+    service = make_service()
+    texts = ["a much longer comment about the bad food", "ok", "bad", "a medium length note"]
+
+    scores = service._score_texts(texts)
+
+    assert service.sentiment_analyzer.calls == [sorted(texts, key=len)]
+    assert [max(s, key=s.get) for s in scores] == ["negative", "positive", "negative", "positive"]
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from app.models.user import UserSession
+from app.services.session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+def _session(token, expires_in):
+    return UserSession(
+        user_id=f"user_{token}",
+        username=f"user_{token}",
+        role="customer",
+        session_token=token,
+        expires_at=datetime.utcnow() + timedelta(seconds=expires_in)
+    )
+
+
+def test_memory_sweep_removes_only_expired_sessions():
+    """The TTL heap sweep drops expired sessions and notifies listeners"""
+    store = InMemorySessionStore()
+    swept = []
+    store.add_expiry_listener(swept.extend)
+    store.put(_session("old", -10))
+    store.put(_session("live", 3600))
+    store.put(_session("gone", -5))
+    store.delete("gone")
+
+    assert store.sweep() == ["old"]
+    assert swept == ["old"]
+    assert store.get("old") is None
+    assert store.get("live").user_id == "user_live"
+    assert len(store) == 1
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    """Two stores on the same database (separate workers) see each other's sessions"""
+    db_path = str(tmp_path / "sessions.sqlite3")
+    worker_a = SQLiteSessionStore(db_path)
+    worker_b = SQLiteSessionStore(db_path)
+
+    worker_a.put(_session("shared", 3600))
+    worker_a.put(_session("stale", -1))
+    assert worker_b.get("shared").username == "user_shared"
+
+    assert worker_b.sweep() == ["stale"]
+    assert worker_b.delete("shared")
+    assert worker_a.get("shared") is None
+    worker_a.close()
+    worker_b.close()